@@ -0,0 +1,33 @@
+"""dataset_version
+
+Revision ID: 3b9d6e2f8a51
+Revises: 7e3f1b2c9d40
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+import time
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3b9d6e2f8a51"
+down_revision = "7e3f1b2c9d40"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One row, bumped by the populate_db loaders in their own transaction
+    table = op.create_table(
+        "dataset_version",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("version", sa.Integer, nullable=False),
+        sa.Column("modified", sa.Float, nullable=False),
+    )
+    op.bulk_insert(table, [{"id": 1, "version": 0, "modified": time.time()}])
+
+
+def downgrade() -> None:
+    op.drop_table("dataset_version")
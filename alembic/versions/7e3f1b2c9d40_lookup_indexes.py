@@ -0,0 +1,58 @@
+"""lookup_indexes
+
+Revision ID: 7e3f1b2c9d40
+Revises: c58caaccce45
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7e3f1b2c9d40"
+down_revision = "c58caaccce45"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Company name lookups in crud.get_company and friends
+    op.create_index("ix_companies_title", "companies", ["title"])
+    op.create_index(
+        "ix_companies_title_lower", "companies", [sa.text("lower(title)")]
+    )
+    # Per year scans and the company_years joins in both directions. The
+    # initial migration created company_years without the primary key the ORM
+    # declares, so a unique index on both columns stands in for it and also
+    # serves lookups by company_id
+    op.create_index("ix_years_year", "years", ["year"])
+    op.create_index(
+        "ux_company_years_company_id_year_id",
+        "company_years",
+        ["company_id", "year_id"],
+        unique=True,
+    )
+    op.create_index("ix_company_years_year_id", "company_years", ["year_id"])
+    # Substring and fuzzy name search
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            "ix_companies_title_trgm",
+            "companies",
+            ["title"],
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_companies_title_trgm", table_name="companies")
+    op.drop_index("ix_company_years_year_id", table_name="company_years")
+    op.drop_index(
+        "ux_company_years_company_id_year_id", table_name="company_years"
+    )
+    op.drop_index("ix_years_year", table_name="years")
+    op.drop_index("ix_companies_title_lower", table_name="companies")
+    op.drop_index("ix_companies_title", table_name="companies")
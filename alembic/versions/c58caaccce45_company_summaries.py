@@ -0,0 +1,96 @@
+"""company_summaries
+
+Revision ID: c58caaccce45
+Revises: 0dbac9a36110
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from itertools import groupby
+from operator import itemgetter
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c58caaccce45"
+down_revision = "0dbac9a36110"
+branch_labels = None
+depends_on = None
+
+SCOPES = ("scope1_2", "scope1_2_3")
+
+
+def summarize(company_id, rows):
+    # Same as populate_db/refresh_summaries.py at this revision, copied so the
+    # migration doesn't change with the application
+    summary = {"company_id": company_id, "year_count": len(rows)}
+    for index, scope in enumerate(SCOPES, start=1):
+        # NaN cells from the workbook count as missing, like NULL
+        reported = [
+            (row[0], row[index])
+            for row in rows
+            if row[index] is not None and row[index] == row[index]
+        ]
+        first_year, first = reported[0] if reported else (None, None)
+        last_year, last = reported[-1] if reported else (None, None)
+        change, percent_change = None, None
+        if reported:
+            change = last - first
+            percent_change = 100 * change / first if first else None
+        summary.update(
+            {
+                f"{scope}_first_year": first_year,
+                f"{scope}_first": first,
+                f"{scope}_last_year": last_year,
+                f"{scope}_last": last,
+                f"{scope}_change": change,
+                f"{scope}_percent_change": percent_change,
+            }
+        )
+    return summary
+
+
+def upgrade() -> None:
+    # One row per company, rebuilt by populate_db/refresh_summaries.py
+    columns = []
+    for scope in ("scope1_2", "scope1_2_3"):
+        columns += [
+            sa.Column(f"{scope}_first_year", sa.Integer, nullable=True),
+            sa.Column(f"{scope}_first", sa.Float, nullable=True),
+            sa.Column(f"{scope}_last_year", sa.Integer, nullable=True),
+            sa.Column(f"{scope}_last", sa.Float, nullable=True),
+            sa.Column(f"{scope}_change", sa.Float, nullable=True),
+            sa.Column(f"{scope}_percent_change", sa.Float, nullable=True),
+        ]
+    table = op.create_table(
+        "company_summaries",
+        sa.Column(
+            "company_id",
+            sa.Integer,
+            sa.ForeignKey("companies.id"),
+            primary_key=True,
+        ),
+        sa.Column("year_count", sa.Integer, nullable=False),
+        *columns,
+    )
+    # Summarize what is already loaded, so the change endpoints keep
+    # answering without a manual refresh_summaries run
+    rows = op.get_bind().execute(
+        sa.text(
+            "SELECT company_years.company_id, years.year, years.scope1_2,"
+            " years.scope1_2_3 FROM company_years"
+            " JOIN years ON years.id = company_years.year_id"
+            " ORDER BY company_years.company_id, years.year"
+        )
+    )
+    summaries = [
+        summarize(company_id, [tuple(row[1:]) for row in group])
+        for company_id, group in groupby(rows, key=itemgetter(0))
+    ]
+    if summaries:
+        op.bulk_insert(table, summaries)
+
+
+def downgrade() -> None:
+    op.drop_table("company_summaries")
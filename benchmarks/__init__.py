@@ -0,0 +1 @@
+"""Benchmarks for the climate api, run with ``python -m benchmarks.<name>``"""
@@ -0,0 +1,122 @@
+"""Measure throughput as the number of in-flight requests grows
+
+Drives the app in-process through httpx's ASGI transport, so the only
+thing being measured is the app and its database. Run it once per mode:
+
+    python -m benchmarks.concurrency --mode sync
+    python -m benchmarks.concurrency --mode async
+
+Without --url a temporary SQLite database is generated; pass a Postgres URL
+to see the effect of real network latency on each mode.
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+ENDPOINTS = [
+    "/companies/{company}",
+    "/companies/{company}/all_years",
+    "/companies/{company}/change_1_2",
+    "/companies/{company}/2019",
+    "/year/2019/total",
+]
+
+
+def seed_sqlite(url: str, n_companies: int) -> None:
+    """Write a synthetic dataset to a SQLite database
+
+    Args:
+        url (str): URL of the database
+        n_companies (int): How many companies to generate
+    """
+    # The models import the database settings, which must be configured first
+    # pylint: disable=import-outside-toplevel
+    from benchmarks import dataset
+
+    engine = create_engine(url)
+    dataset.create_tables(engine)
+    with sessionmaker(bind=engine)() as session:
+        dataset.load(session, dataset.generate(n_companies))
+    engine.dispose()
+
+
+async def drive(app, level: int, n_requests: int, n_companies: int) -> dict:
+    """Send n_requests with at most level of them in flight
+
+    Args:
+        app (FastAPI): Application to drive
+        level (int): Maximum concurrent requests
+        n_requests (int): Total requests to send
+        n_companies (int): How many companies exist to pick from
+
+    Returns:
+        dict: Throughput and latency for this level
+    """
+    # pylint: disable=import-outside-toplevel
+    import httpx
+
+    paths = itertools.cycle(
+        endpoint.format(company=f"Company {i % n_companies + 1:07d}")
+        for i, endpoint in enumerate(ENDPOINTS * 7)
+    )
+    semaphore = asyncio.Semaphore(level)
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(path):
+            async with semaphore:
+                start = time.perf_counter()
+                await client.get(path)
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(next(paths)) for _ in range(n_requests)))
+        elapsed = time.perf_counter() - start
+    return {
+        "in_flight": level,
+        "requests_per_second": n_requests / elapsed,
+        "mean_latency_ms": 1000 * sum(latencies) / len(latencies),
+    }
+
+
+def main():
+    """Parse arguments, run every concurrency level and print the results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["sync", "async"], default="async")
+    parser.add_argument("--url", help="Existing database to query")
+    parser.add_argument("--companies", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    # Settings are read when the app is imported, so configure them first
+    os.environ["DB_MODE"] = args.mode
+    # Measure the database path rather than the read cache
+    os.environ.setdefault("CACHE_ENABLED", "0")
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'climate.db')}"
+    os.environ["HEROKU_DATABASE_URL"] = url
+    if not args.url:
+        seed_sqlite(url, args.companies)
+    # pylint: disable=import-outside-toplevel
+    from src.climate_api.main import app
+
+    print(f"mode={args.mode}")
+    print("in_flight  req/s    mean ms")
+    for level in args.levels:
+        result = asyncio.run(drive(app, level, args.requests, args.companies))
+        print(
+            f"{result['in_flight']:>9}  {result['requests_per_second']:>7.1f}"
+            f"  {result['mean_latency_ms']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
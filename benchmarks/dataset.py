@@ -0,0 +1,177 @@
+"""Synthetic dataset matching the companies/years/company_years/goals schema
+
+Small datasets are generated in memory with generate(). Larger ones, up to a
+million companies, are written batch by batch into a database that the other
+benchmarks can reuse with --url:
+
+    python -m benchmarks.dataset sqlite:////tmp/bench.db --companies 1000000
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.climate_api.database import Base
+from src.climate_api.internal.Company import Company
+from src.climate_api.internal.CompanyYear import CompanyYear
+from src.climate_api.internal.Goal import Goal
+from src.climate_api.internal.Year import Year
+from src.climate_api.populate_db.refresh_summaries import refresh_summaries
+
+# Same year range as populate_db.populate_emissions, which skips 2007
+YEARS = [year for year in range(2005, 2024) if year != 2007]
+TABLES = [Goal.__table__, Company.__table__, Year.__table__, CompanyYear.__table__]
+
+
+def create_tables(engine) -> None:
+    """Create every table used by the api on the given engine
+
+    Args:
+        engine (Engine): SQLAlchemy engine
+    """
+    Base.metadata.create_all(engine)
+
+
+def generate_batches(
+    n_companies: int,
+    seed: int = 0,
+    missing: float = 0.2,
+    batch_size: int = 10000,
+):
+    """Generate rows for every table, batch_size companies at a time
+
+    Rows only depend on the seed and the company, so a million companies can
+    be loaded without holding them all in memory, and the concatenated
+    batches equal generate() for any batch_size.
+
+    Args:
+        n_companies (int): How many companies to generate
+        seed (int, optional): Random seed. Defaults to 0.
+        missing (float, optional): Chance that an emissions value is null. Defaults to 0.2.
+        batch_size (int, optional): Companies per batch. Defaults to 10000.
+
+    Yields:
+        dict: Table name to list of row dicts for the next companies
+    """
+    rng = random.Random(seed)
+    for first in range(1, n_companies + 1, batch_size):
+        rows = {"goals": [], "companies": [], "years": [], "company_years": []}
+        for company_id in range(first, min(first + batch_size, n_companies + 1)):
+            goal_id = None
+            if company_id % 2:
+                goal_id = (company_id + 1) // 2
+                rows["goals"].append(
+                    {
+                        "id": goal_id,
+                        "scope12_target_year": rng.choice([2030, 2040, 2050]),
+                        "scope12_percent_decrease": rng.choice([25.0, 50.0, 100.0]),
+                        "scope3_target_year": rng.choice([2030, 2040, 2050]),
+                        "scope3_percent_decrease": rng.choice([25.0, 50.0, 100.0]),
+                        "reference_year": rng.choice([2015, 2018, 2019]),
+                    }
+                )
+            rows["companies"].append(
+                {
+                    "id": company_id,
+                    "title": f"Company {company_id:07d}",
+                    "description": None,
+                    "goals": goal_id,
+                    "report_link": None,
+                }
+            )
+            scope1_2 = rng.uniform(1.0, 100.0)
+            year_id = (company_id - 1) * len(YEARS) + 1
+            for year in YEARS:
+                scope1_2 *= rng.uniform(0.85, 1.1)
+                rows["years"].append(
+                    {
+                        "id": year_id,
+                        "year": year,
+                        "scope1_2": None if rng.random() < missing else scope1_2,
+                        "scope1_2_3": (
+                            None
+                            if rng.random() < missing
+                            else scope1_2 * rng.uniform(1.5, 10.0)
+                        ),
+                    }
+                )
+                rows["company_years"].append(
+                    {"company_id": company_id, "year_id": year_id}
+                )
+                year_id += 1
+        yield rows
+
+
+def generate(n_companies: int, seed: int = 0, missing: float = 0.2) -> dict:
+    """Generate rows for every table
+
+    Args:
+        n_companies (int): How many companies to generate
+        seed (int, optional): Random seed. Defaults to 0.
+        missing (float, optional): Chance that an emissions value is null. Defaults to 0.2.
+
+    Returns:
+        dict: Table name to list of row dicts
+    """
+    rows = {"goals": [], "companies": [], "years": [], "company_years": []}
+    for batch in generate_batches(n_companies, seed, missing):
+        for table, table_rows in batch.items():
+            rows[table].extend(table_rows)
+    return rows
+
+
+def load(session, rows: dict) -> None:
+    """Bulk insert generated rows and refresh the summaries, like populate_db
+
+    Args:
+        session (Session): SQLAlchemy session
+        rows (dict): Output of generate
+    """
+    for table in TABLES:
+        if rows[table.name]:
+            session.execute(table.insert(), rows[table.name])
+    session.commit()
+    refresh_summaries(session)
+
+
+def build(url: str, n_companies: int, seed: int = 0, batch_size: int = 10000) -> None:
+    """Create the tables of a database and fill them batch by batch
+
+    Args:
+        url (str): SQLAlchemy URL of an empty database
+        n_companies (int): How many companies to generate
+        seed (int, optional): Random seed. Defaults to 0.
+        batch_size (int, optional): Companies inserted per transaction.
+            Defaults to 10000.
+    """
+    engine = create_engine(url)
+    create_tables(engine)
+    with sessionmaker(bind=engine)() as session:
+        for rows in generate_batches(n_companies, seed, batch_size=batch_size):
+            for table in TABLES:
+                if rows[table.name]:
+                    session.execute(table.insert(), rows[table.name])
+            session.commit()
+        refresh_summaries(session)
+    engine.dispose()
+
+
+def main():
+    """Parse arguments and build a database to benchmark against"""
+    parser = argparse.ArgumentParser(description="Build a synthetic emissions database")
+    parser.add_argument("url", help="SQLAlchemy URL of an empty database")
+    parser.add_argument("--companies", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    build(args.url, args.companies, args.seed, args.batch_size)
+    print(f"{args.companies} companies in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
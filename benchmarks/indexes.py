@@ -0,0 +1,166 @@
+"""Time each crud function with and without the lookup indexes
+
+Loads a synthetic dataset into a database with no secondary indexes, prints
+the query plan and median latency of every crud read, then creates the
+indexes declared on the models and measures again.
+
+Usage:
+    python -m benchmarks.indexes --companies 100000 --repeat 20
+    python -m benchmarks.indexes --url postgresql://localhost/bench --explain
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Measure the database, not the read cache
+os.environ.setdefault("CACHE_ENABLED", "0")
+
+# pylint: disable=wrong-import-position
+from src.climate_api import crud
+from src.climate_api.database import Base
+from benchmarks import dataset
+
+
+def cases(n_companies: int) -> list:
+    """crud calls to measure, looking up a company in the middle of the table
+
+    Args:
+        n_companies (int): How many companies were generated
+
+    Returns:
+        list: (name, function, keyword arguments) tuples
+    """
+    middle = max(n_companies // 2, 1)
+    company = f"Company {middle:07d}"
+    deep_year = middle * len(dataset.YEARS)
+    return [
+        ("get_company", crud.get_company, {"company_name": company}),
+        ("get_company_year", crud.get_company_year, {"company_name": company, "year": 2019}),
+        ("get_company_years", crud.get_company_years, {"company_name": company}),
+        ("get_company_summary", crud.get_company_summary, {"company_name": company}),
+        ("get_goal", crud.get_goal, {"goal_id": middle // 2 + 1}),
+        ("get_emissions", crud.get_emissions, {"year": 2019}),
+        ("get_companies", crud.get_companies, {"after": middle, "limit": 100}),
+        ("get_all_emissions", crud.get_all_emissions, {"after": deep_year, "limit": 200}),
+        ("get_year_summary", crud.get_year_summary, {"year": 2019}),
+    ]
+
+
+def explain(engine, statements: list) -> list[str]:
+    """Query plan of each captured statement
+
+    Args:
+        engine (Engine): Engine the statements ran on
+        statements (list): (statement, parameters) pairs in driver format
+
+    Returns:
+        list[str]: One line per plan step
+    """
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    lines = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            for row in conn.exec_driver_sql(prefix + statement, parameters):
+                lines.append(str(row[-1]))
+    return lines
+
+
+def measure(engine, session, n_companies: int, repeat: int) -> dict:
+    """Median latency and query plan of every case
+
+    Args:
+        engine (Engine): Engine the session is bound to
+        session (Session): Session to run the crud functions with
+        n_companies (int): How many companies were generated
+        repeat (int): Calls per function
+
+    Returns:
+        dict: Function name to {"median_ms", "plan"}
+    """
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # pylint: disable=unused-argument,too-many-arguments
+        captured.append((statement, parameters))
+
+    results = {}
+    for name, fn, kwargs in cases(n_companies):
+        captured.clear()
+        event.listen(engine, "before_cursor_execute", capture)
+        fn(session, **kwargs)
+        event.remove(engine, "before_cursor_execute", capture)
+        timings = []
+        for _ in range(repeat):
+            session.expunge_all()
+            start = time.perf_counter()
+            fn(session, **kwargs)
+            timings.append(1000 * (time.perf_counter() - start))
+        results[name] = {
+            "median_ms": statistics.median(timings),
+            "plan": explain(engine, list(captured)),
+        }
+    return results
+
+
+def run(url: str, n_companies: int, repeat: int) -> tuple:
+    """Measure every case before and after creating the indexes
+
+    Args:
+        url (str): Database to fill, its tables are dropped first
+        n_companies (int): How many companies to generate
+        repeat (int): Calls per function
+
+    Returns:
+        tuple: Results without and with the indexes
+    """
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    dataset.create_tables(engine)
+    indexes = [index for table in Base.metadata.sorted_tables for index in table.indexes]
+    for index in indexes:
+        index.drop(engine)
+    session = sessionmaker(bind=engine)()
+    dataset.load(session, dataset.generate(n_companies))
+
+    before = measure(engine, session, n_companies, repeat)
+    for index in indexes:
+        index.create(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    after = measure(engine, session, n_companies, repeat)
+    session.close()
+    return before, after
+
+
+def main():
+    """Parse arguments and print a table of results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Defaults to a temporary SQLite file")
+    parser.add_argument("--companies", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--explain", action="store_true", help="Print query plans")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'indexes.db')}"
+    before, after = run(url, args.companies, args.repeat)
+    width = max(len(name) for name in before)
+    print(f"{'function':<{width}}  before ms  after ms  speedup")
+    for name in before:
+        old, new = before[name]["median_ms"], after[name]["median_ms"]
+        print(f"{name:<{width}}  {old:>9.3f}  {new:>8.3f}  {old / new:>6.1f}x")
+    if args.explain:
+        for name in before:
+            print(f"\n{name}")
+            for label, results in (("before", before), ("after", after)):
+                for line in results[name]["plan"]:
+                    print(f"  {label:<6}  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Compare the row-by-row populate_db loader with the bulk loader
+
+Builds a synthetic workbook shaped like the Fortune 500 sheets, loads it
+into two fresh SQLite databases, one per loader, checks that both produce
+the same rows and prints the time each took.
+
+Usage:
+    python -m benchmarks.loader --companies 500
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+# The populate_db scripts import the package as climate_api
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from climate_api.database import Base
+from climate_api.populate_db import bulk_load, populate_db
+
+TABLES = ["goals", "companies", "years", "company_years", "company_summaries"]
+
+
+def synthetic_workbook(n_companies: int, seed: int = 0, missing: float = 0.2):
+    """Build sheets with the same layout as the Excel workbook
+
+    Args:
+        n_companies (int): How many companies to generate
+        seed (int, optional): Random seed. Defaults to 0.
+        missing (float, optional): Chance that a cell is empty. Defaults to 0.2.
+
+    Returns:
+        tuple: goals, scope12 and scope123 DataFrames
+    """
+    rng = random.Random(seed)
+    years = list(range(2005, 2024))
+    names = [f"Company {i:07d}" for i in range(1, n_companies + 1)]
+
+    def cell(low, high):
+        return float("nan") if rng.random() < missing else rng.uniform(low, high)
+
+    scope12 = pd.DataFrame(
+        [[f"{name}1+2"] + [cell(1, 100) for _ in years] for name in names],
+        columns=["Company Name"] + years,
+    )
+    scope123 = pd.DataFrame(
+        [[f"{name}1+2+3"] + [cell(100, 1000) for _ in years] for name in names],
+        columns=["Company Name"] + years,
+    )
+    goals = pd.DataFrame(
+        [
+            {
+                "Company Name": name,
+                "Link": f"https://example.com/{i}",
+                "Scope 1,2 Year": rng.choice([2030, 2040, float("nan")]),
+                "Scope 1,2 Goal": cell(10, 100),
+                "Scope 1,2,3 Year": rng.choice([2030, 2050, float("nan")]),
+                "Scope 1,2,3 Goal": cell(10, 100),
+                "Reference Year": rng.choice([2015, 2019]),
+            }
+            for i, name in enumerate(names)
+            if i % 2 == 0
+        ]
+    )
+    return goals, scope12, scope123
+
+
+def fresh_session(directory: str, name: str):
+    """Create an empty database with every table
+
+    Args:
+        directory (str): Directory for the database file
+        name (str): File name
+
+    Returns:
+        Session: Session on the new database
+    """
+    engine = create_engine(f"sqlite:///{os.path.join(directory, name)}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def table_contents(session) -> dict:
+    """Every row of every table, for comparing the two loaders"""
+    return {
+        table: sorted(
+            tuple(row)
+            for row in session.execute(text(f"SELECT * FROM {table}")).all()
+        )
+        for table in TABLES
+    }
+
+
+def main():
+    """Run both loaders and print their timings"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=500)
+    args = parser.parse_args()
+
+    goals, scope12, scope123 = synthetic_workbook(args.companies)
+    directory = tempfile.mkdtemp()
+
+    row_session = fresh_session(directory, "row_by_row.db")
+    start = time.perf_counter()
+    # The row-by-row loader prints every company
+    with contextlib.redirect_stdout(io.StringIO()):
+        populate_db.populate_emissions(scope12.copy(), scope123.copy(), row_session)
+        populate_db.populate_goals(goals.copy(), row_session)
+    row_seconds = time.perf_counter() - start
+
+    bulk_session = fresh_session(directory, "bulk.db")
+    start = time.perf_counter()
+    counts = bulk_load.bulk_load(scope12, scope123, goals, bulk_session)
+    bulk_seconds = time.perf_counter() - start
+
+    identical = table_contents(row_session) == table_contents(bulk_session)
+    print(f"rows written: {counts}")
+    print(f"row-by-row: {row_seconds:8.3f} s")
+    print(f"bulk:       {bulk_seconds:8.3f} s  ({row_seconds / bulk_seconds:.1f}x faster)")
+    print(f"identical tables: {identical}")
+
+
+if __name__ == "__main__":
+    main()
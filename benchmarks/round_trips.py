@@ -0,0 +1,117 @@
+"""Count database round trips per endpoint
+
+Runs every company and year endpoint against a temporary SQLite database
+filled with synthetic data and reports how many statements each request
+sends to the database along with the mean latency. The app reads that
+database through its own engine, so the dataset version read, at most every
+CACHE_VERSION_INTERVAL seconds, is counted like any other statement; set
+CACHE_VERSION_INTERVAL=0 to count it on every request.
+
+Usage:
+    python -m benchmarks.round_trips --companies 500 --repeat 20
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+# Count what reaches the database, not what the read cache absorbs
+os.environ.setdefault("CACHE_ENABLED", "0")
+
+COMPANY = "Company 0000001"
+ENDPOINTS = [
+    "/companies",
+    "/companies?include=years&include=goal",
+    f"/companies/{COMPANY}",
+    f"/companies/{COMPANY}/all_years",
+    f"/companies/{COMPANY}/2019",
+    f"/companies/{COMPANY}/change_1_2",
+    f"/companies/{COMPANY}/change_1_2_3",
+    f"/companies/{COMPANY}/change_1_2/2010_2020",
+    f"/companies/{COMPANY}/change_1_2_3/2010_2020",
+    f"/companies/{COMPANY}/goals",
+    "/year",
+    "/year/2019",
+    "/year/2019/total",
+    "/year/2019/scope_1_2",
+    "/year/2019/scope_3",
+    "/year/2019/summary",
+]
+
+
+def build_client(n_companies: int):
+    """Create a test client for the app, serving a freshly seeded database
+
+    Settings are read when the app is imported, so the database URL is set
+    first and the app is imported here.
+
+    Args:
+        n_companies (int): How many companies to generate
+
+    Returns:
+        TestClient: Client for the app
+    """
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'climate.db')}"
+    os.environ["HEROKU_DATABASE_URL"] = url
+    # pylint: disable=import-outside-toplevel
+    from fastapi.testclient import TestClient
+
+    from benchmarks import dataset
+    from src.climate_api.main import app
+
+    dataset.build(url, n_companies)
+    return TestClient(app)
+
+
+def run(n_companies: int, repeat: int) -> list[dict]:
+    """Request every endpoint and count the statements each one executes
+
+    Args:
+        n_companies (int): How many companies to generate
+        repeat (int): How many times to request each endpoint
+
+    Returns:
+        list[dict]: One result per endpoint
+    """
+    # pylint: disable=import-outside-toplevel
+    from src.climate_api.query_budget import QueryBudget
+
+    client = build_client(n_companies)
+    results = []
+    for endpoint in ENDPOINTS:
+        start = time.perf_counter()
+        with QueryBudget() as budget:
+            for _ in range(repeat):
+                response = client.get(endpoint)
+        elapsed = time.perf_counter() - start
+        results.append(
+            {
+                "endpoint": endpoint,
+                "status": response.status_code,
+                "queries": budget.count / repeat,
+                "mean_ms": 1000 * elapsed / repeat,
+            }
+        )
+    return results
+
+
+def main():
+    """Parse arguments and print a table of results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = run(args.companies, args.repeat)
+    width = max(len(result["endpoint"]) for result in results)
+    print(f"{'endpoint':<{width}}  status  queries  mean ms")
+    for result in results:
+        print(
+            f"{result['endpoint']:<{width}}  {result['status']:>6}"
+            f"  {result['queries']:>7.1f}  {result['mean_ms']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Load test every route with concurrent clients and report latency as JSON
+
+Drives the app in-process through httpx's ASGI transport. Each of --clients
+clients sends --requests requests per route, one after another, while the
+other clients do the same. The result per route and overall has p50, p95
+and p99 latency and requests per second, so two commits can be compared by
+diffing their JSON:
+
+    python -m benchmarks.runner --companies 5000 --output before.json
+    python -m benchmarks.runner --url sqlite:////tmp/bench.db --exclude /export
+
+Without --url a temporary SQLite database is generated; build larger ones
+once with ``python -m benchmarks.dataset``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+# Path parameters of every route, filled from a random company
+PATH_VALUES = {"year": "2019", "start": "2010", "end": "2020"}
+# Query string of routes with required parameters
+QUERY_PARAMS = {"/companies/search": {"q": "company 1"}}
+
+
+def percentile(values: list, q: float) -> float:
+    """Linearly interpolated percentile of sorted values
+
+    Args:
+        values (list): Sorted values
+        q (float): Percentile between 0 and 100
+
+    Returns:
+        float: Value at the percentile
+    """
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(latencies: list, statuses: Counter, elapsed: float) -> dict:
+    """Latency percentiles and throughput of one set of requests
+
+    Args:
+        latencies (list): Seconds each request took
+        statuses (Counter): Number of responses with each status code. A 404
+            is expected for companies without a goal or a year in the range.
+        elapsed (float): Wall clock seconds the requests took together
+
+    Returns:
+        dict: requests, statuses, requests_per_second and p50/p95/p99/mean in ms
+    """
+    latencies = sorted(latencies)
+    result = {
+        "requests": len(latencies),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "requests_per_second": len(latencies) / elapsed if elapsed else None,
+    }
+    for q in (50, 95, 99):
+        result[f"p{q}_ms"] = 1000 * percentile(latencies, q)
+    result["mean_ms"] = 1000 * sum(latencies) / len(latencies)
+    return result
+
+
+def routes(app, include: str = None, exclude: str = None) -> list:
+    """Documented routes of the app, as (method, path template) pairs
+
+    Args:
+        app (FastAPI): Application
+        include (str, optional): Only keep paths matching this regex.
+            Defaults to None.
+        exclude (str, optional): Drop paths matching this regex. Defaults to None.
+
+    Returns:
+        list: (method, path) pairs in the order the routes are declared
+    """
+    # pylint: disable=import-outside-toplevel
+    from fastapi.routing import APIRoute
+
+    found = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or not route.include_in_schema:
+            continue
+        if include and not re.search(include, route.path):
+            continue
+        if exclude and re.search(exclude, route.path):
+            continue
+        for method in sorted(route.methods & {"GET", "POST"}):
+            found.append((method, route.path))
+    return found
+
+
+def request_for(method: str, path: str, companies: list, rng: random.Random):
+    """Concrete request for a route, about a random company
+
+    Args:
+        method (str): GET or POST
+        path (str): Path template, e.g. /companies/{company}
+        companies (list): Company titles to pick from
+        rng (random.Random): Source of the choice
+
+    Returns:
+        dict: Keyword arguments for AsyncClient.request
+    """
+    request = {
+        "method": method,
+        "url": path.format(company=rng.choice(companies), **PATH_VALUES),
+    }
+    if path in QUERY_PARAMS:
+        request["params"] = QUERY_PARAMS[path]
+    if method == "POST":
+        request["json"] = {
+            "companies": rng.sample(companies, min(10, len(companies))),
+            "fields": ["years", "goal", "change"],
+        }
+    return request
+
+
+async def drive(app, route: tuple, companies: list, clients: int, requests: int):
+    """Send requests to one route from concurrent clients
+
+    Args:
+        app (FastAPI): Application
+        route (tuple): (method, path template)
+        companies (list): Company titles to pick from
+        clients (int): Concurrent clients
+        requests (int): Requests per client
+
+    Returns:
+        tuple: Latencies in seconds, status code counts and elapsed seconds
+    """
+    # pylint: disable=import-outside-toplevel
+    import httpx
+
+    latencies = []
+    statuses = Counter()
+    transport = httpx.ASGITransport(app=app)
+
+    async def client_loop(seed: int):
+        rng = random.Random(seed)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = await client.request(
+                    **request_for(*route, companies, rng)
+                )
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(seed) for seed in range(clients)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+async def run(app, companies: list, args) -> dict:
+    """Warm up and then measure every selected route
+
+    Args:
+        app (FastAPI): Application
+        companies (list): Company titles to pick from
+        args (argparse.Namespace): Parsed command line arguments
+
+    Returns:
+        dict: "routes" to per route results and "overall" for all of them
+    """
+    selected = routes(app, args.include, args.exclude)
+    for route in selected:
+        await drive(app, route, companies, 1, args.warmup)
+    results = {}
+    all_latencies, all_statuses, all_elapsed = [], Counter(), 0.0
+    for route in selected:
+        latencies, statuses, elapsed = await drive(
+            app, route, companies, args.clients, args.requests
+        )
+        results[" ".join(route)] = summarize(latencies, statuses, elapsed)
+        all_latencies += latencies
+        all_statuses += statuses
+        all_elapsed += elapsed
+    return {
+        "routes": results,
+        "overall": summarize(all_latencies, all_statuses, all_elapsed),
+    }
+
+
+def git_commit() -> str:
+    """Commit being measured, None outside a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Parse arguments, run the load test and write the JSON report"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Existing database to query")
+    parser.add_argument("--companies", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=25)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--include", help="Only run routes matching this regex")
+    parser.add_argument("--exclude", help="Skip routes matching this regex")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Disable the read cache"
+    )
+    parser.add_argument("--output", help="Write the report here instead of stdout")
+    args = parser.parse_args()
+
+    # Settings are read when the app is imported, so configure them first
+    os.environ["DB_MODE"] = args.mode
+    if args.no_cache:
+        os.environ["CACHE_ENABLED"] = "0"
+    url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'climate.db')}"
+    os.environ["HEROKU_DATABASE_URL"] = url
+    # pylint: disable=import-outside-toplevel
+    from sqlalchemy import create_engine, text
+
+    from benchmarks import dataset
+
+    if not args.url:
+        dataset.build(url, args.companies)
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        companies = list(
+            connection.execute(text("SELECT title FROM companies LIMIT 1000")).scalars()
+        )
+        n_companies = connection.execute(
+            text("SELECT count(*) FROM companies")
+        ).scalar()
+    engine.dispose()
+
+    from src.climate_api.main import app
+
+    report = {
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "companies": n_companies,
+        "clients": args.clients,
+        "requests_per_client": args.requests,
+        "mode": args.mode,
+        "cache": not args.no_cache,
+        **asyncio.run(run(app, companies, args)),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
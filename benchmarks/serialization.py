@@ -0,0 +1,118 @@
+"""Measure the per row cost of turning years into a JSON response body
+
+Reads the same page of years from an in-memory SQLite database filled with
+synthetic data and encodes it three ways:
+
+- orm: ORM objects validated into the Year model and encoded the way FastAPI
+  handles a response_model
+- pydantic: Core rows validated into the Year model, then encoded
+- core: Core rows as dicts encoded directly, as rows_response does
+
+Usage:
+    python -m benchmarks.serialization --companies 500 --rows 5000 --repeat 20
+"""
+
+import argparse
+import os
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+os.environ.setdefault("HEROKU_DATABASE_URL", "sqlite://")
+os.environ.setdefault("CACHE_ENABLED", "0")
+
+# pylint: disable=wrong-import-position
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse as StandardJSONResponse
+
+from src.climate_api import crud, models
+from src.climate_api.responses import JSONResponse
+from benchmarks import dataset
+
+
+def orm_body(db, rows: int) -> bytes:
+    """Body built from ORM objects through the response model"""
+    years = crud.get_all_emissions(db, limit=rows)
+    validated = [models.Year.from_orm(year) for year in years]
+    return StandardJSONResponse(jsonable_encoder(validated)).body
+
+
+def pydantic_body(db, rows: int) -> bytes:
+    """Body built from Core rows through the response model"""
+    years = crud.get_all_emission_rows(db, limit=rows)
+    validated = [models.Year(**year) for year in years]
+    return StandardJSONResponse(jsonable_encoder(validated)).body
+
+
+def core_body(db, rows: int) -> bytes:
+    """Body built from Core rows encoded directly"""
+    return JSONResponse(crud.get_all_emission_rows(db, limit=rows)).body
+
+
+APPROACHES = {"orm": orm_body, "pydantic": pydantic_body, "core": core_body}
+
+
+def run(n_companies: int, rows: int, repeat: int) -> list[dict]:
+    """Time each approach on the same page of years
+
+    Args:
+        n_companies (int): How many companies to generate
+        rows (int): Years per response
+        repeat (int): How many bodies to build with each approach
+
+    Returns:
+        list[dict]: One result per approach
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    dataset.create_tables(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with session_factory() as session:
+        dataset.load(session, dataset.generate(n_companies))
+
+    results = []
+    with session_factory() as db:
+        for name, body in APPROACHES.items():
+            encoded = body(db, rows)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                body(db, rows)
+                # Each repeat starts from fresh objects, as a request would
+                db.expunge_all()
+            elapsed = time.perf_counter() - start
+            count = encoded.count(b'"id"')
+            results.append(
+                {
+                    "approach": name,
+                    "rows": count,
+                    "bytes": len(encoded),
+                    "us_per_row": 1e6 * elapsed / (repeat * count),
+                }
+            )
+    return results
+
+
+def main():
+    """Parse arguments and print a table of results"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--companies", type=int, default=500)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"encoder: {JSONResponse.__name__}")
+    print("approach   rows    bytes  us/row")
+    for result in run(args.companies, args.rows, args.repeat):
+        print(
+            f"{result['approach']:<8}  {result['rows']:>5}  {result['bytes']:>7}"
+            f"  {result['us_per_row']:>6.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
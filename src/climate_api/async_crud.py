@@ -0,0 +1,83 @@
+"""Awaitable versions of the CRUD operations
+
+Each function takes either a Session or an AsyncSession and runs the matching
+function from crud without blocking the event loop, see database.run_query.
+"""
+
+import functools
+
+from starlette.concurrency import iterate_in_threadpool
+
+from . import crud
+from .database import run_query
+from .metrics import tagged
+
+
+def _awaitable(fn):
+    """Wrap a crud function so it can be awaited from a route handler
+
+    Its statements are attributed to it in the request metrics.
+
+    Args:
+        fn (Callable): crud function taking a Session as its first argument
+
+    Returns:
+        Callable: Coroutine function with the same arguments
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(db, *args, **kwargs):
+        with tagged(fn.__name__):
+            return await run_query(db, fn, *args, **kwargs)
+
+    return wrapper
+
+
+get_companies = _awaitable(crud.get_companies)
+get_company_rows = _awaitable(crud.get_company_rows)
+get_company = _awaitable(crud.get_company)
+get_company_titles = _awaitable(crud.get_company_titles)
+get_company_year = _awaitable(crud.get_company_year)
+get_company_year_pair = _awaitable(crud.get_company_year_pair)
+get_company_years = _awaitable(crud.get_company_years)
+get_company_year_rows = _awaitable(crud.get_company_year_rows)
+get_company_summary = _awaitable(crud.get_company_summary)
+get_company_batch = _awaitable(crud.get_company_batch)
+get_company_profile = _awaitable(crud.get_company_profile)
+get_company_series = _awaitable(crud.get_company_series)
+get_changes = _awaitable(crud.get_changes)
+get_goal = _awaitable(crud.get_goal)
+get_goal_progress = _awaitable(crud.get_goal_progress)
+get_emissions = _awaitable(crud.get_emissions)
+get_emission_rows = _awaitable(crud.get_emission_rows)
+get_all_emissions = _awaitable(crud.get_all_emissions)
+get_all_emission_rows = _awaitable(crud.get_all_emission_rows)
+get_year_summary = _awaitable(crud.get_year_summary)
+get_scope3_emissions = _awaitable(crud.get_scope3_emissions)
+
+
+async def stream_rows(db, statement, batch_size: int = 1000):
+    """Yield batches of rows from a statement, see crud.stream_rows
+
+    With an AsyncSession the rows come from AsyncSession.stream, otherwise the
+    synchronous generator is advanced on the thread pool.
+
+    Args:
+        db (Session | AsyncSession): Database session
+        statement (Select): Statement to run
+        batch_size (int, optional): Rows fetched per batch. Defaults to 1000.
+
+    Yields:
+        list[RowMapping]: Up to batch_size rows
+    """
+    with tagged("stream_rows"):
+        if hasattr(db, "run_sync"):
+            result = await db.stream(
+                statement.execution_options(yield_per=batch_size)
+            )
+            async for partition in result.mappings().partitions():
+                yield partition
+        else:
+            batches = crud.stream_rows(db, statement, batch_size)
+            async for partition in iterate_in_threadpool(batches):
+                yield partition
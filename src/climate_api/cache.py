@@ -0,0 +1,612 @@
+"""Cache for read-only crud functions
+
+The dataset only changes when the populate_db scripts run, so reads are
+cached with a TTL per function. The backend is either an in-process LRU or
+a Redis server shared by every worker. Keys include a dataset version made
+of two counters: a row of the dataset_version table, which the loaders bump
+in the same transaction as their data so every API process sees it whatever
+the backend, and the backend's own version, which invalidate() bumps to drop
+cached entries without a load.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+
+from . import models
+from .config import settings
+from .internal.DatasetVersion import DatasetVersion
+from .redis_protocol import RedisClient, RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Least recently used cache whose entries expire after their own TTL"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        """Look up a fresh entry and mark it as recently used
+
+        Args:
+            key (Hashable): Entry key
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            return False, None
+
+    def set(self, key, value, ttl: float) -> None:
+        """Store an entry, evicting the least recently used ones over max_entries
+
+        Args:
+            key (Hashable): Entry key
+            value (Any): Value to cache
+            ttl (float): Seconds until the entry expires
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Size and eviction counter
+
+        Returns:
+            dict: Cache statistics
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+            }
+
+
+def dumps(value) -> bytes:
+    """Encode a cached value as JSON, tagging API models and tuples
+
+    Args:
+        value (Any): Model, list, tuple, dict or plain JSON value
+
+    Returns:
+        bytes: JSON document loads turns back into value
+    """
+
+    def tag(item):
+        if isinstance(item, BaseModel):
+            return {"__model__": type(item).__name__, "fields": tag(item.dict())}
+        if isinstance(item, tuple):
+            return {"__tuple__": [tag(element) for element in item]}
+        if isinstance(item, list):
+            return [tag(element) for element in item]
+        if isinstance(item, dict):
+            return {key: tag(element) for key, element in item.items()}
+        return item
+
+    return json.dumps(tag(value)).encode()
+
+
+def loads(data: bytes):
+    """Decode a value encoded by dumps
+
+    Only classes of the models package can be named by a tag, so a value
+    read from a shared server is never more than data.
+
+    Args:
+        data (bytes): JSON document
+
+    Raises:
+        ValueError: If the document is not JSON or names an unknown model
+
+    Returns:
+        Any: Decoded value
+    """
+
+    def untag(item):
+        if isinstance(item, list):
+            return [untag(element) for element in item]
+        if not isinstance(item, dict):
+            return item
+        if "__tuple__" in item:
+            return tuple(untag(element) for element in item["__tuple__"])
+        if "__model__" in item:
+            model = getattr(models, item["__model__"], None)
+            if not (isinstance(model, type) and issubclass(model, BaseModel)):
+                raise ValueError(f"Unknown cached model {item['__model__']}")
+            return model.parse_obj(untag(item["fields"]))
+        return {key: untag(element) for key, element in item.items()}
+
+    return untag(json.loads(data))
+
+
+class CacheBackend(ABC):
+    """Where cached reads live, and the dataset version their keys include"""
+
+    # Whether calls wait on a server, so must not run on the event loop
+    blocking = False
+
+    def __init__(self):
+        self._counter_lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+
+    def _count(self, name: str, hit: bool) -> None:
+        counters = self.hits if hit else self.misses
+        with self._counter_lock:
+            counters[name] = counters.get(name, 0) + 1
+
+    def lookup(self, name: str, key: str):
+        """Look up a key and count the hit or miss against name
+
+        Args:
+            name (str): Function the entry belongs to
+            key (str): Entry key, already including the dataset version
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) on a miss
+        """
+        hit, value = self.get(key)
+        self._count(name, hit)
+        return hit, value
+
+    @abstractmethod
+    def get(self, key: str):
+        """Return (True, value) for a fresh entry, else (False, None)"""
+
+    @abstractmethod
+    def set(self, key: str, value, ttl: float) -> None:
+        """Store value under key for ttl seconds"""
+
+    @abstractmethod
+    def dataset_version(self) -> int:
+        """Current dataset version"""
+
+    @abstractmethod
+    def bump_dataset_version(self) -> int:
+        """Start a new dataset version, orphaning every existing entry"""
+
+    @abstractmethod
+    def dataset_modified(self) -> float:
+        """Unix time the current dataset version started"""
+
+    def version_due(self) -> bool:
+        """Whether dataset_version would ask the server again"""
+        return False
+
+    def stats(self) -> dict:
+        """Hit and miss counters for this process
+
+        Returns:
+            dict: Backend statistics
+        """
+        with self._counter_lock:
+            return {
+                "backend": type(self).__name__,
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+            }
+
+
+class MemoryBackend(CacheBackend):
+    """Per process LRU, with a dataset version that lives in this process
+
+    Args:
+        max_entries (int, optional): Entries kept before evicting. Defaults to 1024.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        super().__init__()
+        self.entries = TTLCache(max_entries)
+        self._version = 0
+        # Version 0 means whatever was loaded before this process started
+        self._modified = time.time()
+
+    def get(self, key: str):
+        return self.entries.get(key)
+
+    def set(self, key: str, value, ttl: float) -> None:
+        self.entries.set(key, value, ttl)
+
+    def dataset_version(self) -> int:
+        return self._version
+
+    def bump_dataset_version(self) -> int:
+        # Entries from older versions can never be read again, so free them
+        self._version += 1
+        self._modified = time.time()
+        self.entries.clear()
+        return self._version
+
+    def dataset_modified(self) -> float:
+        return self._modified
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update(self.entries.stats(), dataset_version=self._version)
+        return stats
+
+
+class RedisBackend(CacheBackend):
+    """Cache shared by every worker through a Redis-protocol server
+
+    Values are stored as JSON, see dumps, so whoever can write to the server
+    can change what the API returns but not run code in it. Errors talking to
+    the server, or values that don't decode, count as misses, so the API keeps
+    serving from the database if the cache goes away.
+
+    Args:
+        client (RedisClient): Connection to the server
+        prefix (str, optional): Prefix for every key. Defaults to "climate_api:".
+        version_interval (float, optional): Seconds to reuse the last dataset
+            version read before asking the server again. Defaults to 1.0.
+    """
+
+    blocking = True
+
+    def __init__(
+        self, client: RedisClient, prefix: str = "climate_api:", version_interval=1.0
+    ):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self.version_interval = version_interval
+        self.errors = 0
+        self._version = 0
+        self._modified = time.time()
+        self._version_checked = float("-inf")
+
+    def _error(self, error: Exception) -> None:
+        self.errors += 1
+        logger.warning("Cache server error: %s", error)
+
+    def get(self, key: str):
+        try:
+            data = self.client.execute("GET", self.prefix + key)
+        except RedisError as e:
+            self._error(e)
+            return False, None
+        if data is None:
+            return False, None
+        try:
+            return True, loads(data)
+        except ValueError as e:
+            self._error(e)
+            return False, None
+
+    def set(self, key: str, value, ttl: float) -> None:
+        try:
+            self.client.execute(
+                "SET",
+                self.prefix + key,
+                dumps(value),
+                "PX",
+                max(1, int(ttl * 1000)),
+            )
+        except RedisError as e:
+            self._error(e)
+
+    def version_due(self) -> bool:
+        return time.monotonic() - self._version_checked >= self.version_interval
+
+    def dataset_version(self) -> int:
+        now = time.monotonic()
+        if now - self._version_checked >= self.version_interval:
+            try:
+                self._version = int(
+                    self.client.execute("GET", self.prefix + "dataset_version") or 0
+                )
+                modified = self.client.execute("GET", self.prefix + "dataset_modified")
+                if modified is not None:
+                    self._modified = float(modified)
+            except RedisError as e:
+                self._error(e)
+            self._version_checked = now
+        return self._version
+
+    def bump_dataset_version(self) -> int:
+        # Old entries are left to expire through their TTL. The loaders call
+        # this after committing, so an unreachable server must not fail them;
+        # their dataset_version row still reaches every worker.
+        try:
+            self._version = self.client.execute(
+                "INCR", self.prefix + "dataset_version"
+            )
+            self._modified = time.time()
+            self.client.execute(
+                "SET", self.prefix + "dataset_modified", self._modified
+            )
+        except RedisError as e:
+            self._error(e)
+            return self._version
+        self._version_checked = time.monotonic()
+        return self._version
+
+    def dataset_modified(self) -> float:
+        self.dataset_version()
+        return self._modified
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update(errors=self.errors, dataset_version=self._version)
+        return stats
+
+
+class DatabaseVersion:
+    """Dataset version kept in the dataset_version table
+
+    The loaders run as separate processes, so only a value in the database
+    reaches every API process. The row is read again at most every interval
+    seconds, and at most once per session, through the session of the request
+    that finds it due, so async mode reads it on the async engine. Errors keep
+    the last value read, so a database without the table behaves as if
+    nothing was ever loaded.
+
+    Args:
+        interval (float, optional): Seconds to reuse the last row read before
+            querying again. Defaults to 1.0.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.version = 0
+        # Until a load is recorded, the data is as old as this process
+        self.modified = time.time()
+        self.errors = 0
+        self._checked = float("-inf")
+
+    def due(self) -> bool:
+        """Whether the last read is older than interval"""
+        return time.monotonic() - self._checked >= self.interval
+
+    def refresh(self, session, force: bool = False) -> None:
+        """Read the row through session if the last read is older than interval
+
+        No lock is held around the read: in async mode it runs in a greenlet on
+        the event loop's thread, where waiting on a lock held by another
+        greenlet would never end. Requests arriving during the read keep using
+        the last value instead.
+
+        Args:
+            session (Session): Session to read with
+            force (bool, optional): Read it regardless. Defaults to False.
+        """
+        if not force and (not self.due() or session.info.get("dataset_version")):
+            return
+        session.info["dataset_version"] = True
+        self._checked = time.monotonic()
+        try:
+            row = session.execute(
+                select(DatasetVersion.version, DatasetVersion.modified)
+            ).first()
+        except SQLAlchemyError as e:
+            # The API only reads, so the failed transaction has nothing to lose
+            session.rollback()
+            self.errors += 1
+            logger.warning("Could not read the dataset version: %s", e)
+        else:
+            if row is not None:
+                self.version, self.modified = row
+
+
+def make_backend(config=settings) -> CacheBackend:
+    """Build the backend named by the settings
+
+    Args:
+        config (Settings, optional): Settings to use. Defaults to settings.
+
+    Raises:
+        ValueError: If CACHE_BACKEND is unknown
+
+    Returns:
+        CacheBackend: Memory or Redis backend
+    """
+    if config.cache_backend == "memory":
+        return MemoryBackend(config.cache_max_entries)
+    if config.cache_backend == "redis":
+        return RedisBackend(
+            RedisClient(config.cache_redis_url),
+            prefix=config.cache_key_prefix,
+            version_interval=config.cache_version_interval,
+        )
+    raise ValueError(f"Unknown cache backend {config.cache_backend}")
+
+
+backend = make_backend()
+database_version = DatabaseVersion(settings.cache_version_interval)
+
+
+def _call(fn, *args):
+    """Call a backend method, on the thread pool if the backend blocks and the
+    caller is on the event loop
+
+    In async mode crud functions run through AsyncSession.run_sync, in a
+    greenlet on the event loop's thread, where a blocking socket read would
+    stall every request. From there the call is awaited on the thread pool.
+
+    Args:
+        fn (Callable): Method of backend
+
+    Returns:
+        Any: Whatever fn returns
+    """
+    if backend.blocking:
+        # pylint: disable=import-outside-toplevel
+        from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+        if in_greenlet():
+            return await_only(run_in_threadpool(fn, *args))
+    return fn(*args)
+
+
+def _to_model(model, value):
+    """Convert ORM results to pydantic models so no session is needed later
+
+    Args:
+        model (type): Pydantic model with ORM mode, or None to keep value as is
+        value (Any): ORM object, list of ORM objects, or a plain value
+
+    Returns:
+        Any: value with every ORM object converted to model
+    """
+    if model is None or value is None:
+        return value
+    if isinstance(value, list):
+        return [model.from_orm(item) for item in value]
+    return model.from_orm(value)
+
+
+def _freeze(value):
+    """Make list arguments such as include order stable for use in a key"""
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    return value
+
+
+def cached(model=None, ttl: Optional[int] = None):
+    """Cache a crud read function, keyed on every argument except the session
+
+    Results are converted to model before they are cached, so callers get the
+    API model rather than the ORM object.
+
+    Args:
+        model (type, optional): Pydantic model to convert results to. Defaults to None.
+        ttl (int, optional): Seconds results stay fresh. CACHE_TTL_<FUNCTION>
+            overrides it. Defaults to CACHE_TTL.
+
+    Returns:
+        Callable: Decorator for a function taking a Session first
+    """
+
+    def decorator(fn):
+        name = fn.__name__
+        fn_ttl = settings.ttl_for(name, ttl)
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(db, *args, **kwargs):
+            if not settings.cache_enabled or fn_ttl <= 0:
+                return fn(db, *args, **kwargs)
+            # Bind so positional and keyword calls share an entry
+            bound = signature.bind(db, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = tuple(
+                _freeze(value) for value in list(bound.arguments.values())[1:]
+            )
+            key = f"v{dataset_version(db)}:{name}:{arguments!r}"
+            hit, value = _call(backend.lookup, name, key)
+            if hit:
+                return value
+            value = _to_model(model, fn(db, *args, **kwargs))
+            _call(backend.set, key, value, fn_ttl)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def dataset_version(db=None) -> str:
+    """Current version of the dataset, changed by every load and invalidate()
+
+    Args:
+        db (Session, optional): Session to read the dataset_version row with
+            when it is due. Without one the last value read is used.
+            Defaults to None.
+
+    Returns:
+        str: Database and cache backend versions, e.g. "3.0"
+    """
+    if db is not None:
+        database_version.refresh(db)
+    return f"{database_version.version}.{_call(backend.dataset_version)}"
+
+
+def version_due() -> bool:
+    """Whether dataset_version would query the database or the cache server
+
+    Returns:
+        bool: False if the last versions read are still trusted
+    """
+    return database_version.due() or backend.version_due()
+
+
+def dataset_modified(db=None) -> float:
+    """Unix time the current dataset version started, for Last-Modified headers
+
+    Args:
+        db (Session, optional): Session to read the dataset_version row with
+            when it is due. Defaults to None.
+
+    Returns:
+        float: Seconds since the epoch
+    """
+    if db is not None:
+        database_version.refresh(db)
+    return max(database_version.modified, _call(backend.dataset_modified))
+
+
+def record_load(session) -> None:
+    """Bump the dataset_version row in the session's open transaction
+
+    Called by the populate_db loaders before they commit, so the new version
+    becomes visible to every API process together with the data.
+
+    Args:
+        session (Session): Session the data was written with
+    """
+    modified = time.time()
+    bumped = session.execute(
+        update(DatasetVersion)
+        .where(DatasetVersion.id == 1)
+        .values(version=DatasetVersion.version + 1, modified=modified)
+    )
+    if bumped.rowcount == 0:
+        session.execute(
+            insert(DatasetVersion).values(id=1, version=1, modified=modified)
+        )
+
+
+def invalidate() -> int:
+    """Bump the cache backend's version, which drops cached reads of every
+    worker sharing the backend
+
+    The loaders also call it once they commit, which only reaches other
+    processes through a shared backend; record_load is what reaches the rest.
+
+    Returns:
+        int: New backend version
+    """
+    return backend.bump_dataset_version()
@@ -0,0 +1,319 @@
+"""gzip and brotli response compression
+
+List pages and exports repeat the same keys on every row, so they compress
+well. Bodies below a minimum size are sent as they are, streamed bodies are
+compressed chunk by chunk, and complete bodies of cacheable responses are
+kept compressed under their ETag, so the same page is only compressed once
+per dataset version. Every response of a compressible type varies on
+Accept-Encoding, compressed or not, so shared caches keep one copy per
+encoding.
+"""
+
+import gzip
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is the optional "compress" extra
+    brotli = None
+
+# Content types worth compressing, by prefix
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the encoding to answer with from an Accept-Encoding header
+
+    Args:
+        accept_encoding (str): Header value, e.g. "gzip, br;q=0.8"
+
+    Returns:
+        str: "br" or "gzip", preferring the higher quality and then brotli,
+            None if the client accepts neither
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    available = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [
+        name
+        for name in available
+        if accepted.get(name, accepted.get("*", 0.0)) > 0
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda name: accepted.get(name, accepted.get("*")))
+
+
+class _Compressor:
+    """Incremental compressor for one response body
+
+    Args:
+        encoding (str): "br" or "gzip"
+        level (int): gzip level from 1 to 9
+        brotli_quality (int): brotli quality from 0 to 11
+    """
+
+    def __init__(self, encoding: str, level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 16 + MAX_WBITS writes the gzip header and trailer
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        """Compress the next chunk, flushing so the client can decode it now
+
+        Args:
+            data (bytes): Next part of the body
+            finish (bool): Whether this is the last part
+
+        Returns:
+            bytes: Compressed output for this part
+        """
+        if self.encoding == "br":
+            output = self._brotli.process(data)
+            return output + (self._brotli.finish() if finish else self._brotli.flush())
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+
+def compress(body: bytes, encoding: str, level: int, brotli_quality: int) -> bytes:
+    """Compress a complete body
+
+    Args:
+        body (bytes): Response body
+        encoding (str): "br" or "gzip"
+        level (int): gzip level from 1 to 9
+        brotli_quality (int): brotli quality from 0 to 11
+
+    Returns:
+        bytes: Compressed body
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _weak(etag: str) -> str:
+    """Weaken an ETag, as the compressed bytes differ from the original ones"""
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses the client accepts compressed
+
+    Args:
+        app (ASGIApp): Application to wrap
+        minimum_size (int, optional): Smallest complete body worth compressing,
+            in bytes. Defaults to 1000.
+        level (int, optional): gzip level from 1 to 9. Defaults to 6.
+        brotli_quality (int, optional): brotli quality from 0 to 11. Defaults to 4.
+        cache_bytes (int, optional): Total size of the compressed bodies of
+            cacheable responses kept, least recently used first out. A body
+            larger than that is compressed on every request. 0 to disable.
+            Defaults to 16 MiB.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1000,
+        level: int = 6,
+        brotli_quality: int = 4,
+        cache_bytes: int = 16 * 1024 * 1024,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.cache_bytes = cache_bytes
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        encoding = choose_encoding(headers.get("accept-encoding", ""))
+        responder = _CompressingSender(
+            self, encoding, send, headers.get("if-none-match")
+        )
+        await self.app(scope, receive, responder.send)
+
+    def cached_body(self, key: tuple, body: bytes) -> bytes:
+        """Compressed body for a cacheable response, compressed on the first call
+
+        Args:
+            key (tuple): ETag and encoding of the response
+            body (bytes): Uncompressed body
+
+        Returns:
+            bytes: Compressed body
+        """
+        compressed = self._cache.get(key)
+        if compressed is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return compressed
+        self.misses += 1
+        compressed = compress(body, key[1], self.level, self.brotli_quality)
+        if len(compressed) <= self.cache_bytes:
+            self._cache[key] = compressed
+            self._cached_bytes += len(compressed)
+            while self._cached_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+        return compressed
+
+
+class _CompressingSender:
+    """send callable compressing one response
+
+    The start message is held back until the first body message shows
+    whether the body is complete and large enough to compress. Without an
+    encoding the response is only marked as varying on Accept-Encoding.
+
+    Args:
+        middleware (CompressionMiddleware): Settings and body cache
+        encoding (str): Negotiated encoding, None to send the body as it is
+        send (Callable): send of the server
+        if_none_match (str, optional): If-None-Match header of the request, to
+            answer a 304 with the ETag the client holds. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        encoding: Optional[str],
+        send,
+        if_none_match: Optional[str] = None,
+    ):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.if_none_match = if_none_match
+        self._send = send
+        self._start = None
+        self._compressor = None
+        self._passthrough = False
+
+    @staticmethod
+    def _compressible_type(headers: MutableHeaders) -> bool:
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        return "content-encoding" not in headers and self._compressible_type(headers)
+
+    async def _send_unchanged(self, message) -> None:
+        """Send a start message that won't be compressed, with the headers a
+        compressed response would share
+        """
+        self._passthrough = True
+        headers = MutableHeaders(raw=message["headers"])
+        if message["status"] == 304:
+            # A 304 has no body to tell its type by, and revalidates a 200
+            # that varied on Accept-Encoding and, if compressed, had a weak
+            # ETag. The client sends back the tag it got, so that tells which.
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if (
+                self.encoding is not None
+                and etag is not None
+                and (
+                    self.if_none_match is None
+                    or _weak(etag) in self.if_none_match
+                )
+            ):
+                headers["ETag"] = _weak(etag)
+        elif self._compressible_type(headers):
+            headers.add_vary_header("Accept-Encoding")
+        await self._send(message)
+
+    def _cache_key(self, headers: MutableHeaders) -> Optional[tuple]:
+        etag = headers.get("etag")
+        cache_control = headers.get("cache-control", "")
+        if (
+            etag is None
+            or self._start["status"] != 200
+            or "no-store" in cache_control
+            or "private" in cache_control
+        ):
+            return None
+        return (etag, self.encoding)
+
+    def _set_encoding(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if "etag" in headers:
+            headers["ETag"] = _weak(headers["etag"])
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            if self.encoding is None or message["status"] == 304:
+                await self._send_unchanged(message)
+            else:
+                self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._compressor is not None:
+            await self._send(
+                {
+                    "type": "http.response.body",
+                    "body": self._compressor.compress(body, not more_body),
+                    "more_body": more_body,
+                }
+            )
+            return
+
+        headers = MutableHeaders(raw=self._start["headers"])
+        if not self._compressible(headers) or (
+            not more_body and len(body) < self.middleware.minimum_size
+        ):
+            await self._send_unchanged(self._start)
+            await self._send(message)
+            return
+
+        self._set_encoding(headers)
+        if more_body:
+            # Streamed, so the length is unknown until the end
+            del headers["content-length"]
+            self._compressor = _Compressor(
+                self.encoding, self.middleware.level, self.middleware.brotli_quality
+            )
+            body = self._compressor.compress(body, False)
+        else:
+            key = self._cache_key(headers)
+            if key is None:
+                body = compress(
+                    body,
+                    self.encoding,
+                    self.middleware.level,
+                    self.middleware.brotli_quality,
+                )
+            else:
+                body = self.middleware.cached_body(key, body)
+            headers["content-length"] = str(len(body))
+        await self._send(self._start)
+        await self._send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
@@ -0,0 +1,248 @@
+"""Application settings read from environment variables"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+DB_MODES = ("sync", "async")
+
+# Async drivers for each database backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def normalize_url(url: str) -> str:
+    """Rewrite the postgres:// scheme Heroku hands out to one SQLAlchemy accepts
+
+    Args:
+        url (str): Database URL
+
+    Returns:
+        str: Database URL with a postgresql:// scheme
+    """
+    return url.replace("postgres://", "postgresql://", 1)
+
+
+def async_url(url: str) -> str:
+    """Swap the driver of a database URL for its asyncio equivalent
+
+    Args:
+        url (str): Synchronous database URL, e.g. postgresql://... or sqlite:///...
+
+    Raises:
+        ValueError: If there is no async driver for the database
+
+    Returns:
+        str: URL using asyncpg for Postgres or aiosqlite for SQLite
+    """
+    scheme, rest = url.split("://", 1)
+    backend = scheme.split("+", 1)[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend} databases")
+    return f"{ASYNC_DRIVERS[backend]}://{rest}"
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable"""
+    value = os.environ.get(name)
+    return default if value in (None, "") else int(value)
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float environment variable"""
+    value = os.environ.get(name)
+    return default if value in (None, "") else float(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean environment variable such as 1/0 or true/false"""
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Settings for the database layer
+
+    Attributes:
+        database_url (str): SQLAlchemy URL, from HEROKU_DATABASE_URL
+        db_mode (str): "sync" runs queries on a thread pool through Session,
+            "async" runs them on the event loop through AsyncSession. From DB_MODE
+        pool_size (int): Connections kept open per engine, from DB_POOL_SIZE
+        max_overflow (int): Connections allowed above pool_size, from DB_MAX_OVERFLOW
+        pool_timeout (int): Seconds to wait for a free connection, from DB_POOL_TIMEOUT
+        pool_recycle (int): Seconds before a connection is replaced, -1 to never
+            replace them. From DB_POOL_RECYCLE
+        pool_pre_ping (bool): Test connections on checkout, from DB_POOL_PRE_PING
+        cache_enabled (bool): Cache crud reads in memory, from CACHE_ENABLED
+        cache_max_entries (int): Entries kept before the least recently used is
+            evicted, from CACHE_MAX_ENTRIES
+        cache_ttl (int): Default seconds a cached read stays fresh, from CACHE_TTL
+        cache_ttls (dict): Per function TTL overrides, from CACHE_TTL_<FUNCTION>,
+            e.g. CACHE_TTL_GET_COMPANY_YEARS=60
+        cache_backend (str): "memory" for a per process cache or "redis" for one
+            shared by every worker, from CACHE_BACKEND
+        cache_redis_url (str): Redis server for the redis backend, from CACHE_REDIS_URL
+        cache_key_prefix (str): Prefix for every redis key, from CACHE_KEY_PREFIX
+        cache_version_interval (float): Seconds a worker trusts its copy of the
+            dataset version before reading the dataset_version table (and redis)
+            again, from CACHE_VERSION_INTERVAL
+        export_batch_size (int): Rows fetched per round trip by the export
+            endpoints, from EXPORT_BATCH_SIZE
+        memory_store (bool): Serve company and year reads from NumPy arrays
+            loaded at startup instead of the database, from MEMORY_STORE
+        http_cache_control (str): Cache-Control header of the read endpoints,
+            from HTTP_CACHE_CONTROL
+        compression (bool): Compress responses with gzip or brotli, from COMPRESSION
+        compression_minimum_size (int): Smallest body compressed, in bytes, from
+            COMPRESSION_MINIMUM_SIZE
+        compression_level (int): gzip level from 1 to 9, from COMPRESSION_LEVEL
+        compression_brotli_quality (int): brotli quality from 0 to 11, from
+            COMPRESSION_BROTLI_QUALITY
+        compression_cache_bytes (int): Total size of the compressed bodies of
+            cacheable responses kept in memory, from COMPRESSION_CACHE_BYTES
+        metrics (bool): Record request and query timings, served on /metrics and
+            in a Server-Timing header, from METRICS
+        metrics_function_timing (bool): Add an entry per crud function to the
+            Server-Timing header, from METRICS_FUNCTION_TIMING
+        internal_token (str): Bearer token the /internal endpoints and /metrics
+            require, None to disable them, from INTERNAL_TOKEN
+    """
+
+    database_url: Optional[str] = None
+    db_mode: str = "sync"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    cache_enabled: bool = True
+    cache_max_entries: int = 1024
+    cache_ttl: int = 300
+    cache_ttls: dict = field(default_factory=dict)
+    cache_backend: str = "memory"
+    cache_redis_url: str = "redis://localhost:6379/0"
+    cache_key_prefix: str = "climate_api:"
+    cache_version_interval: float = 1.0
+    export_batch_size: int = 1000
+    memory_store: bool = False
+    # Shared caches may serve a response for a minute, then revalidate it
+    # with If-None-Match, which costs no query while the data is unchanged
+    http_cache_control: str = "public, max-age=60, stale-while-revalidate=30"
+    compression: bool = True
+    compression_minimum_size: int = 1000
+    compression_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_cache_bytes: int = 16 * 1024 * 1024
+    metrics: bool = True
+    metrics_function_timing: bool = False
+    internal_token: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Read settings from the environment
+
+        Raises:
+            ValueError: If DB_MODE is not one of DB_MODES
+
+        Returns:
+            Settings: Settings for this process
+        """
+        database_url = os.environ.get("HEROKU_DATABASE_URL")
+        db_mode = os.environ.get("DB_MODE", "sync").lower()
+        if db_mode not in DB_MODES:
+            raise ValueError(f"DB_MODE must be one of {DB_MODES}, got {db_mode}")
+        return cls(
+            database_url=normalize_url(database_url) if database_url else None,
+            db_mode=db_mode,
+            pool_size=_env_int("DB_POOL_SIZE", cls.pool_size),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", cls.max_overflow),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", cls.pool_timeout),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", cls.pool_recycle),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", cls.pool_pre_ping),
+            cache_enabled=_env_bool("CACHE_ENABLED", cls.cache_enabled),
+            cache_max_entries=_env_int("CACHE_MAX_ENTRIES", cls.cache_max_entries),
+            cache_ttl=_env_int("CACHE_TTL", cls.cache_ttl),
+            cache_ttls={
+                name[len("CACHE_TTL_") :].lower(): int(value)
+                for name, value in os.environ.items()
+                if name.startswith("CACHE_TTL_") and value
+            },
+            cache_backend=os.environ.get("CACHE_BACKEND", cls.cache_backend).lower(),
+            cache_redis_url=os.environ.get("CACHE_REDIS_URL", cls.cache_redis_url),
+            cache_key_prefix=os.environ.get("CACHE_KEY_PREFIX", cls.cache_key_prefix),
+            cache_version_interval=_env_float(
+                "CACHE_VERSION_INTERVAL", cls.cache_version_interval
+            ),
+            export_batch_size=_env_int("EXPORT_BATCH_SIZE", cls.export_batch_size),
+            memory_store=_env_bool("MEMORY_STORE", cls.memory_store),
+            http_cache_control=os.environ.get(
+                "HTTP_CACHE_CONTROL", cls.http_cache_control
+            ),
+            compression=_env_bool("COMPRESSION", cls.compression),
+            compression_minimum_size=_env_int(
+                "COMPRESSION_MINIMUM_SIZE", cls.compression_minimum_size
+            ),
+            compression_level=_env_int("COMPRESSION_LEVEL", cls.compression_level),
+            compression_brotli_quality=_env_int(
+                "COMPRESSION_BROTLI_QUALITY", cls.compression_brotli_quality
+            ),
+            compression_cache_bytes=_env_int(
+                "COMPRESSION_CACHE_BYTES", cls.compression_cache_bytes
+            ),
+            metrics=_env_bool("METRICS", cls.metrics),
+            metrics_function_timing=_env_bool(
+                "METRICS_FUNCTION_TIMING", cls.metrics_function_timing
+            ),
+            internal_token=os.environ.get("INTERNAL_TOKEN") or None,
+        )
+
+    @property
+    def async_mode(self) -> bool:
+        """Whether queries run through AsyncSession"""
+        return self.db_mode == "async"
+
+    def ttl_for(self, name: str, default: Optional[int] = None) -> int:
+        """Seconds a cached result of the named function stays fresh
+
+        Args:
+            name (str): Name of the cached function
+            default (int, optional): TTL chosen by the function. Defaults to cache_ttl.
+
+        Returns:
+            int: TTL override for the function, else default, else cache_ttl
+        """
+        if default is None:
+            default = self.cache_ttl
+        return self.cache_ttls.get(name.lower(), default)
+
+    def engine_options(self) -> dict:
+        """Keyword arguments for create_engine
+
+        SQLite keeps SQLAlchemy's default pool, since an in-memory database
+        only exists on the connection that created it.
+
+        Raises:
+            ValueError: If no database URL is configured
+
+        Returns:
+            dict: Pool configuration for the engine
+        """
+        if not self.database_url:
+            raise ValueError("HEROKU_DATABASE_URL environment variable is not set.")
+        if self.database_url.startswith("sqlite"):
+            return {}
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+
+
+settings = Settings.from_env()
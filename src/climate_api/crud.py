@@ -1,30 +1,142 @@
 """CRUD operations for the database"""
 
 from contextvars import ContextVar
-from sqlalchemy.orm import Session
+from typing import Optional
 
+from sqlalchemy import and_, case, func, literal, or_, select
+from sqlalchemy.orm import Session, joinedload, selectinload, subqueryload
+
+from . import memory_store, models
+from .cache import cached
 from .internal.Company import Company
+from .internal.CompanySummary import CompanySummary
 from .internal.CompanyYear import CompanyYear
 from .internal.Year import Year
 from .internal.Goal import Goal
 
 db_session: ContextVar[Session] = ContextVar("db_session")
 
+# Columns of the API models, for reads that skip the ORM and return dicts
+COMPANY_COLUMNS = (
+    Company.id,
+    Company.title,
+    Company.description,
+    Company.goals,
+    Company.report_link,
+)
+YEAR_COLUMNS = (Year.id, Year.year, Year.scope1_2, Year.scope1_2_3)
+
+# Company relationships that can be eager loaded, and how to load them
+COMPANY_RELATIONSHIPS = {"years": Company.years, "goal": Company.goal}
+LOADER_STRATEGIES = {
+    "selectin": selectinload,
+    "joined": joinedload,
+    "subquery": subqueryload,
+}
+
+
+def company_loader_options(include=(), strategy: str = "selectin") -> list:
+    """Build loader options that eager load company relationships
+
+    selectin costs one extra query per relationship regardless of how many
+    companies are returned, so it is the default for list endpoints.
+
+    Args:
+        include (Iterable[str], optional): Relationships to load, any of
+            COMPANY_RELATIONSHIPS. Defaults to ().
+        strategy (str, optional): One of LOADER_STRATEGIES. Defaults to "selectin".
+
+    Raises:
+        ValueError: If a relationship or strategy is unknown
+
+    Returns:
+        list: Loader options to pass to Query.options
+    """
+    if strategy not in LOADER_STRATEGIES:
+        raise ValueError(f"Unknown loader strategy {strategy}")
+    loader = LOADER_STRATEGIES[strategy]
+    options = []
+    for name in include:
+        if name not in COMPANY_RELATIONSHIPS:
+            raise ValueError(f"Unknown company relationship {name}")
+        options.append(loader(COMPANY_RELATIONSHIPS[name]))
+    return options
+
+
+def get_companies(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    include=(),
+    strategy: str = "selectin",
+    after: Optional[int] = None,
+) -> list[Company]:
+    """Get companies ordered by id, a page at a time
+
+    Pass the id of the last company of the previous page as after to page by
+    key instead of offset, which stays as fast on the last page as the first.
+
+    Args:
+        db (Session): SQLAlchemy session
+        skip (int, optional): How many results to skip. Defaults to 0.
+        limit (int, optional): Max amount of results to return. Defaults to 100.
+        include (Iterable[str], optional): Relationships to eager load. Defaults to ().
+        strategy (str, optional): Loader strategy for include. Defaults to "selectin".
+        after (int, optional): Only return companies with a greater id. Defaults
+            to None.
+
+    Returns:
+        list[Company]: List of companies
+    """
+    query = db.query(Company).options(*company_loader_options(include, strategy))
+    return _page(query, Company.id, skip, limit, after).all()
+
+
+def _page(query, key, skip: int, limit: int, after: Optional[int]):
+    """Order a query by key and cut one page out of it, by offset or by key"""
+    if after is not None:
+        query = query.filter(key > after)
+    return query.order_by(key).offset(skip).limit(limit)
+
 
-def get_companies(db: Session, skip: int = 0, limit: int = 100) -> list[Company]:
-    """Get all companies in the database
+def _rows(query) -> list[dict]:
+    """Run a query over plain columns and return each row as a dict"""
+    return [row._asdict() for row in query]
+
+
+def get_company_rows(
+    db: Session, skip: int = 0, limit: int = 100, after: Optional[int] = None
+) -> list[dict]:
+    """Same page as get_companies, as dicts read without building ORM objects
 
     Args:
         db (Session): SQLAlchemy session
         skip (int, optional): How many results to skip. Defaults to 0.
         limit (int, optional): Max amount of results to return. Defaults to 100.
+        after (int, optional): Only return companies with a greater id. Defaults
+            to None.
 
     Returns:
-        list[Company]: List of all companies
+        list[dict]: Company fields of each company
     """
-    return db.query(Company).offset(skip).limit(limit).all()
+    return _rows(_page(db.query(*COMPANY_COLUMNS), Company.id, skip, limit, after))
+
 
+def get_company_titles(db: Session) -> list[tuple[int, str]]:
+    """Get the id and title of every company, for the search index
+
+    Args:
+        db (Session): SQLAlchemy session
 
+    Returns:
+        list[tuple[int, str]]: (id, title) pairs ordered by id
+    """
+    rows = db.query(Company.id, Company.title).order_by(Company.id)
+    return [(company_id, title) for company_id, title in rows if title is not None]
+
+
+@cached(model=models.Company)
+@memory_store.served
 def get_company(db: Session, company_name: str) -> Company:
     """Get a company by name
 
@@ -38,6 +150,32 @@ def get_company(db: Session, company_name: str) -> Company:
     return db.query(Company).filter(Company.title == company_name).first()
 
 
+def _company_years_query(db: Session, company_name: str, *entities):
+    """Build a query joining a company to its years through company_years
+
+    The company is outer joined so a company without any years still returns
+    a single row with a null Year, which lets callers tell "unknown company"
+    apart from "no data" without a second round trip.
+
+    Args:
+        db (Session): SQLAlchemy session
+        company_name (str): Name of the company to get years for
+        *entities: What to select from years. Defaults to the Year entity.
+
+    Returns:
+        Query: Query yielding (company_id, *entities) rows ordered by year
+    """
+    return (
+        db.query(Company.id.label("company_id"), *(entities or (Year,)))
+        .outerjoin(CompanyYear, CompanyYear.company_id == Company.id)
+        .outerjoin(Year, Year.id == CompanyYear.year_id)
+        .filter(Company.title == company_name)
+        .order_by(Year.year)
+    )
+
+
+@cached(model=models.Year)
+@memory_store.served
 def get_company_year(db: Session, company_name: str, year: int) -> Year:
     """Get emissions for a given year and company
 
@@ -49,24 +187,43 @@ def get_company_year(db: Session, company_name: str, year: int) -> Year:
     Returns:
         Year: Year object that matches the year parameter and company_name
     """
-    company = db.query(Company).filter(Company.title == company_name).first()
-    if not company:
-        return None  # Return None if company doesn't exist
+    return (
+        db.query(Year)
+        .join(CompanyYear, CompanyYear.year_id == Year.id)
+        .join(Company, Company.id == CompanyYear.company_id)
+        .filter(Company.title == company_name, Year.year == year)
+        .first()
+    )
+
 
-    company_years = (
-        db.query(CompanyYear).filter(CompanyYear.company_id == company.id).all()
+@cached(model=models.Year)
+@memory_store.served
+def get_company_year_pair(
+    db: Session, company_name: str, start: int, end: int
+) -> list[Year]:
+    """Get emissions for two years of a company in one query
+
+    Args:
+        db (Session): SQLAlchemy session
+        company_name (str): Name of the company to extract the years from
+        start (int): First year
+        end (int): Second year
+
+    Returns:
+        list[Year]: Year objects of the two years that were found, ordered by year
+    """
+    return (
+        db.query(Year)
+        .join(CompanyYear, CompanyYear.year_id == Year.id)
+        .join(Company, Company.id == CompanyYear.company_id)
+        .filter(Company.title == company_name, Year.year.in_((start, end)))
+        .order_by(Year.year)
+        .all()
     )
-    # Get the year_id for each company_year
-    year_ids = [company_year.year_id for company_year in company_years]
-    # Get the year objects for each year_id
-    years = db.query(Year).filter(Year.id.in_(year_ids)).all()
-    # Return the year object that matches the year parameter
-    for year_obj in years:
-        if year_obj.year == year:
-            return year_obj
-    return None
 
 
+@cached(model=models.Year)
+@memory_store.served
 def get_company_years(db: Session, company_name: str) -> list[Year]:
     """For the company with the given name, get all the years
 
@@ -75,21 +232,253 @@ def get_company_years(db: Session, company_name: str) -> list[Year]:
         company_name (str): The name of the company to get years for
 
     Returns:
-        list[Year]: Year objects that have relationships with the given company
+        list[Year]: Year objects that have relationships with the given company,
+            ordered by year. None if the company doesn't exist
+    """
+    rows = _company_years_query(db, company_name).all()
+    if not rows:
+        return None
+    return [year for _, year in rows if year is not None]
+
+
+@cached()
+@memory_store.served
+def get_company_year_rows(db: Session, company_name: str) -> list[dict]:
+    """Same as get_company_years, as dicts read without building ORM objects
+
+    Args:
+        db (Session): SQLAlchemy session
+        company_name (str): The name of the company to get years for
+
+    Returns:
+        list[dict]: Year fields ordered by year. None if the company doesn't exist
     """
-    company = db.query(Company).filter(Company.title == company_name).first()
-    if not company:
+    rows = _rows(_company_years_query(db, company_name, *YEAR_COLUMNS))
+    if not rows:
         return None
-    company_years = (
-        db.query(CompanyYear).filter(CompanyYear.company_id == company.id).all()
+    return [
+        {key: value for key, value in row.items() if key != "company_id"}
+        for row in rows
+        if row["id"] is not None
+    ]
+
+
+@cached(model=models.CompanySummary)
+@memory_store.served
+def get_company_summary(db: Session, company_name: str) -> CompanySummary:
+    """Get the precomputed first/last emissions of a company
+
+    Args:
+        db (Session): SQLAlchemy session
+        company_name (str): Name of the company
+
+    Returns:
+        CompanySummary: Summary row, None if the company doesn't exist or has no years
+    """
+    return (
+        db.query(CompanySummary)
+        .join(Company, Company.id == CompanySummary.company_id)
+        .filter(Company.title == company_name)
+        .first()
+    )
+
+
+@cached()
+@memory_store.served
+def get_changes(
+    db: Session, scope: str, start: Optional[int] = None, end: Optional[int] = None
+) -> list[tuple]:
+    """Get the first and last emissions of every company in one query
+
+    Without a year range these come from company_summaries, limited to
+    companies with at least two years like the change endpoints. With one,
+    both years are pivoted out of years with conditional aggregation.
+
+    Args:
+        db (Session): SQLAlchemy session
+        scope (str): "scope1_2" or "scope1_2_3"
+        start (int, optional): First year of the range. Defaults to None.
+        end (int, optional): Last year of the range. Defaults to None.
+
+    Returns:
+        list[tuple]: (id, title, first_year, first, last_year, last) per company
+            with both values reported
+    """
+    if start is None or end is None:
+        first = getattr(CompanySummary, f"{scope}_first")
+        last = getattr(CompanySummary, f"{scope}_last")
+        query = (
+            db.query(
+                Company.id,
+                Company.title,
+                getattr(CompanySummary, f"{scope}_first_year"),
+                first,
+                getattr(CompanySummary, f"{scope}_last_year"),
+                last,
+            )
+            .join(CompanySummary, CompanySummary.company_id == Company.id)
+            .filter(
+                CompanySummary.year_count >= 2, first.isnot(None), last.isnot(None)
+            )
+        )
+    else:
+        value = getattr(Year, scope)
+        first = func.max(case((Year.year == start, value)))
+        last = func.max(case((Year.year == end, value)))
+        query = (
+            db.query(
+                Company.id, Company.title, literal(start), first, literal(end), last
+            )
+            .join(CompanyYear, CompanyYear.company_id == Company.id)
+            .join(Year, Year.id == CompanyYear.year_id)
+            .filter(Year.year.in_((start, end)))
+            .group_by(Company.id, Company.title)
+            .having(first.isnot(None), last.isnot(None))
+        )
+    return [tuple(row) for row in query]
+
+
+def get_company_batch(db: Session, company_names: list[str], include=()) -> dict:
+    """Get many companies with their years, goal and summary in at most three
+    queries, however many names are given
+
+    Args:
+        db (Session): SQLAlchemy session
+        company_names (list[str]): Company names
+        include (Iterable[str], optional): Any of "years", "goal" and "summary".
+            Defaults to ().
+
+    Returns:
+        dict: Title of each company found to a dict with its "company", plus its
+            "years" ordered by year and its "summary" when included
+    """
+    query = db.query(Company).filter(Company.title.in_(set(company_names)))
+    if "goal" in include:
+        # Joined into the same query, a company has at most one goal
+        query = query.options(joinedload(Company.goal))
+    batch = {}
+    for company in query.order_by(Company.id):
+        # Like get_company, the first company with a title wins
+        batch.setdefault(company.title, {"company": company})
+    ids = [entry["company"].id for entry in batch.values()]
+    if ids and "years" in include:
+        years = {company_id: [] for company_id in ids}
+        rows = (
+            db.query(CompanyYear.company_id, Year)
+            .join(Year, Year.id == CompanyYear.year_id)
+            .filter(CompanyYear.company_id.in_(ids))
+            .order_by(CompanyYear.company_id, Year.year)
+        )
+        for company_id, year in rows:
+            years[company_id].append(year)
+        for entry in batch.values():
+            entry["years"] = years[entry["company"].id]
+    if ids and "summary" in include:
+        summaries = {
+            summary.company_id: summary
+            for summary in db.query(CompanySummary).filter(
+                CompanySummary.company_id.in_(ids)
+            )
+        }
+        for entry in batch.values():
+            entry["summary"] = summaries.get(entry["company"].id)
+    return batch
+
+
+@cached()
+@memory_store.served
+def get_company_series(
+    db: Session,
+    company_name: str,
+    scope: str,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> Optional[list[tuple]]:
+    """Get one scope of a company's years within a range
+
+    The range is part of the outer join, so a company without years in it
+    still returns a row and can be told apart from an unknown company.
+
+    Args:
+        db (Session): SQLAlchemy session
+        company_name (str): Name of the company
+        scope (str): "scope1_2" or "scope1_2_3"
+        start (int, optional): First year, inclusive. Defaults to None.
+        end (int, optional): Last year, inclusive. Defaults to None.
+
+    Returns:
+        list[tuple]: (year, value) pairs ordered by year, value None where not
+            reported. None if the company doesn't exist
+    """
+    in_range = [Year.id == CompanyYear.year_id]
+    if start is not None:
+        in_range.append(Year.year >= start)
+    if end is not None:
+        in_range.append(Year.year <= end)
+    rows = (
+        db.query(Company.id, Year.year, getattr(Year, scope))
+        .outerjoin(CompanyYear, CompanyYear.company_id == Company.id)
+        .outerjoin(Year, and_(*in_range))
+        .filter(Company.title == company_name)
+        .order_by(Company.id, Year.year)
+        .all()
     )
-    # Get the year_id for each company_year
-    year_ids = [company_year.year_id for company_year in company_years]
-    # Get the year objects for each year_id
-    years = db.query(Year).filter(Year.id.in_(year_ids)).all()
-    return years
+    if not rows:
+        return None
+    # Like get_company, the first company with a title wins
+    company_id = rows[0][0]
+    return [
+        (year, value)
+        for row_id, year, value in rows
+        if row_id == company_id and year is not None
+    ]
+
+
+@cached()
+def get_company_profile(db: Session, company_name: str) -> Optional[dict]:
+    """Get a company with its goal, summary and years from one joined query
 
+    The goal and summary repeat on every year row, which costs less than a
+    round trip each for a single company. The result is cached as one entry,
+    whichever parts a caller then uses.
 
+    Args:
+        db (Session): SQLAlchemy session
+        company_name (str): Name of the company
+
+    Returns:
+        dict: "company", "goal", "summary" and "years" ordered by year, as API
+            models. None if the company doesn't exist
+    """
+    rows = (
+        db.query(Company, Goal, CompanySummary, Year)
+        .outerjoin(Goal, Goal.id == Company.goals)
+        .outerjoin(CompanySummary, CompanySummary.company_id == Company.id)
+        .outerjoin(CompanyYear, CompanyYear.company_id == Company.id)
+        .outerjoin(Year, Year.id == CompanyYear.year_id)
+        .filter(Company.title == company_name)
+        .order_by(Company.id, Year.year)
+        .all()
+    )
+    if not rows:
+        return None
+    # Like get_company, the first company with a title wins
+    company, goal, summary, _ = rows[0]
+    return {
+        "company": models.Company.from_orm(company),
+        "goal": models.Goal.from_orm(goal) if goal is not None else None,
+        "summary": (
+            models.CompanySummary.from_orm(summary) if summary is not None else None
+        ),
+        "years": [
+            models.Year.from_orm(year)
+            for row_company, _, _, year in rows
+            if row_company.id == company.id and year is not None
+        ],
+    }
+
+
+@cached(model=models.Goal)
 def get_goal(db: Session, goal_id: int) -> Goal:
     """Given a goals id return that goal
 
@@ -103,6 +492,137 @@ def get_goal(db: Session, goal_id: int) -> Goal:
     return db.query(Goal).filter(Goal.id == goal_id).first()
 
 
+def _reported(value) -> Optional[float]:
+    """NaN cells from the workbook count as missing"""
+    return None if value is None or value != value else value
+
+
+def scope_progress(
+    reference_year: Optional[int],
+    reference: Optional[float],
+    target_year: Optional[int],
+    required_percent: Optional[float],
+    latest_year: Optional[int],
+    latest: Optional[float],
+) -> models.ScopeProgress:
+    """Compare the reduction achieved since the reference year with the goal
+
+    Args:
+        reference_year (int): Year the goal's reduction is measured from
+        reference (float): Emissions in the reference year
+        target_year (int): Year the goal should be met by
+        required_percent (float): Reduction the goal requires, in percent
+        latest_year (int): Last year with reported emissions
+        latest (float): Emissions in latest_year
+
+    Returns:
+        ScopeProgress: Achieved, expected and projected reductions
+    """
+    progress = models.ScopeProgress(
+        target_year=target_year,
+        required_percent=required_percent,
+        reference=reference,
+        latest_year=latest_year,
+        latest=latest,
+    )
+    if None in (reference_year, reference, latest_year, latest) or not reference:
+        return progress
+    if latest_year <= reference_year:
+        return progress
+    achieved = 100 * (reference - latest) / reference
+    progress.achieved_percent = achieved
+    if None in (target_year, required_percent) or target_year <= reference_year:
+        return progress
+    span = target_year - reference_year
+    elapsed = min(latest_year - reference_year, span)
+    progress.expected_percent = required_percent * elapsed / span
+    # Emissions can't fall by more than 100%, however steep the trend
+    progress.projected_percent = min(
+        achieved * span / (latest_year - reference_year), 100.0
+    )
+    progress.on_track = progress.projected_percent >= required_percent
+    return progress
+
+
+@cached(ttl=24 * 60 * 60)
+def get_goal_progress(
+    db: Session, company_name: Optional[str] = None
+) -> list[models.GoalProgress]:
+    """Work out every company's progress towards its goals in one query
+
+    Each company with a goal is joined to its emissions in the goal's
+    reference year and to its summary for the latest reported year. Results
+    stay cached until the next load bumps the dataset version.
+
+    Args:
+        db (Session): SQLAlchemy session
+        company_name (str, optional): Only this company. Defaults to None.
+
+    Returns:
+        list[GoalProgress]: Progress of each company with a goal, ordered by id
+    """
+    reference = (
+        select(CompanyYear.company_id, Year.year, Year.scope1_2, Year.scope1_2_3)
+        .join(Year, Year.id == CompanyYear.year_id)
+        .subquery()
+    )
+    query = (
+        db.query(
+            Company.id,
+            Company.title,
+            Goal,
+            reference.c.scope1_2,
+            reference.c.scope1_2_3,
+            CompanySummary,
+        )
+        .join(Goal, Goal.id == Company.goals)
+        .outerjoin(CompanySummary, CompanySummary.company_id == Company.id)
+        .outerjoin(
+            reference,
+            and_(
+                reference.c.company_id == Company.id,
+                reference.c.year == Goal.reference_year,
+            ),
+        )
+        .order_by(Company.id)
+    )
+    if company_name is not None:
+        query = query.filter(Company.title == company_name)
+    progress = []
+    for company_id, title, goal, scope1_2, scope1_2_3, summary in query:
+        targets = {
+            "scope1_2": (goal.scope12_target_year, goal.scope12_percent_decrease),
+            "scope1_2_3": (goal.scope3_target_year, goal.scope3_percent_decrease),
+        }
+        references = {"scope1_2": scope1_2, "scope1_2_3": scope1_2_3}
+        scopes = {}
+        for scope, (target_year, required_percent) in targets.items():
+            latest_year = latest = None
+            if summary is not None:
+                latest_year = getattr(summary, f"{scope}_last_year")
+                latest = getattr(summary, f"{scope}_last")
+            scopes[scope] = scope_progress(
+                goal.reference_year,
+                _reported(references[scope]),
+                target_year,
+                _reported(required_percent),
+                latest_year,
+                _reported(latest),
+            )
+        progress.append(
+            models.GoalProgress(
+                company_id=company_id,
+                title=title,
+                goal_id=goal.id,
+                reference_year=goal.reference_year,
+                **scopes,
+            )
+        )
+    return progress
+
+
+@cached(model=models.Year)
+@memory_store.served
 def get_emissions(db: Session, year: int, limit: int = 100) -> list[Year]:
     """Given a year and a scope return the emissions for that year and scope
 
@@ -120,27 +640,101 @@ def get_emissions(db: Session, year: int, limit: int = 100) -> list[Year]:
     return year_obj
 
 
-def get_all_emissions(db: Session, skip: int = 0, limit: int = 100) -> list[Year]:
-    """Get all years with emissions for every company
+@cached()
+@memory_store.served
+def get_emission_rows(db: Session, year: int, limit: int = 100) -> list[dict]:
+    """Same as get_emissions, as dicts read without building ORM objects
+
+    Args:
+        db (Session): SQLAlchemy session
+        year (int): The year to get emissions for
+        limit (int, optional): Max return amount. Defaults to 100.
+
+    Returns:
+        list[dict]: Year fields, None if there is no data for the year
+    """
+    rows = _rows(db.query(*YEAR_COLUMNS).filter(Year.year == year).limit(limit))
+    return rows or None
+
+
+# Years where at least one scope was reported
+_REPORTED = or_(Year.scope1_2.isnot(None), Year.scope1_2_3.isnot(None))
+
+
+def get_all_emissions(
+    db: Session, skip: int = 0, limit: int = 100, after: Optional[int] = None
+) -> list[Year]:
+    """Get years with emissions for every company, ordered by id
+
+    Years where neither scope was reported are filtered out in the query, so
+    every page is full until the last one.
+
+    Args:
+        db (Session): SQLAlchemy session
+        skip (int, optional): How many results to skip Defaults to 0.
+        limit (int, optional): Max return amount. Defaults to 100.
+        after (int, optional): Only return years with a greater id. Defaults to None.
+
+    Returns:
+        list[Year]: Years with emissions
+    """
+    query = db.query(Year).filter(_REPORTED)
+    return _page(query, Year.id, skip, limit, after).all()
+
+
+def get_all_emission_rows(
+    db: Session, skip: int = 0, limit: int = 100, after: Optional[int] = None
+) -> list[dict]:
+    """Same page as get_all_emissions, as dicts read without building ORM objects
 
     Args:
         db (Session): SQLAlchemy session
         skip (int, optional): How many results to skip Defaults to 0.
         limit (int, optional): Max return amount. Defaults to 100.
+        after (int, optional): Only return years with a greater id. Defaults to None.
 
     Returns:
-        list[Year]: All years with emissions
+        list[dict]: Year fields of each year with emissions
     """
+    query = db.query(*YEAR_COLUMNS).filter(_REPORTED)
+    return _rows(_page(query, Year.id, skip, limit, after))
 
-    years = db.query(Year).offset(skip).limit(limit).all()
-    filtered_years = []
 
-    # Iterate over the years
-    for year in years:
-        # If either scope1_2 or scope1_2_3 is not None, keep the year
-        if year.scope1_2 is not None or year.scope1_2_3 is not None:
-            filtered_years.append(year)
-    return filtered_years
+@cached()
+@memory_store.served
+def get_year_summary(db: Session, year: int) -> models.YearSummary:
+    """Sum emissions over every company for a year in a single query
+
+    Args:
+        db (Session): SQLAlchemy session
+        year (int): The year to sum emissions for
+
+    Returns:
+        YearSummary: Totals for the year, None if there is no data for the year
+    """
+    both_scopes = and_(Year.scope1_2.isnot(None), Year.scope1_2_3.isnot(None))
+    companies, total, scope1_2, scope3 = (
+        db.query(
+            func.count(Year.id),
+            # A company's total is scope 1+2+3 where reported, else scope 1+2
+            func.coalesce(func.sum(func.coalesce(Year.scope1_2_3, Year.scope1_2)), 0.0),
+            func.coalesce(func.sum(Year.scope1_2), 0.0),
+            func.coalesce(
+                func.sum(Year.scope1_2_3 - Year.scope1_2).filter(both_scopes), 0.0
+            ),
+        )
+        .filter(Year.year == year)
+        .one()
+    )
+    if not companies:
+        return None
+    return models.YearSummary(
+        year=year,
+        companies=companies,
+        total=total,
+        scope1_2=scope1_2,
+        scope3=scope3,
+    )
 
 
 def get_scope3_emissions(db: Session, year: int) -> float:
@@ -151,11 +745,71 @@ def get_scope3_emissions(db: Session, year: int) -> float:
         year (int): The year to get emissions for
 
     Returns:
-        float: The scope 3 emissions for the given year
+        float: The scope 3 emissions for the given year, None if there is no data
     """
-    all_emission = get_emissions(db, year)
-    scope_1_2_3 = 0.0
-    for emission in all_emission:
-        if emission.scope1_2_3 is not None and emission.scope1_2 is not None:
-            scope_1_2_3 += emission.scope1_2_3 - emission.scope1_2
-    return scope_1_2_3
+    summary = get_year_summary(db, year)
+    if summary is None:
+        return None
+    return summary.scope3
+
+
+def export_emissions_statement():
+    """Select every company and year row for a bulk export
+
+    Returns:
+        Select: company, year, scope1_2 and scope1_2_3 ordered by company and year
+    """
+    return (
+        select(
+            Company.title.label("company"),
+            Year.year,
+            Year.scope1_2,
+            Year.scope1_2_3,
+        )
+        .join(CompanyYear, CompanyYear.company_id == Company.id)
+        .join(Year, Year.id == CompanyYear.year_id)
+        .order_by(Company.id, Year.year)
+    )
+
+
+def export_companies_statement():
+    """Select every company with its goal flattened into columns for a bulk export
+
+    Returns:
+        Select: Company columns and goal columns ordered by company id
+    """
+    return (
+        select(
+            Company.id,
+            Company.title,
+            Company.description,
+            Company.report_link,
+            Goal.scope12_target_year,
+            Goal.scope12_percent_decrease,
+            Goal.scope3_target_year,
+            Goal.scope3_percent_decrease,
+            Goal.reference_year,
+        )
+        .outerjoin(Goal, Goal.id == Company.goals)
+        .order_by(Company.id)
+    )
+
+
+def stream_rows(db: Session, statement, batch_size: int = 1000):
+    """Run a statement on a server side cursor and yield its rows in batches
+
+    Only batch_size rows are held in memory at a time, on databases whose
+    driver supports server side cursors.
+
+    Args:
+        db (Session): SQLAlchemy session
+        statement (Select): Statement to run
+        batch_size (int, optional): Rows fetched per batch. Defaults to 1000.
+
+    Yields:
+        list[RowMapping]: Up to batch_size rows
+    """
+    result = db.execute(
+        statement.execution_options(stream_results=True, yield_per=batch_size)
+    )
+    yield from result.mappings().partitions()
@@ -1,23 +1,300 @@
 """This module contains the database configuration for the application."""
 
-from sqlalchemy import create_engine
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from sqlalchemy import create_engine, event, exc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-#from kubernetes import client, config
-import os
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
 
-database_url = os.environ.get("HEROKU_DATABASE_URL")
-database_url = database_url.replace("postgres://", "postgresql://", 1)
-if not database_url:
-    raise ValueError("HEROKU_DATABASE_URL environment variable is not set.")
+#from kubernetes import client, config
+from .config import async_url, settings
+from .metrics import listen_queries
 
-engine = create_engine(
-    database_url,
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Engines are created on first use by get_engine/get_async_engine, which bind
+# these session factories
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+AsyncSessionLocal = None
 
 Base = declarative_base()
 
+_engine = None
+_async_engine = None
+_engine_lock = threading.Lock()
+
+
+class PoolStats:
+    """Running totals for one connection pool, updated from pool events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """Record how long a checkout waited for a connection
+
+        Args:
+            seconds (float): Time spent getting a connection from the pool
+            timed_out (bool, optional): Whether the wait hit pool_timeout. Defaults to False.
+        """
+        with self._lock:
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def increment(self, counter: str) -> None:
+        """Add one to a counter
+
+        Args:
+            counter (str): connects, checkouts or checkins
+        """
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self, pool) -> dict:
+        """Current counters together with the pool's live state
+
+        Args:
+            pool (Pool): Pool these stats belong to
+
+        Returns:
+            dict: Statistics for the pool
+        """
+        with self._lock:
+            stats = {
+                "pool_class": type(pool).__name__,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds,
+                "wait_seconds_max": self.max_wait_seconds,
+            }
+        # Only queue pools have a fixed size and overflow
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, name, None)
+            stats[name] = method() if callable(method) else None
+        return stats
+
+
+def _instrumented_pool(pool_class, stats: PoolStats):
+    """Subclass a queue pool so checkouts record how long they waited
+
+    Pool.recreate() builds a new pool from self.__class__, so the stats
+    survive engine.dispose().
+
+    Args:
+        pool_class (type): QueuePool or AsyncAdaptedQueuePool
+        stats (PoolStats): Stats to record into
+
+    Returns:
+        type: Pool class to pass to create_engine as poolclass
+    """
+
+    class InstrumentedPool(pool_class):
+        """Queue pool that times every connection checkout"""
+
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                stats.record_wait(time.perf_counter() - start, timed_out=True)
+                raise
+            stats.record_wait(time.perf_counter() - start)
+            return connection
+
+    return InstrumentedPool
+
+
+def _engine_kwargs(pool_class, stats: PoolStats) -> dict:
+    """Build create_engine keyword arguments from the settings
+
+    Args:
+        pool_class (type): Queue pool class for the engine
+        stats (PoolStats): Stats the pool records into
+
+    Returns:
+        dict: Keyword arguments for create_engine or create_async_engine
+    """
+    options = settings.engine_options()
+    if options:
+        options["poolclass"] = _instrumented_pool(pool_class, stats)
+    return options
+
+
+def _listen_pool(engine, stats: PoolStats) -> None:
+    """Count connects, checkouts and checkins on an engine's pool
+
+    Args:
+        engine (Engine): Synchronous engine
+        stats (PoolStats): Stats to record into
+    """
+    engine.pool_stats = stats
+    for name, counter in (
+        ("connect", "connects"),
+        ("checkout", "checkouts"),
+        ("checkin", "checkins"),
+    ):
+        event.listen(
+            engine, name, lambda *args, counter=counter: stats.increment(counter)
+        )
+
+
+def get_engine():
+    """Get the synchronous engine, creating it on first use
+
+    Raises:
+        ValueError: If HEROKU_DATABASE_URL is not set
+
+    Returns:
+        Engine: Engine bound to SessionLocal
+    """
+    global _engine  # pylint: disable=global-statement
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                stats = PoolStats()
+                engine = create_engine(
+                    settings.database_url, **_engine_kwargs(QueuePool, stats)
+                )
+                _listen_pool(engine, stats)
+                listen_queries(engine)
+                SessionLocal.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+
+def get_async_engine():
+    """Get the async engine, creating it on first use
+
+    The asyncio extension needs greenlet and an async driver, so it is only
+    imported here.
+
+    Raises:
+        ValueError: If HEROKU_DATABASE_URL is not set
+
+    Returns:
+        AsyncEngine: Engine bound to AsyncSessionLocal
+    """
+    global _async_engine, AsyncSessionLocal  # pylint: disable=global-statement
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                # pylint: disable=import-outside-toplevel
+                from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+                stats = PoolStats()
+                settings.engine_options()  # Fail early without a database URL
+                engine = create_async_engine(
+                    async_url(settings.database_url),
+                    **_engine_kwargs(AsyncAdaptedQueuePool, stats),
+                )
+                _listen_pool(engine.sync_engine, stats)
+                listen_queries(engine.sync_engine)
+                AsyncSessionLocal = sessionmaker(
+                    bind=engine,
+                    class_=AsyncSession,
+                    autoflush=False,
+                    expire_on_commit=False,
+                )
+                _async_engine = engine
+    return _async_engine
+
+
+def pool_status() -> dict:
+    """Connection pool statistics for every engine created so far
+
+    Returns:
+        dict: "sync" and/or "async" to the stats of that engine's pool
+    """
+    status = {}
+    if _engine is not None:
+        status["sync"] = _engine.pool_stats.snapshot(_engine.pool)
+    if _async_engine is not None:
+        sync_engine = _async_engine.sync_engine
+        status["async"] = sync_engine.pool_stats.snapshot(sync_engine.pool)
+    for stats in status.values():
+        if stats["overflow"] is not None:
+            stats["max_overflow"] = settings.max_overflow
+    return status
+
+
+def get_sync_db():
+    """
+    Get a database session and close it after use
+    """
+    get_engine()
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """
+    Get an async database session and close it after use
+    """
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Route handlers await async_crud, which accepts either kind of session
+get_db = get_async_db if settings.async_mode else get_sync_db
+
+
+@asynccontextmanager
+async def session_scope():
+    """
+    Open a session of the configured kind for work outside a request's dependencies
+
+    Streaming responses keep reading from the database after FastAPI has
+    closed the dependencies of the request, so they hold their own session.
+    """
+    if settings.async_mode:
+        get_async_engine()
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        get_engine()
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+
+async def run_query(db, fn, *args, **kwargs):
+    """Run a synchronous crud function without blocking the event loop
+
+    With an AsyncSession the function runs through AsyncSession.run_sync, so
+    its queries are awaited on the async driver. With a plain Session it runs
+    on the thread pool instead.
+
+    Args:
+        db (Session | AsyncSession): Database session
+        fn (Callable): Function taking a Session as its first argument
+
+    Returns:
+        Any: Whatever fn returns
+    """
+    run_sync = getattr(db, "run_sync", None)
+    if run_sync is not None:
+        return await run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
 # Load Kubernetes configuration
 # config.load_kube_config()
 
@@ -0,0 +1,121 @@
+"""Conditional GET support: ETag, Last-Modified and 304 responses
+
+Every response of the read endpoints is determined by the request URL and
+the dataset, which only changes when the populate_db loaders bump the
+dataset version. So the ETag is a hash of the URL and the version, and it
+can be checked before the handler touches the database or serializes
+anything. The version is read from the dataset_version table at most every
+CACHE_VERSION_INTERVAL seconds, through the request's own session, so a load
+by another process is noticed whatever the cache backend.
+"""
+
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+
+from .cache import dataset_modified, dataset_version
+from .config import settings
+from .database import get_db, run_query
+
+
+def make_etag(url: str, version: str, modified: float) -> str:
+    """Strong ETag for a URL at a dataset version
+
+    The time the version started is included so a memory cache backend, whose
+    version restarts at 0 with the process, never reuses an ETag for other data.
+
+    Args:
+        url (str): Path and query string of the request
+        version (str): Dataset version, see cache.dataset_version
+        modified (float): Unix time the version started
+
+    Returns:
+        str: Quoted entity tag
+    """
+    digest = hashlib.sha1(f"{version}:{modified!r}:{url}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header lists etag, using weak comparison
+
+    Args:
+        if_none_match (str): Header value, e.g. '"abc", W/"def"' or '*'
+        etag (str): Current entity tag
+
+    Returns:
+        bool: True if the client's copy is current
+    """
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def not_modified_since(if_modified_since: Optional[str], modified: float) -> bool:
+    """Whether an If-Modified-Since date is at or after modified
+
+    Args:
+        if_modified_since (str): HTTP date from the client, or None
+        modified (float): Unix time the data last changed
+
+    Returns:
+        bool: True if the client's copy is current, False if unparseable
+    """
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one second resolution
+    return int(modified) <= since
+
+
+def _validators(db) -> tuple:
+    """Dataset version and the time it started, read through one session"""
+    return dataset_version(db), dataset_modified(db)
+
+
+async def conditional_get(request: Request, response: Response, db=Depends(get_db)):
+    """Dependency answering unchanged GETs with 304 before the handler runs
+
+    Listed before the other dependencies of a router, so a 304 costs no query
+    but the dataset version read, at most every CACHE_VERSION_INTERVAL
+    seconds. The session is the one the handler gets, so async mode reads
+    the version on the async engine. Other responses get ETag, Last-Modified
+    and Cache-Control headers.
+
+    Args:
+        request (Request): Incoming request
+        response (Response): Response whose headers the handler's result gets
+        db (Session | AsyncSession, optional): Database session. Defaults to
+            Depends(get_db).
+
+    Raises:
+        HTTPException: 304 if the client's copy is current
+    """
+    if request.method not in ("GET", "HEAD"):
+        return
+    url = request.url.path
+    if request.url.query:
+        url = f"{url}?{request.url.query}"
+    version, modified = await run_query(db, _validators)
+    etag = make_etag(url, version, modified)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": settings.http_cache_control,
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        unchanged = etag_matches(if_none_match, etag)
+    else:
+        unchanged = not_modified_since(
+            request.headers.get("if-modified-since"), modified
+        )
+    if unchanged:
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
@@ -1,9 +1,9 @@
 """Company model"""
 
-from sqlalchemy import Column, Integer, String
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, func
+from sqlalchemy.orm import relationship
 
-Base = declarative_base()
+from ..database import Base
 
 
 class Company(Base):
@@ -12,10 +12,27 @@ class Company(Base):
     __tablename__ = "companies"
 
     id = Column(Integer, primary_key=True)
-    title = Column(String)
+    title = Column(String, index=True)
     description = Column(String, nullable=True)
-    goals = Column(Integer, nullable=True)  # Assuming you'll store goals as JSON data
+    goals = Column(Integer, ForeignKey("goals.id"), nullable=True)
     report_link = Column(String, nullable=True)
 
+    __table_args__ = (
+        # Case-insensitive name lookups, the trigram index is Postgres only and
+        # lives in the migration
+        Index("ix_companies_title_lower", func.lower(title)),
+    )
+
+    goal = relationship("Goal", back_populates="companies")
+    # company_years is written through CompanyYear, so this side is read only
+    years = relationship(
+        "Year",
+        secondary="company_years",
+        order_by="Year.year",
+        back_populates="company",
+        viewonly=True,
+    )
+    summary = relationship("CompanySummary", back_populates="company", uselist=False)
+
     def __repr__(self):
         return f"<Company(id={self.id}, title={self.title}, description={self.description})>"
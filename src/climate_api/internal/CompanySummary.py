@@ -0,0 +1,32 @@
+"""CompanySummary model."""
+
+from sqlalchemy import Column, Float, ForeignKey, Integer
+from sqlalchemy.orm import relationship
+
+from ..database import Base
+
+
+class CompanySummary(Base):
+    """Precomputed first/last emissions per company, rebuilt on every data load."""
+
+    __tablename__ = "company_summaries"
+
+    company_id = Column(Integer, ForeignKey("companies.id"), primary_key=True)
+    year_count = Column(Integer, nullable=False)
+    scope1_2_first_year = Column(Integer, nullable=True)
+    scope1_2_first = Column(Float, nullable=True)
+    scope1_2_last_year = Column(Integer, nullable=True)
+    scope1_2_last = Column(Float, nullable=True)
+    scope1_2_change = Column(Float, nullable=True)
+    scope1_2_percent_change = Column(Float, nullable=True)
+    scope1_2_3_first_year = Column(Integer, nullable=True)
+    scope1_2_3_first = Column(Float, nullable=True)
+    scope1_2_3_last_year = Column(Integer, nullable=True)
+    scope1_2_3_last = Column(Float, nullable=True)
+    scope1_2_3_change = Column(Float, nullable=True)
+    scope1_2_3_percent_change = Column(Float, nullable=True)
+
+    company = relationship("Company", back_populates="summary")
+
+    def __repr__(self):
+        return f"<CompanySummary(company_id={self.company_id})>"
@@ -1,9 +1,8 @@
 """CompanyYear model."""
 
-from sqlalchemy import Column, Integer
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, ForeignKey, Integer
 
-Base = declarative_base()
+from ..database import Base
 
 
 class CompanyYear(Base):
@@ -11,8 +10,11 @@ class CompanyYear(Base):
 
     __tablename__ = "company_years"
 
-    company_id = Column(Integer, primary_key=True)
-    year_id = Column(Integer, primary_key=True)
+    # The primary key leads with company_id, so it already serves lookups by
+    # company. Migrated databases have a unique index in its place, see the
+    # lookup_indexes migration
+    company_id = Column(Integer, ForeignKey("companies.id"), primary_key=True)
+    year_id = Column(Integer, ForeignKey("years.id"), primary_key=True, index=True)
 
     def __repr__(self):
         return f"<CompanyYear(company_id={self.company_id}, year_id={self.year_id})>"
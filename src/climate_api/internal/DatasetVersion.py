@@ -0,0 +1,19 @@
+"""DatasetVersion model."""
+
+from sqlalchemy import Column, Float, Integer
+
+from ..database import Base
+
+
+class DatasetVersion(Base):
+    """Single row counting data loads, bumped in the same transaction as the data."""
+
+    __tablename__ = "dataset_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    # Unix time of the load, for Last-Modified headers
+    modified = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<DatasetVersion(version={self.version})>"
@@ -1,9 +1,9 @@
 """Goal model."""
 
 from sqlalchemy import Column, Integer, Float
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
 
-Base = declarative_base()
+from ..database import Base
 
 
 class Goal(Base):
@@ -18,5 +18,7 @@ class Goal(Base):
     scope3_percent_decrease = Column(Float)
     reference_year = Column(Integer)
 
+    companies = relationship("Company", back_populates="goal")
+
     def __repr__(self):
         return f"<Goal(id={self.id})>"
@@ -1,8 +1,8 @@
 """Year model."""
 from sqlalchemy import Column, Integer, Float
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import relationship
 
-Base = declarative_base()
+from ..database import Base
 
 
 class Year(Base):
@@ -11,9 +11,17 @@ class Year(Base):
     __tablename__ = "years"
 
     id = Column(Integer, primary_key=True)
-    year = Column(Integer, nullable=False)
+    year = Column(Integer, nullable=False, index=True)
     scope1_2 = Column(Float, nullable=True)
     scope1_2_3 = Column(Float, nullable=True)
 
+    company = relationship(
+        "Company",
+        secondary="company_years",
+        back_populates="years",
+        uselist=False,
+        viewonly=True,
+    )
+
     def __repr__(self):
         return f"<Year(id={self.id}, year={self.year})>"
@@ -0,0 +1,6 @@
+from .Company import Company
+from .CompanySummary import CompanySummary
+from .CompanyYear import CompanyYear
+from .DatasetVersion import DatasetVersion
+from .Goal import Goal
+from .Year import Year
@@ -1,9 +1,53 @@
 """Main module for the FastAPI application."""
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from .routers import companies, years
+from . import memory_store, search
+from .compression import CompressionMiddleware
+from .config import settings
+from .metrics import MetricsMiddleware
+from .database import run_query, session_scope
+from .responses import JSONResponse
+from .routers import companies, export, goals, internal, metrics, rankings, years
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Build the company search index and the in-memory store, if enabled,
+    before serving requests"""
+    try:
+        async with session_scope() as db:
+            await run_query(db, search.build_index)
+            if memory_store.enabled():
+                await run_query(db, memory_store.build_store)
+    except Exception:  # pylint: disable=broad-except
+        # Both are built on first use instead
+        logger.warning("Could not load the dataset at startup", exc_info=True)
+    yield
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=JSONResponse)
+if settings.compression:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        level=settings.compression_level,
+        brotli_quality=settings.compression_brotli_quality,
+        cache_bytes=settings.compression_cache_bytes,
+    )
+if settings.metrics:
+    # Added last so it is outermost and times compression as well
+    app.add_middleware(
+        MetricsMiddleware, function_timing=settings.metrics_function_timing
+    )
 
 app.include_router(companies.router)
 app.include_router(years.router)
+app.include_router(rankings.router)
+app.include_router(goals.router)
+app.include_router(export.router)
+app.include_router(internal.router)
+app.include_router(metrics.router)
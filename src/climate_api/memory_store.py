@@ -0,0 +1,387 @@
+"""Columnar in-memory copy of the emissions data
+
+The dataset is small and only changes when the populate_db scripts run, so
+with MEMORY_STORE enabled the companies, company_years and years tables are
+loaded into dense company x year NumPy matrices, NaN where nothing was
+reported. The crud functions that read them answer from these arrays, so
+yearly totals and per company changes become vectorized reductions instead
+of queries.
+
+A snapshot is immutable. When the dataset version from the cache module
+changes, the next read builds a new snapshot and swaps it in with one
+assignment, so concurrent readers see either the old or the new data. The
+version includes the dataset_version row the loaders bump, so a load from
+another process is picked up within CACHE_VERSION_INTERVAL seconds whatever
+the cache backend.
+"""
+
+import functools
+import threading
+from typing import Optional
+
+from . import models
+from .cache import dataset_version
+from .config import settings
+from .internal.Company import Company
+from .internal.CompanyYear import CompanyYear
+from .internal.Year import Year
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is the optional "memory" extra
+    np = None
+
+SCOPES = ("scope1_2", "scope1_2_3")
+
+
+def _value(value) -> Optional[float]:
+    """Convert a matrix cell to a float, NaN to None"""
+    return None if np.isnan(value) else float(value)
+
+
+class EmissionsStore:
+    """Immutable snapshot of every company's yearly emissions
+
+    Args:
+        companies (list): (id, title, description, goals, report_link) rows
+        years (list): (company_id, year_id, year, scope1_2, scope1_2_3) rows
+        version (str, optional): Dataset version the rows were read at.
+            Defaults to None.
+    """
+
+    def __init__(self, companies: list, years: list, version: Optional[str] = None):
+        self.version = version
+        companies = sorted(companies, key=lambda row: row[0])
+        self.companies = [
+            models.Company(
+                id=company_id,
+                title=title,
+                description=description,
+                goals=goals,
+                report_link=report_link,
+            )
+            for company_id, title, description, goals, report_link in companies
+        ]
+        self.company_ids = np.array([row[0] for row in companies], dtype=np.int64)
+        self.rows = {}
+        for row, company in enumerate(self.companies):
+            # Like a query with .first(), the lowest id wins for a repeated title
+            self.rows.setdefault(company.title, row)
+
+        years = [row for row in years if row[2] is not None]
+        self.years = np.array(sorted({row[2] for row in years}), dtype=np.int64)
+        shape = (len(self.companies), len(self.years))
+        self.year_ids = np.full(shape, -1, dtype=np.int64)
+        self.scope1_2 = np.full(shape, np.nan)
+        self.scope1_2_3 = np.full(shape, np.nan)
+        if years and self.companies:
+            company_ids, year_ids, year_values, scope1_2, scope1_2_3 = (
+                np.array(column) for column in zip(*years)
+            )
+            rows = np.searchsorted(self.company_ids, company_ids.astype(np.int64))
+            rows = rows.clip(max=len(self.company_ids) - 1)
+            # Skip company_years rows pointing at a missing company
+            known = self.company_ids[rows] == company_ids
+            rows = rows[known]
+            cols = np.searchsorted(self.years, year_values[known].astype(np.int64))
+            self.year_ids[rows, cols] = year_ids[known]
+            # None becomes NaN in a float array
+            self.scope1_2[rows, cols] = scope1_2[known].astype(float)
+            self.scope1_2_3[rows, cols] = scope1_2_3[known].astype(float)
+        self.present = self.year_ids >= 0
+        self.summary_columns = self.summaries() if len(self.years) else {}
+
+    @classmethod
+    def from_session(cls, db, version: Optional[str] = None) -> "EmissionsStore":
+        """Read the companies and their years with two queries
+
+        Args:
+            db (Session): SQLAlchemy session
+            version (str, optional): Dataset version being read. Defaults to None.
+
+        Returns:
+            EmissionsStore: New snapshot
+        """
+        companies = db.query(
+            Company.id,
+            Company.title,
+            Company.description,
+            Company.goals,
+            Company.report_link,
+        ).all()
+        years = (
+            db.query(
+                CompanyYear.company_id,
+                Year.id,
+                Year.year,
+                Year.scope1_2,
+                Year.scope1_2_3,
+            )
+            .join(Year, Year.id == CompanyYear.year_id)
+            .all()
+        )
+        return cls(companies, years, version)
+
+    def _year(self, row: int, col: int) -> models.Year:
+        return models.Year(
+            id=int(self.year_ids[row, col]),
+            year=int(self.years[col]),
+            scope1_2=_value(self.scope1_2[row, col]),
+            scope1_2_3=_value(self.scope1_2_3[row, col]),
+        )
+
+    def _column(self, year: int) -> Optional[int]:
+        col = int(np.searchsorted(self.years, year))
+        if col < len(self.years) and self.years[col] == year:
+            return col
+        return None
+
+    def get_company(self, company_name: str) -> Optional[models.Company]:
+        """See crud.get_company"""
+        row = self.rows.get(company_name)
+        return None if row is None else self.companies[row]
+
+    def get_company_year(
+        self, company_name: str, year: int
+    ) -> Optional[models.Year]:
+        """See crud.get_company_year"""
+        row, col = self.rows.get(company_name), self._column(year)
+        if row is None or col is None or not self.present[row, col]:
+            return None
+        return self._year(row, col)
+
+    def get_company_year_pair(
+        self, company_name: str, start: int, end: int
+    ) -> list[models.Year]:
+        """See crud.get_company_year_pair"""
+        years = (
+            self.get_company_year(company_name, year) for year in sorted({start, end})
+        )
+        return [year for year in years if year is not None]
+
+    def get_company_years(self, company_name: str) -> Optional[list[models.Year]]:
+        """See crud.get_company_years"""
+        row = self.rows.get(company_name)
+        if row is None:
+            return None
+        return [self._year(row, col) for col in np.flatnonzero(self.present[row])]
+
+    def get_company_series(
+        self,
+        company_name: str,
+        scope: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> Optional[list[tuple]]:
+        """See crud.get_company_series"""
+        row = self.rows.get(company_name)
+        if row is None:
+            return None
+        keep = self.present[row].copy()
+        if start is not None:
+            keep &= self.years >= start
+        if end is not None:
+            keep &= self.years <= end
+        values = getattr(self, scope)[row]
+        return [
+            (int(self.years[col]), _value(values[col])) for col in np.flatnonzero(keep)
+        ]
+
+    def get_company_year_rows(self, company_name: str) -> Optional[list[dict]]:
+        """See crud.get_company_year_rows"""
+        years = self.get_company_years(company_name)
+        return None if years is None else [year.dict() for year in years]
+
+    def get_emission_rows(
+        self, year: int, limit: int = 100
+    ) -> Optional[list[dict]]:
+        """See crud.get_emission_rows"""
+        years = self.get_emissions(year, limit)
+        return None if years is None else [row.dict() for row in years]
+
+    def get_emissions(
+        self, year: int, limit: int = 100
+    ) -> Optional[list[models.Year]]:
+        """See crud.get_emissions"""
+        col = self._column(year)
+        if col is None:
+            return None
+        rows = np.flatnonzero(self.present[:, col])[:limit]
+        return [self._year(row, col) for row in rows] or None
+
+    def get_year_summary(self, year: int) -> Optional[models.YearSummary]:
+        """See crud.get_year_summary"""
+        col = self._column(year)
+        if col is None or not self.present[:, col].any():
+            return None
+        scope1_2, scope1_2_3 = self.scope1_2[:, col], self.scope1_2_3[:, col]
+        # A company's total is scope 1+2+3 where reported, else scope 1+2
+        total = np.where(np.isnan(scope1_2_3), scope1_2, scope1_2_3)
+        return models.YearSummary(
+            year=year,
+            companies=int(self.present[:, col].sum()),
+            total=float(np.nansum(total)),
+            scope1_2=float(np.nansum(scope1_2)),
+            scope3=float(np.nansum(scope1_2_3 - scope1_2)),
+        )
+
+    def get_changes(
+        self, scope: str, start: Optional[int] = None, end: Optional[int] = None
+    ) -> list[tuple]:
+        """See crud.get_changes"""
+        if start is None or end is None:
+            columns = self.summary_columns
+            if not columns:
+                return []
+            first_year = columns[f"{scope}_first_year"]
+            first = columns[f"{scope}_first"]
+            last_year = columns[f"{scope}_last_year"]
+            last = columns[f"{scope}_last"]
+            keep = columns["year_count"] >= 2
+        else:
+            first_col, last_col = self._column(start), self._column(end)
+            if first_col is None or last_col is None:
+                return []
+            values = getattr(self, scope)
+            first, last = values[:, first_col], values[:, last_col]
+            first_year = np.full(len(self.companies), start)
+            last_year = np.full(len(self.companies), end)
+            keep = np.ones(len(self.companies), dtype=bool)
+        keep &= ~np.isnan(first) & ~np.isnan(last)
+        return [
+            (
+                self.companies[row].id,
+                self.companies[row].title,
+                int(first_year[row]),
+                float(first[row]),
+                int(last_year[row]),
+                float(last[row]),
+            )
+            for row in np.flatnonzero(keep)
+        ]
+
+    def summaries(self) -> dict:
+        """First and last reported values of every company, per scope, computed
+        for all companies at once like populate_db/refresh_summaries.py does row
+        by row
+
+        Returns:
+            dict: Column name of CompanySummary to an array with one value per
+                company, NaN where there is nothing to report
+        """
+        columns = {"year_count": self.present.sum(axis=1)}
+        last_col = len(self.years) - 1
+        rows = np.arange(len(self.companies))
+        for scope in SCOPES:
+            values = getattr(self, scope)
+            reported = ~np.isnan(values)
+            has_any = reported.any(axis=1)
+            first_col = reported.argmax(axis=1)
+            last = last_col - reported[:, ::-1].argmax(axis=1)
+            first_value = np.where(has_any, values[rows, first_col], np.nan)
+            last_value = np.where(has_any, values[rows, last], np.nan)
+            change = last_value - first_value
+            with np.errstate(divide="ignore", invalid="ignore"):
+                percent = np.where(
+                    first_value != 0, 100 * change / first_value, np.nan
+                )
+            first_year = np.where(has_any, self.years[first_col], -1)
+            columns[f"{scope}_first_year"] = first_year
+            columns[f"{scope}_first"] = first_value
+            columns[f"{scope}_last_year"] = np.where(has_any, self.years[last], -1)
+            columns[f"{scope}_last"] = last_value
+            columns[f"{scope}_change"] = change
+            columns[f"{scope}_percent_change"] = percent
+        return columns
+
+    def get_company_summary(
+        self, company_name: str
+    ) -> Optional[models.CompanySummary]:
+        """See crud.get_company_summary"""
+        row = self.rows.get(company_name)
+        if row is None or not self.present[row].any():
+            return None
+        fields = {"company_id": self.companies[row].id}
+        for name, values in self.summary_columns.items():
+            value = values[row]
+            if name.endswith("_year") or name == "year_count":
+                fields[name] = None if value < 0 else int(value)
+            else:
+                fields[name] = _value(value)
+        return models.CompanySummary(**fields)
+
+
+_store: Optional[EmissionsStore] = None
+_build_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    """Whether reads should be served from the in-memory store"""
+    return settings.memory_store and np is not None
+
+
+def build_store(db) -> EmissionsStore:
+    """Load a new snapshot and swap it in, unless one was already loaded for
+    the current dataset version
+
+    While another request is loading one, the previous snapshot keeps being
+    served: waiting for that request would stall the event loop in async
+    mode, where both run in greenlets on its thread.
+
+    Args:
+        db (Session): SQLAlchemy session
+
+    Returns:
+        EmissionsStore: Snapshot to read from
+    """
+    global _store  # pylint: disable=global-statement
+    version = dataset_version(db)
+    if not _build_lock.acquire(blocking=False):
+        store = _store
+        if store is not None:
+            return store
+        return EmissionsStore.from_session(db, version)
+    try:
+        if _store is None or _store.version != version:
+            _store = EmissionsStore.from_session(db, version)
+        return _store
+    finally:
+        _build_lock.release()
+
+
+def get_store(db) -> Optional[EmissionsStore]:
+    """Current snapshot, reloaded first if the dataset changed since
+
+    Args:
+        db (Session): SQLAlchemy session, only used to reload
+
+    Returns:
+        EmissionsStore: Snapshot to read from, None if the store is disabled
+    """
+    if not enabled():
+        return None
+    store = _store
+    if store is not None and store.version == dataset_version(db):
+        return store
+    return build_store(db)
+
+
+def served(fn):
+    """Answer a crud read from the store method of the same name when the
+    store is enabled, otherwise from the database
+
+    Args:
+        fn (Callable): crud function taking a Session first
+
+    Returns:
+        Callable: Function with the same arguments
+    """
+
+    @functools.wraps(fn)
+    def wrapper(db, *args, **kwargs):
+        store = get_store(db)
+        if store is None:
+            return fn(db, *args, **kwargs)
+        return getattr(store, fn.__name__)(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,322 @@
+"""Request and query instrumentation exposed in the Prometheus text format
+
+MetricsMiddleware times every request and, through engine events, every
+statement it sends to the database. Statements are tagged with the crud
+function running them, which the async_crud wrappers set in a context
+variable, so a slow route can be split into time spent in each query and
+everything else (ORM hydration, validation and encoding). Total and database
+time are sent back in a Server-Timing header, with an entry per crud
+function only when METRICS_FUNCTION_TIMING is set, and the running totals
+are served by /metrics.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+# Upper bounds in seconds, the defaults of the Prometheus client libraries
+BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0
+)
+# Route label for requests that matched no route, so 404 scans stay one series
+UNMATCHED = "unmatched"
+# Function label for statements issued outside a tagged crud function
+OTHER = "other"
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values"""
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Add one value
+
+        Args:
+            value (float): Observed value, in seconds
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        """Prometheus sample lines of this histogram
+
+        Args:
+            name (str): Metric name
+            labels (str): Rendered labels without braces, e.g. 'route="/year"'
+
+        Returns:
+            list[str]: _bucket, _sum and _count samples
+        """
+        lines = []
+        cumulative = 0
+        bounds = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        for bound, count in zip(bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum!r}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class RequestTimings:
+    """Statements one request sent to the database, by crud function
+
+    Statements of one request can run on a thread pool, so additions are
+    locked.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.functions = {}
+
+    def record(self, function: str, seconds: float) -> None:
+        """Add one statement
+
+        Args:
+            function (str): crud function that issued it
+            seconds (float): Time the statement took
+        """
+        with self._lock:
+            count, total = self.functions.get(function, (0, 0.0))
+            self.functions[function] = (count + 1, total + seconds)
+
+    @property
+    def queries(self) -> int:
+        """Number of statements"""
+        return sum(count for count, _ in self.functions.values())
+
+    @property
+    def db_seconds(self) -> float:
+        """Time spent in every statement"""
+        return sum(total for _, total in self.functions.values())
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+_function: ContextVar[str] = ContextVar("crud_function", default=OTHER)
+
+
+def _escape(value) -> str:
+    """Escape a label value for the text format"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    """Render labels without the surrounding braces"""
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class Registry:
+    """Totals of every finished request, per route"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.latency = {}
+        self.query_counts = {}
+        self.query_latency = {}
+
+    def record(
+        self,
+        route: str,
+        method: str,
+        status: int,
+        seconds: float,
+        timings: RequestTimings,
+    ) -> None:
+        """Add a finished request
+
+        Args:
+            route (str): Route path template, e.g. /companies/{company}
+            method (str): HTTP method
+            status (int): Response status code
+            seconds (float): Time until the whole response was sent
+            timings (RequestTimings): Statements the request executed
+        """
+        with self._lock:
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault((route, method), Histogram()).observe(seconds)
+            for function, (count, total) in timings.functions.items():
+                key = (route, function)
+                self.query_counts[key] = self.query_counts.get(key, 0) + count
+                self.query_latency.setdefault(key, Histogram()).observe(total)
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text
+        """
+        lines = [
+            "# HELP climate_api_requests_total Requests handled",
+            "# TYPE climate_api_requests_total counter",
+        ]
+        with self._lock:
+            for (route, method, status), count in sorted(self.requests.items()):
+                labels = _labels(route=route, method=method, status=status)
+                lines.append(f"climate_api_requests_total{{{labels}}} {count}")
+            lines += [
+                "# HELP climate_api_request_duration_seconds Request latency",
+                "# TYPE climate_api_request_duration_seconds histogram",
+            ]
+            for (route, method), histogram in sorted(self.latency.items()):
+                lines += histogram.lines(
+                    "climate_api_request_duration_seconds",
+                    _labels(route=route, method=method),
+                )
+            lines += [
+                "# HELP climate_api_db_queries_total Statements sent to the"
+                " database, by route and crud function",
+                "# TYPE climate_api_db_queries_total counter",
+            ]
+            for (route, function), count in sorted(self.query_counts.items()):
+                labels = _labels(route=route, function=function)
+                lines.append(f"climate_api_db_queries_total{{{labels}}} {count}")
+            lines += [
+                "# HELP climate_api_db_duration_seconds Database time per request,"
+                " by route and crud function",
+                "# TYPE climate_api_db_duration_seconds histogram",
+            ]
+            for (route, function), histogram in sorted(self.query_latency.items()):
+                lines += histogram.lines(
+                    "climate_api_db_duration_seconds",
+                    _labels(route=route, function=function),
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+@contextmanager
+def tagged(function: str):
+    """Attribute the statements executed inside the block to a crud function
+
+    The previous name is restored by value rather than with a token, so the
+    block may span the yields of an async generator closed from another task.
+
+    Args:
+        function (str): crud function name
+    """
+    previous = _function.get()
+    _function.set(function)
+    try:
+        yield
+    finally:
+        _function.set(previous)
+
+
+def listen_queries(engine) -> None:
+    """Time every statement an engine executes for the current request
+
+    Args:
+        engine (Engine): Synchronous engine, or the sync_engine of an async one
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        # pylint: disable=unused-argument,too-many-arguments
+        if _current.get() is not None:
+            conn.info.setdefault("query_start", []).append(
+                (time.perf_counter(), _function.get())
+            )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        # pylint: disable=unused-argument,too-many-arguments
+        timings = _current.get()
+        starts = conn.info.get("query_start")
+        if timings is not None and starts:
+            start, function = starts.pop()
+            timings.record(function, time.perf_counter() - start)
+
+
+def server_timing(
+    timings: RequestTimings, seconds: float, functions: bool = False
+) -> str:
+    """Server-Timing header value for one request
+
+    Args:
+        timings (RequestTimings): Statements the request executed
+        seconds (float): Time until the response started
+        functions (bool, optional): Add an entry per crud function, which
+            exposes internal names to clients. Defaults to False.
+
+    Returns:
+        str: total, db and optionally per crud function entries, durations in
+            milliseconds
+    """
+    entries = [
+        f"total;dur={1000 * seconds:.2f}",
+        f'db;dur={1000 * timings.db_seconds:.2f};desc="{timings.queries} queries"',
+    ]
+    if functions:
+        for function, (count, total) in sorted(timings.functions.items()):
+            entries.append(
+                f'{function};dur={1000 * total:.2f};desc="{count} queries"'
+            )
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and database time of every request
+
+    Args:
+        app (ASGIApp): Application to wrap
+        registry (Registry, optional): Where totals are recorded. Defaults to
+            the module registry served by /metrics.
+        function_timing (bool, optional): Break the Server-Timing header down
+            by crud function. Defaults to False.
+    """
+
+    def __init__(
+        self, app, registry: Registry = registry, function_timing: bool = False
+    ):
+        # pylint: disable=redefined-outer-name
+        self.app = app
+        self.registry = registry
+        self.function_timing = function_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - start
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append(
+                    "Server-Timing",
+                    server_timing(timings, elapsed, self.function_timing),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            # Streamed responses count until their last chunk was sent
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", UNMATCHED)
+            self.registry.record(route, scope["method"], status, elapsed, timings)
@@ -2,6 +2,9 @@
 from typing import Optional
 from pydantic import BaseModel
 
+from .Goal import Goal
+from .Year import Year
+
 
 class Company(BaseModel):
     """Company model for the API"""
@@ -13,6 +16,14 @@ class Company(BaseModel):
     report_link: Optional[str] = None
 
     class Config:
-        """Pydantic ORM mode"""
+        """Pydantic ORM mode, spelled for both pydantic 1 and 2"""
 
         orm_mode = True
+        from_attributes = True
+
+
+class CompanyDetail(Company):
+    """Company with the relationships requested through include"""
+
+    years: Optional[list[Year]] = None
+    goal: Optional[Goal] = None
@@ -0,0 +1,48 @@
+"""CompanyBatch pydantic models"""
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel
+
+from .Company import Company
+from .Goal import Goal
+from .Year import Year
+
+
+class BatchField(str, Enum):
+    """Fields the batch and profile endpoints can add to each company"""
+
+    YEARS = "years"
+    GOAL = "goal"
+    CHANGE = "change"
+
+
+class CompanyBatchRequest(BaseModel):
+    """Companies to look up in one request and the fields to return for each"""
+
+    companies: list[str]
+    fields: list[BatchField] = []
+
+
+class CompanyChange(BaseModel):
+    """Change in emissions from the oldest to the most recent reported year,
+    None where the matching change endpoint would return 404"""
+
+    change_1_2: Optional[float] = None
+    percent_change_1_2: Optional[float] = None
+    change_1_2_3: Optional[float] = None
+    percent_change_1_2_3: Optional[float] = None
+
+
+class CompanyBatchEntry(Company):
+    """Company with the fields requested through the batch endpoint"""
+
+    years: Optional[list[Year]] = None
+    goal: Optional[Goal] = None
+    change: Optional[CompanyChange] = None
+
+
+class CompanyBatch(BaseModel):
+    """Batch response keyed by company name"""
+
+    companies: dict[str, CompanyBatchEntry]
+    not_found: list[str]
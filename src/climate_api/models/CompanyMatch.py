@@ -0,0 +1,10 @@
+"""CompanyMatch pydantic model"""
+from pydantic import BaseModel
+
+
+class CompanyMatch(BaseModel):
+    """Company found by a name search"""
+
+    id: int
+    title: str
+    score: float
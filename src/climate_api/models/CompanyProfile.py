@@ -0,0 +1,7 @@
+"""CompanyProfile pydantic model"""
+from .CompanyBatch import CompanyBatchEntry
+
+
+class CompanyProfile(CompanyBatchEntry):
+    """Company with every field a company page needs, minus those left out
+    through the fields parameter"""
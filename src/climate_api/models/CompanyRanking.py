@@ -0,0 +1,15 @@
+"""CompanyRanking pydantic model"""
+from pydantic import BaseModel
+
+
+class CompanyRanking(BaseModel):
+    """Change in emissions of one company on a leaderboard"""
+
+    rank: int
+    id: int
+    title: str
+    first_year: int
+    first: float
+    last_year: int
+    last: float
+    change: float
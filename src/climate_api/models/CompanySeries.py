@@ -0,0 +1,16 @@
+"""CompanySeries pydantic model"""
+from typing import Optional
+from pydantic import BaseModel
+
+
+class CompanySeries(BaseModel):
+    """One scope of a company's emissions with a value for every year of a
+    range, as parallel arrays"""
+
+    title: str
+    scope: str
+    fill: str
+    years: list[int]
+    values: list[Optional[float]]
+    # True where the value was filled in rather than reported
+    filled: list[bool]
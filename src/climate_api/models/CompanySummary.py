@@ -0,0 +1,28 @@
+"""CompanySummary model"""
+from typing import Optional
+from pydantic import BaseModel
+
+
+class CompanySummary(BaseModel):
+    """First and last reported emissions of a company, per scope"""
+
+    company_id: int
+    year_count: int
+    scope1_2_first_year: Optional[int] = None
+    scope1_2_first: Optional[float] = None
+    scope1_2_last_year: Optional[int] = None
+    scope1_2_last: Optional[float] = None
+    scope1_2_change: Optional[float] = None
+    scope1_2_percent_change: Optional[float] = None
+    scope1_2_3_first_year: Optional[int] = None
+    scope1_2_3_first: Optional[float] = None
+    scope1_2_3_last_year: Optional[int] = None
+    scope1_2_3_last: Optional[float] = None
+    scope1_2_3_change: Optional[float] = None
+    scope1_2_3_percent_change: Optional[float] = None
+
+    class Config:
+        """Pydantic ORM mode, spelled for both pydantic 1 and 2"""
+
+        orm_mode = True
+        from_attributes = True
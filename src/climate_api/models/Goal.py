@@ -14,6 +14,7 @@ class Goal(BaseModel):
     reference_year: Optional[int] = None
 
     class Config:
-        """Pydantic ORM mode"""
+        """Pydantic ORM mode, spelled for both pydantic 1 and 2"""
 
         orm_mode = True
+        from_attributes = True
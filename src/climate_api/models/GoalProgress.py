@@ -0,0 +1,36 @@
+"""GoalProgress pydantic models"""
+from typing import Optional
+from pydantic import BaseModel
+
+
+class ScopeProgress(BaseModel):
+    """Progress towards the reduction goal for one scope
+
+    Percentages are reductions relative to the reference year, so positive
+    means emissions went down. Fields that can't be worked out from the
+    reported years are None.
+    """
+
+    target_year: Optional[int] = None
+    required_percent: Optional[float] = None
+    reference: Optional[float] = None
+    latest_year: Optional[int] = None
+    latest: Optional[float] = None
+    achieved_percent: Optional[float] = None
+    # Reduction a straight line from the reference year to the target would
+    # have reached by latest_year
+    expected_percent: Optional[float] = None
+    # Reduction by the target year if the trend since the reference year holds
+    projected_percent: Optional[float] = None
+    on_track: Optional[bool] = None
+
+
+class GoalProgress(BaseModel):
+    """Progress of one company towards its goals"""
+
+    company_id: int
+    title: str
+    goal_id: int
+    reference_year: Optional[int] = None
+    scope1_2: ScopeProgress
+    scope1_2_3: ScopeProgress
@@ -12,6 +12,7 @@ class Year(BaseModel):
     scope1_2_3: Optional[float] = None
 
     class Config:
-        """Pydantic ORM mode"""
+        """Pydantic ORM mode, spelled for both pydantic 1 and 2"""
 
         orm_mode = True
+        from_attributes = True
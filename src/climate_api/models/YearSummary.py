@@ -0,0 +1,12 @@
+"""YearSummary model"""
+from pydantic import BaseModel
+
+
+class YearSummary(BaseModel):
+    """Emission totals across every company for one year"""
+
+    year: int
+    companies: int
+    total: float
+    scope1_2: float
+    scope3: float
@@ -1,3 +1,17 @@
-from .Company import Company
+from .Company import Company, CompanyDetail
 from .Year import Year
 from .Goal import Goal
+from .YearSummary import YearSummary
+from .CompanySummary import CompanySummary
+from .CompanyMatch import CompanyMatch
+from .CompanyRanking import CompanyRanking
+from .GoalProgress import GoalProgress, ScopeProgress
+from .CompanyBatch import (
+    BatchField,
+    CompanyBatch,
+    CompanyBatchEntry,
+    CompanyBatchRequest,
+    CompanyChange,
+)
+from .CompanyProfile import CompanyProfile
+from .CompanySeries import CompanySeries
@@ -0,0 +1,70 @@
+"""Opaque cursors for keyset pagination
+
+A cursor records the key of the last row of a page, so the next page starts
+with WHERE key > :after on an indexed column instead of OFFSET, which has to
+scan and discard every earlier row. Each cursor is tagged with the listing it
+came from so it can't be replayed against a different endpoint.
+"""
+
+import base64
+import binascii
+import json
+
+
+def encode_cursor(listing: str, after: int) -> str:
+    """Encode the key of the last row returned as an opaque token
+
+    Args:
+        listing (str): Name of the listing the cursor belongs to, e.g. "companies"
+        after (int): Key of the last row on the page
+
+    Returns:
+        str: URL safe cursor
+    """
+    payload = json.dumps({"listing": listing, "after": after}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(listing: str, cursor: str) -> int:
+    """Decode a cursor produced by encode_cursor
+
+    Args:
+        listing (str): Listing the cursor must belong to
+        cursor (str): Cursor from a previous page
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another listing
+
+    Returns:
+        int: Key of the last row of the previous page
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        after = payload["after"]
+        if payload["listing"] != listing or not isinstance(after, int):
+            raise ValueError
+    except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, ValueError):
+        raise ValueError(f"Invalid cursor for {listing}") from None
+    return after
+
+
+def next_cursor(listing: str, rows: list, limit: int, key: str = "id"):
+    """Cursor for the page after rows, if there may be one
+
+    Args:
+        listing (str): Name of the listing
+        rows (list): Rows on the current page, ordered by key, as objects or dicts
+        limit (int): Page size that was requested
+        key (str, optional): Attribute or item holding each row's key. Defaults
+            to "id".
+
+    Returns:
+        str: Cursor for the next page, None when this page was the last
+    """
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(
+        listing, last[key] if isinstance(last, dict) else getattr(last, key)
+    )
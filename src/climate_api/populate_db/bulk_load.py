@@ -0,0 +1,206 @@
+"""Load the emissions workbook with vectorized pandas reshaping and bulk inserts
+
+Produces the same rows and ids as populate_emissions followed by
+populate_goals, but reshapes each sheet once with melt/merge and writes every
+table in a single transaction, using COPY on Postgres.
+"""
+import io
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import delete
+
+from ..cache import invalidate
+from ..internal.Company import Company
+from ..internal.CompanySummary import CompanySummary
+from ..internal.CompanyYear import CompanyYear
+from ..internal.Goal import Goal
+from ..internal.Year import Year
+from .refresh_summaries import refresh_summaries
+
+# populate_emissions numbers 19 years per company but never loads 2007
+FIRST_YEAR = 2005
+YEARS_PER_COMPANY = 19
+YEARS = [year for year in range(2005, 2024) if year != 2007]
+
+GOAL_COLUMNS = {
+    "Scope 1,2 Year": "scope12_target_year",
+    "Scope 1,2 Goal": "scope12_percent_decrease",
+    "Scope 1,2,3 Year": "scope3_target_year",
+    "Scope 1,2,3 Goal": "scope3_percent_decrease",
+    "Reference Year": "reference_year",
+}
+# Integer columns that pandas reads as float whenever a cell is empty
+GOAL_YEAR_COLUMNS = ["scope12_target_year", "scope3_target_year", "reference_year"]
+
+
+def _melt_scope(merged: pd.DataFrame, suffix: str, column: str) -> pd.DataFrame:
+    """Melt one scope's year columns into one row per company and year
+
+    Args:
+        merged (pd.DataFrame): Both scope sheets merged, with a company_id column
+        suffix (str): "_x" for scope 1+2 or "_y" for scope 1+2+3
+        column (str): Name for the emissions column
+
+    Returns:
+        pd.DataFrame: company_id, year and column
+    """
+    long = merged.melt(
+        id_vars="company_id",
+        value_vars=[f"{year}{suffix}" for year in YEARS],
+        var_name="year",
+        value_name=column,
+    )
+    long["year"] = long["year"].str[: -len(suffix)].astype(int)
+    return long
+
+
+def _nullable(frame: pd.DataFrame) -> pd.DataFrame:
+    """Replace every NaN with None so it is written as NULL"""
+    return frame.astype(object).where(frame.notna(), None)
+
+
+def prepare(
+    scope12: pd.DataFrame, scope123: pd.DataFrame, goals: pd.DataFrame
+) -> dict:
+    """Reshape the workbook sheets into rows for every table
+
+    Args:
+        scope12 (pd.DataFrame): Scope_1_2_Data sheet
+        scope123 (pd.DataFrame): Scope_1_2_3_Data sheet
+        goals (pd.DataFrame): Goals sheet
+
+    Returns:
+        dict: Table name to a DataFrame of its rows, in insert order
+    """
+    # Same outer merge as populate_emissions, so companies get the same ids
+    merged = scope12.assign(
+        **{"Company Name": scope12["Company Name"].str.replace("1+2", "", regex=False)}
+    ).merge(
+        scope123.assign(
+            **{
+                "Company Name": scope123["Company Name"].str.replace(
+                    "1+2+3", "", regex=False
+                )
+            }
+        ),
+        on="Company Name",
+        how="outer",
+    )
+    merged["company_id"] = range(1, len(merged) + 1)
+
+    years = _melt_scope(merged, "_x", "scope1_2").merge(
+        _melt_scope(merged, "_y", "scope1_2_3"), on=["company_id", "year"]
+    )
+    years["id"] = (years["company_id"] - 1) * YEARS_PER_COMPANY + (
+        years["year"] - FIRST_YEAR + 2
+    )
+    years = years.sort_values("id")
+
+    goal_rows = goals.rename(columns=GOAL_COLUMNS).reset_index(drop=True)
+    goal_rows["id"] = range(1, len(goal_rows) + 1)
+    goal_rows[GOAL_YEAR_COLUMNS] = goal_rows[GOAL_YEAR_COLUMNS].astype("Int64")
+    # A later goal for the same company replaces an earlier one, as in populate_goals
+    links = goal_rows.drop_duplicates("Company Name", keep="last")[
+        ["Company Name", "id", "Link"]
+    ].rename(columns={"Company Name": "title", "id": "goals", "Link": "report_link"})
+
+    companies = merged[["company_id", "Company Name"]].rename(
+        columns={"company_id": "id"}
+    )
+    companies["title"] = companies["Company Name"].str.strip()
+    companies["description"] = None
+    companies = companies.merge(links, on="title", how="left")
+    companies["goals"] = companies["goals"].astype("Int64")
+
+    return {
+        "goals": _nullable(goal_rows[["id", *GOAL_COLUMNS.values()]]),
+        "companies": _nullable(
+            companies[["id", "title", "description", "goals", "report_link"]]
+        ),
+        "years": _nullable(years[["id", "year", "scope1_2", "scope1_2_3"]]),
+        "company_years": years[["company_id", "id"]]
+        .rename(columns={"id": "year_id"})
+        .astype(object),
+    }
+
+
+def _copy(session, table, frame: pd.DataFrame) -> None:
+    """Stream a DataFrame into a Postgres table with COPY
+
+    Args:
+        session (Session): Session whose transaction the copy joins
+        table (Table): Destination table
+        frame (pd.DataFrame): Rows with the table's column names
+    """
+    buffer = io.StringIO()
+    # Unquoted empty CSV fields are read as NULL
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    columns = ", ".join(frame.columns)
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def bulk_load(
+    scope12: pd.DataFrame,
+    scope123: pd.DataFrame,
+    goals: pd.DataFrame,
+    session,
+    replace: bool = False,
+    use_copy: Optional[bool] = None,
+) -> dict:
+    """Load every table from the workbook sheets in one transaction
+
+    Args:
+        scope12 (pd.DataFrame): Scope_1_2_Data sheet
+        scope123 (pd.DataFrame): Scope_1_2_3_Data sheet
+        goals (pd.DataFrame): Goals sheet
+        session (Session): Database session
+        replace (bool, optional): Delete the existing data first. Defaults to False.
+        use_copy (bool, optional): Write with COPY instead of multi-row INSERTs.
+            Defaults to True on Postgres with psycopg2.
+
+    Returns:
+        dict: Table name to number of rows written
+    """
+    tables = prepare(scope12, scope123, goals)
+    if use_copy is None:
+        use_copy = session.get_bind().dialect.driver == "psycopg2"
+    try:
+        if replace:
+            for model in (CompanySummary, CompanyYear, Company, Year, Goal):
+                session.execute(delete(model.__table__))
+        for model in (Goal, Company, Year, CompanyYear):
+            frame = tables[model.__tablename__]
+            if frame.empty:
+                continue
+            if use_copy:
+                _copy(session, model.__table__, frame)
+            else:
+                session.execute(
+                    model.__table__.insert(), frame.to_dict(orient="records")
+                )
+        # Also bumps the dataset_version row in this transaction
+        refresh_summaries(session, commit=False)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    invalidate()
+    return {name: len(frame) for name, frame in tables.items()}
+
+
+if __name__ == "__main__":
+    # pylint: disable=import-outside-toplevel
+    import sys
+
+    from climate_api.populate_db.populate_db import get_db, read_csv
+
+    _, csv_goals, csv_scope12, csv_scope123 = read_csv(sys.argv[1])
+    print(bulk_load(csv_scope12, csv_scope123, csv_goals, get_db(), replace=True))
@@ -1,6 +1,7 @@
 """Fix an error with the goals column in the companies table"""
+from climate_api.cache import invalidate, record_load
 from climate_api.internal.Company import Company
-from climate_api.populate_db.populate_db import connect_to_db
+from climate_api.populate_db.populate_db import get_db
 
 
 # Every row in the companies table has a goals column that is a foreign key to the goals table
@@ -19,9 +20,11 @@ def fix_goals(session):
             company.goals = company.goals - 1
             # Update the company in the companies table
             session.add(company)
+    record_load(session)
     session.commit()
+    invalidate()
 
 
 if __name__ == "__main__":
-    db = connect_to_db()
+    db = get_db()
     fix_goals(db)
@@ -1,17 +1,17 @@
 """Populate postgres database with data from a local excel file"""
 
 # Read in a csv file from a given path and return each page as a pandas dataframe
-import os
 import sys
 
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
 
 from climate_api.internal.Year import Year
 from climate_api.internal.Goal import Goal
 from climate_api.internal.Company import Company
-from climate_api.database import SessionLocal
+from climate_api.cache import invalidate, record_load
+from climate_api.database import SessionLocal, get_engine
+from climate_api.populate_db.refresh_summaries import refresh_summaries
 
 # import os.path
 sys.path.append("S:\PycharmProjects\climate-api\src\climate_api")
@@ -53,17 +53,12 @@ def read_csv(path: str) -> pd.DataFrame:
 #    return session
 def get_db():
     """
-    Get a database connection and close it after use
-    """
-    database_url = os.environ.get("HEROKU_DATABASE_URL")
-    database_url = database_url.replace("postgres://", "postgresql://", 1)
-    if not database_url:
-        print("HEROKU_DATABASE_URL environment variable is not set.")
+    Get a session on the shared, lazily created engine
 
-    engine = create_engine(
-        database_url,
-    )
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Raises:
+        ValueError: If HEROKU_DATABASE_URL is not set
+    """
+    get_engine()
     db = SessionLocal()
     return db
 
@@ -101,7 +96,9 @@ def populate_goals(goals: pd.DataFrame, session) -> None:
         company.report_link = report_link
         goal_id += 1
 
+    record_load(session)
     session.commit()
+    invalidate()
 
 
 # For each row in the emissions_data make a Year object and add it to the emissions dictionary
@@ -149,7 +146,10 @@ def populate_emissions(scope12: pd.DataFrame, scope123: pd.DataFrame, session) -
         # Add to companies_years table an entry with the company id and the year id
         for year in emissions:
             session.execute(
-                "INSERT INTO company_years (company_id, year_id) VALUES (:company_id, :year_id)",
+                text(
+                    "INSERT INTO company_years (company_id, year_id) "
+                    "VALUES (:company_id, :year_id)"
+                ),
                 {"company_id": company.id, "year_id": emissions[year].id},
             )
 
@@ -157,6 +157,8 @@ def populate_emissions(scope12: pd.DataFrame, scope123: pd.DataFrame, session) -
         print(company)
 
     session.commit()
+    # Also records the load and invalidates the cache
+    refresh_summaries(session)
 
 
 if __name__ == "__main__":
@@ -169,5 +171,7 @@ if __name__ == "__main__":
     
     #populate_emissions(csv_scope12, csv_scope123, db_session)
     #populate_goals(csv_goals, db_session)
+    # Or load everything in one transaction, see bulk_load.py
+    #bulk_load(csv_scope12, csv_scope123, csv_goals, db_session, replace=True)
     #db_session.execute("UPDATE years SET scope1_2 = NULL, scope1_2_3 = NULL WHERE scope1_2 = 'NaN' OR scope1_2_3 = 'NaN';")
     #db_session.commit()
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""Rebuild the company_summaries table from the years table"""
+from itertools import groupby
+from operator import itemgetter
+
+from ..cache import invalidate, record_load
+from ..internal.CompanySummary import CompanySummary
+from ..internal.CompanyYear import CompanyYear
+from ..internal.Year import Year
+
+SCOPES = ("scope1_2", "scope1_2_3")
+
+
+def summarize(company_id: int, rows: list) -> dict:
+    """Summarize one company's years
+
+    Args:
+        company_id (int): Company the rows belong to
+        rows (list): (year, scope1_2, scope1_2_3) tuples ordered by year
+
+    Returns:
+        dict: Column values for a CompanySummary row
+    """
+    summary = {"company_id": company_id, "year_count": len(rows)}
+    for index, scope in enumerate(SCOPES, start=1):
+        # NaN cells from the workbook count as missing, like NULL
+        reported = [
+            (row[0], row[index])
+            for row in rows
+            if row[index] is not None and row[index] == row[index]
+        ]
+        first_year, first = reported[0] if reported else (None, None)
+        last_year, last = reported[-1] if reported else (None, None)
+        change, percent_change = None, None
+        if reported:
+            change = last - first
+            percent_change = 100 * change / first if first else None
+        summary.update(
+            {
+                f"{scope}_first_year": first_year,
+                f"{scope}_first": first,
+                f"{scope}_last_year": last_year,
+                f"{scope}_last": last,
+                f"{scope}_change": change,
+                f"{scope}_percent_change": percent_change,
+            }
+        )
+    return summary
+
+
+def refresh_summaries(session, commit: bool = True) -> int:
+    """Replace every row of company_summaries in one transaction
+
+    The load is recorded in the dataset_version row of the same transaction,
+    so API processes see the new summaries and the data they were built from
+    at the same time.
+
+    Args:
+        session (sqlalchemy.orm.session.Session): Database session
+        commit (bool, optional): Commit and invalidate the cache when done. Pass
+            False to leave both to a caller loading data in the same transaction.
+            Defaults to True.
+
+    Returns:
+        int: Number of companies summarized
+    """
+    rows = (
+        session.query(CompanyYear.company_id, Year.year, Year.scope1_2, Year.scope1_2_3)
+        .join(Year, Year.id == CompanyYear.year_id)
+        .order_by(CompanyYear.company_id, Year.year)
+    )
+    summaries = [
+        summarize(company_id, [row[1:] for row in group])
+        for company_id, group in groupby(rows, key=itemgetter(0))
+    ]
+    session.query(CompanySummary).delete()
+    if summaries:
+        session.execute(CompanySummary.__table__.insert(), summaries)
+    record_load(session)
+    if commit:
+        session.commit()
+        invalidate()
+    return len(summaries)
+
+
+if __name__ == "__main__":
+    # pylint: disable=import-outside-toplevel
+    from climate_api.populate_db.populate_db import get_db
+
+    db = get_db()
+    print(f"Summarized {refresh_summaries(db)} companies")
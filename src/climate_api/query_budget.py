@@ -0,0 +1,99 @@
+"""Query budgets: fail when a block of code runs more statements than allowed
+
+N+1 patterns and repeated lookups of the same row come back easily after a
+refactor. A budget records every statement sent while it is active, through
+the before_cursor_execute event, and raises when there were more than the
+maximum, listing the statements that ran more than once:
+
+    with QueryBudget(2):
+        client.get("/companies/Apple/all_years")
+
+The budget listens on every engine by default, so it also counts statements
+made on the thread pool or the test client's event loop. It is meant for
+tests and staging checks, not for concurrent production traffic.
+"""
+
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    """More statements ran than a QueryBudget allows"""
+
+
+class QueryBudget:
+    """Context manager recording statements and enforcing a maximum count
+
+    Args:
+        max_queries (int, optional): Most statements allowed, None to only
+            record them. Defaults to None.
+        engine (Engine, optional): Engine to listen on. Defaults to every engine.
+        label (str, optional): What is being measured, for the error message.
+            Defaults to None.
+    """
+
+    def __init__(
+        self,
+        max_queries: Optional[int] = None,
+        engine=Engine,
+        label: Optional[str] = None,
+    ):
+        self.max_queries = max_queries
+        self.engine = engine
+        self.label = label
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        # pylint: disable=unused-argument,too-many-arguments
+        self.statements.append((statement, parameters))
+
+    def __enter__(self) -> "QueryBudget":
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+        if exc_type is None and self.exceeded:
+            raise QueryBudgetExceeded(self.report())
+
+    @property
+    def count(self) -> int:
+        """Statements recorded so far"""
+        return len(self.statements)
+
+    @property
+    def exceeded(self) -> bool:
+        """Whether more statements ran than max_queries"""
+        return self.max_queries is not None and self.count > self.max_queries
+
+    def duplicates(self) -> dict:
+        """Statements whose SQL ran more than once
+
+        Returns:
+            dict: SQL text to the number of times it ran, most repeated first
+        """
+        counts = Counter(statement for statement, _ in self.statements)
+        return {sql: count for sql, count in counts.most_common() if count > 1}
+
+    def report(self) -> str:
+        """Describe the recorded statements, repeated ones first
+
+        Returns:
+            str: Count against the budget, then each repeated statement with how
+                many times it ran and whether its parameters were identical
+        """
+        target = f" for {self.label}" if self.label else ""
+        budget = "" if self.max_queries is None else f" (budget {self.max_queries})"
+        lines = [f"{self.count} queries{target}{budget}"]
+        exact = Counter(
+            (statement, repr(parameters)) for statement, parameters in self.statements
+        )
+        for sql, count in self.duplicates().items():
+            identical = max(n for (text, _), n in exact.items() if text == sql)
+            note = f", {identical} with identical parameters" if identical > 1 else ""
+            lines.append(f"{count}x{note}: {' '.join(sql.split())}")
+        return "\n".join(lines)
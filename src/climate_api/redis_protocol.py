@@ -0,0 +1,141 @@
+"""Minimal client for the Redis serialization protocol (RESP2)
+
+Only the handful of commands the shared cache needs are used, so this avoids
+a dependency on a full Redis client. Each thread keeps its own connection.
+"""
+
+import socket
+import threading
+from typing import Optional
+from urllib.parse import unquote, urlparse
+
+
+class RedisError(Exception):
+    """Error reply from the server or a broken connection"""
+
+
+class ConnectionClosed(RedisError):
+    """The server closed the connection in the middle of a reply"""
+
+
+def encode_command(*args) -> bytes:
+    """Encode a command as a RESP array of bulk strings
+
+    Args:
+        *args (str | bytes | int | float): Command name and arguments
+
+    Returns:
+        bytes: Command ready to send
+    """
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def read_reply(stream):
+    """Read one RESP reply
+
+    Args:
+        stream (BinaryIO): Buffered reader over the connection
+
+    Raises:
+        ConnectionClosed: If the connection closed before the reply ended
+        RedisError: On an error reply
+
+    Returns:
+        bytes | int | list | None: Decoded reply, simple strings as bytes
+    """
+    line = stream.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionClosed("Connection closed by server")
+    prefix, payload = line[:1], line[1:-2]
+    if prefix == b"+":
+        return payload
+    if prefix == b"-":
+        raise RedisError(payload.decode(errors="replace"))
+    if prefix == b":":
+        return int(payload)
+    if prefix == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionClosed("Connection closed by server")
+        return data[:-2]
+    if prefix == b"*":
+        length = int(payload)
+        if length < 0:
+            return None
+        return [read_reply(stream) for _ in range(length)]
+    raise RedisError(f"Unknown reply type {prefix!r}")
+
+
+class RedisClient:
+    """Blocking RESP client for a redis:// URL
+
+    Args:
+        url (str): redis://[:password@]host[:port][/db]
+        timeout (float, optional): Socket timeout in seconds. Defaults to 1.0.
+    """
+
+    def __init__(self, url: str, timeout: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password: Optional[str] = (
+            unquote(parsed.password) if parsed.password else None
+        )
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock = sock
+        self._local.stream = sock.makefile("rb")
+        try:
+            if self.password:
+                self._send("AUTH", self.password)
+            if self.db:
+                self._send("SELECT", self.db)
+        except RedisError:
+            # Never reuse a connection that is unauthenticated or on database 0
+            self.close()
+            raise
+
+    def _send(self, *args):
+        self._local.sock.sendall(encode_command(*args))
+        return read_reply(self._local.stream)
+
+    def close(self) -> None:
+        """Close this thread's connection, if it has one"""
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            self._local.stream.close()
+            sock.close()
+            self._local.sock = None
+
+    def execute(self, *args):
+        """Send a command and return its reply, reconnecting if needed
+
+        Raises:
+            RedisError: On an error reply or if the server can't be reached
+
+        Returns:
+            bytes | int | list | None: Decoded reply
+        """
+        try:
+            if getattr(self._local, "sock", None) is None:
+                self._connect()
+            return self._send(*args)
+        except ConnectionClosed:
+            self.close()
+            raise
+        except OSError as e:
+            self.close()
+            raise RedisError(str(e)) from e
@@ -0,0 +1,38 @@
+"""JSON responses encoded with orjson when it is installed
+
+Endpoints listing many years or companies read plain dicts from SQLAlchemy
+Core and return them with rows_response, skipping the per row validation and
+jsonable_encoder pass FastAPI runs on a response_model. Their response_model
+stays declared, so the OpenAPI schema does not change.
+"""
+
+from fastapi import Response
+from fastapi.responses import JSONResponse as StandardJSONResponse
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+except ImportError:  # pragma: no cover - orjson is the optional "fast" extra
+    orjson = None
+    ORJSONResponse = None
+
+# Default response class of the app, the orjson encoder when available
+JSONResponse = ORJSONResponse if orjson is not None else StandardJSONResponse
+
+
+def rows_response(rows: list, response: Response) -> Response:
+    """Encode rows directly, keeping the headers dependencies already set
+
+    A Response returned by an endpoint replaces the one FastAPI injects, so
+    headers such as ETag or X-Next-Cursor are copied over.
+
+    Args:
+        rows (list): dicts of JSON compatible values
+        response (Response): Response injected into the endpoint
+
+    Returns:
+        Response: Encoded rows with the injected response's headers
+    """
+    encoded = JSONResponse(rows)
+    encoded.headers.update(response.headers)
+    return encoded
@@ -1,69 +1,352 @@
 """This module contains the FastAPI router for the companies endpoint."""
 
-from fastapi import APIRouter, Depends, HTTPException
+from enum import Enum
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from ..models import Company, Year, Goal
-from .. import crud
-from ..database import SessionLocal
+from ..models import (
+    BatchField,
+    Company,
+    CompanyBatch,
+    CompanyBatchRequest,
+    CompanyChange,
+    CompanyDetail,
+    CompanyMatch,
+    CompanyProfile,
+    CompanySeries,
+    Year,
+    Goal,
+)
+from .. import async_crud, search, series
+from ..http_cache import conditional_get
+from ..pagination import decode_cursor, next_cursor
+from ..responses import rows_response
+from ..database import get_db
+
+# Unchanged GETs are answered with 304 before any other dependency runs
+router = APIRouter(dependencies=[Depends(conditional_get)])
+
+
+class Include(str, Enum):
+    """Company relationships that list endpoints can embed"""
+
+    YEARS = "years"
+    GOAL = "goal"
+
+
+class Scope(str, Enum):
+    """Emissions scopes a series can follow"""
+
+    SCOPE1_2 = "scope1_2"
+    SCOPE1_2_3 = "scope1_2_3"
+
+
+class Fill(str, Enum):
+    """How a series fills the years nothing was reported for"""
+
+    NONE = "none"
+    FFILL = "ffill"
+    LINEAR = "linear"
 
-router = APIRouter()
 
+# Response header carrying the cursor for the next page of a listing
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
-def get_db():
+# Most companies one batch request may ask for
+MAX_BATCH_COMPANIES = 500
+
+
+def cursor_after(listing: str, cursor: Optional[str]) -> Optional[int]:
     """
-    Get a database connection and close it after use
+    Decode the cursor query parameter of a listing
+
+    Args:
+        listing (str): Listing the cursor must belong to
+        cursor (str): Cursor from the X-Next-Cursor header of the previous page
+
+    Raises:
+        HTTPException: 400 if the cursor is invalid
+
+    Returns:
+        int: Key to continue after, None for the first page
     """
-    db = SessionLocal()
+    if cursor is None:
+        return None
     try:
-        yield db
-    finally:
-        db.close()
+        return decode_cursor(listing, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+def set_next_cursor(response: Response, listing: str, rows: list, limit: int):
+    """
+    Send the cursor for the page after rows, when there may be one
+
+    Args:
+        response (Response): Response to add the X-Next-Cursor header to
+        listing (str): Name of the listing
+        rows (list): Rows on this page, ordered by id
+        limit (int): Page size that was requested
+    """
+    cursor = next_cursor(listing, rows, limit)
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def summary_change(summary, scope: str, percent: bool) -> Optional[float]:
+    """
+    Read the change in emissions from the oldest to the most recent reported year
+
+    Args:
+        summary (CompanySummary): Precomputed summary of a company
+        scope (str): Emissions scope to compare
+        percent (bool): Whether to return percent or absolute change
+
+    Returns:
+        float: Absolute or percent change, None if fewer than two years or a
+            zero or missing first or last value
+    """
+    first = getattr(summary, f"{scope}_first")
+    last = getattr(summary, f"{scope}_last")
+    if summary.year_count < 2 or not first or not last:
+        return None
+    if percent:
+        return getattr(summary, f"{scope}_percent_change")
+    return getattr(summary, f"{scope}_change")
+
+
+def get_change(summary, scope: str, company: str, percent: bool) -> float:
+    """
+    Read the change in emissions from the oldest to the most recent reported year
+
+    Args:
+        summary (CompanySummary): Precomputed summary of the company, or None
+        scope (str): Emissions scope to compare
+        company (str): Company Name, for error messages
+        percent (bool): Whether to return percent or absolute change
+
+    Raises:
+        HTTPException: 404 if the company has no years
+        HTTPException: 404 if there is no change to report
+
+    Returns:
+        float: Absolute or percent change in emissions
+    """
+    if summary is None:
+        raise HTTPException(
+            status_code=404, detail=f"No data found for {company} not found"
+        )
+    change = summary_change(summary, scope, percent)
+    if change is None:
+        raise HTTPException(
+            status_code=404, detail=f"No change data found for {company} not found"
+        )
+    return change
 
 
-def get_change(years: list, scope: str) -> float:
+def get_year_change(
+    years: list, scope: str, company: str, start: int, end: int, percent: bool
+) -> float:
     """
-    For years find the change in emissions from the most recent year to the oldest year
+    Compute the change in emissions between two years of a company
 
     Args:
-        years (list): All years for a company
+        years (list[Year]): The company's years among start and end
         scope (str): Emissions scope to compare
+        company (str): Company Name, for error messages
+        start (int): Start year
+        end (int): End year
+        percent (bool): Whether to return percent or absolute change
+
+    Raises:
+        HTTPException: 404 if start or end has no data for the scope
 
     Returns:
-        float: Absolute change in emissions
+        float: Absolute or percent change in emissions
+    """
+    values = {year.year: getattr(year, scope) for year in years}
+    for year in (start, end):
+        if values.get(year) is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No data found for {company} for year {year}",
+            )
+    change = values[end] - values[start]
+    if percent:
+        return 100 * change / values[start]
+    return change
+
+
+def company_change(summary) -> Optional[CompanyChange]:
     """
-    if len(years) < 2:
-        return 0, 0
+    Collect every change a company's change endpoints report
 
-    earliest, latest = None, None
+    Args:
+        summary (CompanySummary): Precomputed summary of the company, or None
 
-    for yr in years:
-        val = getattr(yr, scope)
-        if val is not None:
-            if earliest is None:
-                earliest = val
-            latest = val
+    Returns:
+        CompanyChange: Absolute and percent changes per scope, None without a
+            summary
+    """
+    if summary is None:
+        return None
+    return CompanyChange(
+        change_1_2=summary_change(summary, "scope1_2", False),
+        percent_change_1_2=summary_change(summary, "scope1_2", True),
+        change_1_2_3=summary_change(summary, "scope1_2_3", False),
+        percent_change_1_2_3=summary_change(summary, "scope1_2_3", True),
+    )
+
+
+def company_detail(company, include: set) -> CompanyDetail:
+    """
+    Convert a company to its API model, embedding only the loaded relationships
 
-    if earliest is None or latest is None:
-        return 0, 0
+    Args:
+        company (internal.Company): Company with include eager loaded
+        include (set): Relationship names to embed
 
-    return latest, earliest
+    Returns:
+        CompanyDetail: Company with years and/or goal set
+    """
+    fields = Company.from_orm(company).dict()
+    if Include.YEARS in include:
+        fields["years"] = [Year.from_orm(year) for year in company.years]
+    if Include.GOAL in include:
+        fields["goal"] = Goal.from_orm(company.goal) if company.goal else None
+    return CompanyDetail(**fields)
 
 
-@router.get("/companies", tags=["companies"], response_model=list[Company])
+@router.get(
+    "/companies",
+    tags=["companies"],
+    response_model=list[CompanyDetail],
+    response_model_exclude_unset=True,
+)
 async def get_companies_list(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    include: list[Include] = Query(default=[]),
+    db: Session = Depends(get_db),
 ):
     """
-    Query companies table in database and return list of companies
+    Query companies table in database and return list of companies, ordered by id
     Args:
+        response (Response): Response the X-Next-Cursor header is added to
         skip (int, optional): Amount of results to skip. Defaults to 0.
         limit (int, optional): Limit on results #. Defaults to 100.
+        cursor (str, optional): X-Next-Cursor header of the previous page, to
+            continue from there without an offset. Defaults to None.
+        include (list[Include], optional): Relationships to embed in each company,
+            loaded with one extra query each. Defaults to [].
         db (Session, optional): Database session. Defaults to Depends(get_db).
 
+    Raises:
+        HTTPException: 400 if the cursor is invalid
+
     Returns:
         list: List of comapny objects
     """
-    return crud.get_companies(db=db, skip=skip, limit=limit)
+    include = set(include)
+    after = cursor_after("companies", cursor)
+    if not include:
+        rows = await async_crud.get_company_rows(
+            db=db, skip=skip, limit=limit, after=after
+        )
+        set_next_cursor(response, "companies", rows, limit)
+        return rows_response(rows, response)
+    companies = await async_crud.get_companies(
+        db=db,
+        skip=skip,
+        limit=limit,
+        include=[field.value for field in include],
+        after=after,
+    )
+    set_next_cursor(response, "companies", companies, limit)
+    return [company_detail(company, include) for company in companies]
+
+
+@router.post(
+    "/companies/batch",
+    tags=["companies"],
+    response_model=CompanyBatch,
+    response_model_exclude_unset=True,
+)
+async def get_company_batch(
+    request: CompanyBatchRequest, db: Session = Depends(get_db)
+):
+    """
+    Get many companies at once, instead of one request per company and field
+
+    Whatever the number of companies, this runs one query for the companies
+    and their goals, one for their years and one for their change figures.
+
+    Args:
+        request (CompanyBatchRequest): Company names and the fields wanted
+        db (Session, optional): DB session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 400 if more than MAX_BATCH_COMPANIES are requested
+
+    Returns:
+        CompanyBatch: Companies keyed by name, and the names that were not found
+    """
+    if len(request.companies) > MAX_BATCH_COMPANIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_COMPANIES} companies per request",
+        )
+    fields = set(request.fields)
+    include = [field.value for field in fields if field != BatchField.CHANGE]
+    if BatchField.CHANGE in fields:
+        include.append("summary")
+    batch = await async_crud.get_company_batch(db, request.companies, include)
+
+    companies = {}
+    for title, entry in batch.items():
+        company = Company.from_orm(entry["company"]).dict()
+        if BatchField.YEARS in fields:
+            company["years"] = [Year.from_orm(year) for year in entry["years"]]
+        if BatchField.GOAL in fields:
+            goal = entry["company"].goal
+            company["goal"] = Goal.from_orm(goal) if goal else None
+        if BatchField.CHANGE in fields:
+            company["change"] = company_change(entry["summary"])
+        companies[title] = company
+    not_found = [
+        name for name in dict.fromkeys(request.companies) if name not in batch
+    ]
+    return {"companies": companies, "not_found": not_found}
+
+
+@router.get(
+    "/companies/search", tags=["companies"], response_model=list[CompanyMatch]
+)
+async def search_companies(
+    q: str = Query(min_length=1),
+    limit: int = Query(default=10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Search company names by prefix, word prefix and trigram similarity
+
+    Served from an in-memory index, the database is only read to rebuild it
+    after the data has been reloaded, within CACHE_VERSION_INTERVAL seconds
+    of a load.
+
+    Args:
+        q (str): Text to search for, case insensitive
+        limit (int, optional): Max results. Defaults to 10.
+        db (Session, optional): Database session. Defaults to Depends(get_db).
+
+    Returns:
+        list[CompanyMatch]: Matching companies, best match first
+    """
+    index = await search.get_index(db)
+    return index.search(q, limit)
 
 
 @router.get("/companies/{company}", tags=["companies"], response_model=Company)
@@ -81,7 +364,7 @@ async def get_company(company: str, db: Session = Depends(get_db)):
     Returns:
         Company: Company object
     """
-    company = crud.get_company(db=db, company_name=company)
+    company = await async_crud.get_company(db=db, company_name=company)
     if company is None:
         raise HTTPException(status_code=404, detail="Company not found")
     return company
@@ -90,12 +373,15 @@ async def get_company(company: str, db: Session = Depends(get_db)):
 @router.get(
     "/companies/{company}/all_years", tags=["companies"], response_model=list[Year]
 )
-async def get_all_company_data(company: str, db: Session = Depends(get_db)):
+async def get_all_company_data(
+    company: str, response: Response, db: Session = Depends(get_db)
+):
     """
     Get all years of data for a company
 
     Args:
         company (str): Company Name
+        response (Response): Response whose cache headers are kept
         db (Session, optional): DB session. Defaults to Depends(get_db).
 
     Raises:
@@ -104,10 +390,55 @@ async def get_all_company_data(company: str, db: Session = Depends(get_db)):
     Returns:
         list[Year]: List of Year objects
     """
-    company_data = crud.get_company_years(db=db, company_name=company)
+    company_data = await async_crud.get_company_year_rows(
+        db=db, company_name=company
+    )
     if company_data is None:
         raise HTTPException(status_code=404, detail="Company not found")
-    return company_data
+    return rows_response(company_data, response)
+
+
+@router.get(
+    "/companies/{company}/profile",
+    tags=["companies"],
+    response_model=CompanyProfile,
+    response_model_exclude_unset=True,
+)
+async def get_company_profile(
+    company: str,
+    fields: list[BatchField] = Query(default=list(BatchField)),
+    db: Session = Depends(get_db),
+):
+    """
+    Get a company with its years, goal and changes in one request
+
+    Everything comes from one joined query, cached as one entry, instead of
+    the five requests to the separate endpoints.
+
+    Args:
+        company (str): Company Name
+        fields (list[BatchField], optional): Parts to return besides the company.
+            Defaults to all of years, goal and change.
+        db (Session, optional): DB session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 404 if company not found
+
+    Returns:
+        CompanyProfile: Company with the requested fields set
+    """
+    profile = await async_crud.get_company_profile(db, company)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Company not found")
+    fields = set(fields)
+    result = profile["company"].dict()
+    if BatchField.YEARS in fields:
+        result["years"] = profile["years"]
+    if BatchField.GOAL in fields:
+        result["goal"] = profile["goal"]
+    if BatchField.CHANGE in fields:
+        result["change"] = company_change(profile["summary"])
+    return CompanyProfile(**result)
 
 
 @router.get("/companies/{company}/change_1_2", tags=["companies"], response_model=float)
@@ -122,25 +453,14 @@ async def get_company_change_1_2(
         percent (bool, optional): If you want percent or absolute change. Defaults to False.
 
     Raises:
-        HTTPException: _description_
-        HTTPException: _description_
+        HTTPException: 404 if company not found
+        HTTPException: 404 if no change data found
 
     Returns:
         float: Absolute or percent change in emissions
     """
-    years = crud.get_company_years(db=db, company_name=company)
-    if years is None:
-        raise HTTPException(
-            status_code=404, detail=f"No data found for {company} not found"
-        )
-    e, s = get_change(years, "scope1_2")
-    if e == 0 or s == 0:
-        raise HTTPException(
-            status_code=404, detail=f"No change data found for {company} not found"
-        )
-    if percent:
-        return 100 * (e - s) / s
-    return e - s
+    summary = await async_crud.get_company_summary(db=db, company_name=company)
+    return get_change(summary, "scope1_2", company, percent)
 
 
 @router.get(
@@ -164,21 +484,8 @@ async def get_company_change_1_2_3(
     Returns:
         float: Absolute or percent change in emissions
     """
-
-    years = crud.get_company_years(db=db, company_name=company)
-    if years is None:
-        raise HTTPException(
-            status_code=404, detail=f"No data found for {company} not found"
-        )
-
-    e, s = get_change(years, "scope1_2_3")
-    if e == 0 or s == 0:
-        raise HTTPException(
-            status_code=404, detail=f"No change data found for {company} not found"
-        )
-    if percent:
-        return 100 * (e - s) / s
-    return e - s
+    summary = await async_crud.get_company_summary(db=db, company_name=company)
+    return get_change(summary, "scope1_2_3", company, percent)
 
 
 @router.get(
@@ -204,28 +511,13 @@ async def get_company_change_with_years_1_2(
         percent (bool, optional): Whether or not to return percent change. Defaults to False.
 
     Raises:
-        HTTPException: 404 if company not found
-        HTTPException: 404 if no data found for start or end year
+        HTTPException: 404 if the company has no data for start or end year
 
     Returns:
         float: Absolute or percent change in emissions
     """
-    start = crud.get_company_year(db, company, start)
-    end = crud.get_company_year(db, company, end)
-    if start.scope1_2 is None:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No data found for {company} for year {start} not found",
-        )
-    if end.scope1_2 is None:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No data found for {company} for year {end} not found",
-        )
-    if percent:
-        return 100 * (end.scope1_2 - start.scope1_2) / start.scope1_2
-    else:
-        return end.scope1_2 - start.scope1_2
+    years = await async_crud.get_company_year_pair(db, company, start, end)
+    return get_year_change(years, "scope1_2", company, start, end, percent)
 
 
 @router.get(
@@ -251,27 +543,13 @@ async def get_company_change_with_years_1_2_3(
         percent (bool, optional): Whether or not to return percent change. Defaults to False.
 
     Raises:
-        HTTPException: 404 if company not found
-        HTTPException: 404 if no data found for start or end year
+        HTTPException: 404 if the company has no data for start or end year
 
     Returns:
         float: Absolute or percent change in emissions
     """
-    start = crud.get_company_year(db, company, start)
-    end = crud.get_company_year(db, company, end)
-    if start.scope1_2_3 is None:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No data found for {company} for year {start} not found",
-        )
-    if end.scope1_2_3 is None:
-        raise HTTPException(
-            status_code=404,
-            detail=f"No data found for {company} for year {end} not found",
-        )
-    if percent:
-        return 100 * (end.scope1_2_3 - start.scope1_2_3) / start.scope1_2_3
-    return end.scope1_2_3 - start.scope1_2_3
+    years = await async_crud.get_company_year_pair(db, company, start, end)
+    return get_year_change(years, "scope1_2_3", company, start, end, percent)
 
 
 @router.get("/companies/{company}/goals", tags=["companies"], response_model=Goal)
@@ -290,15 +568,66 @@ async def get_company_goals(company: str, db: Session = Depends(get_db)):
     Returns:
         Goal: Goal object
     """
-    comp = crud.get_company(db, company)
+    comp = await async_crud.get_company(db, company)
     if comp is None:
         raise HTTPException(status_code=404, detail="Company not found")
-    goal = crud.get_goal(db, comp.goals)
+    goal = await async_crud.get_goal(db, comp.goals)
     if goal is None:
         raise HTTPException(status_code=404, detail=f"No goals for {company} found")
     return goal
 
 
+@router.get(
+    "/companies/{company}/series", tags=["companies"], response_model=CompanySeries
+)
+async def get_company_series(
+    company: str,
+    from_year: Optional[int] = Query(default=None, alias="from"),
+    to: Optional[int] = None,
+    scope: Scope = Scope.SCOPE1_2,
+    fill: Fill = Fill.NONE,
+    db: Session = Depends(get_db),
+):
+    """
+    Get one scope of a company's emissions with a value for every year of a range
+
+    Only the years in the range are read, and gaps such as 2007 are filled in
+    one vectorized pass when numpy is installed, so a chart needs no other
+    request.
+
+    Args:
+        company (str): Company Name
+        from_year (int, optional): First year, the from query parameter.
+            Defaults to the first year with data.
+        to (int, optional): Last year. Defaults to the last year with data.
+        scope (Scope, optional): Emissions scope. Defaults to scope1_2.
+        fill (Fill, optional): none leaves gaps empty, ffill carries the last
+            reported value forward and linear interpolates between the
+            reported values around a gap. Defaults to none.
+        db (Session, optional): DB session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 400 if from is after to
+        HTTPException: 404 if company not found
+
+    Returns:
+        CompanySeries: Years, values and which values were filled in
+    """
+    if from_year is not None and to is not None and from_year > to:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    points = await async_crud.get_company_series(
+        db, company, scope.value, from_year, to
+    )
+    if points is None:
+        raise HTTPException(status_code=404, detail="Company not found")
+    return {
+        "title": company,
+        "scope": scope.value,
+        "fill": fill.value,
+        **series.build_series(points, fill.value, from_year, to),
+    }
+
+
 @router.get("/companies/{company}/{year}", tags=["companies"], response_model=Year)
 async def get_company_year(company: str, year: int, db: Session = Depends(get_db)):
     """
@@ -315,7 +644,7 @@ async def get_company_year(company: str, year: int, db: Session = Depends(get_db
     Returns:
         Year: Year object
     """
-    year = crud.get_company_year(db=db, company_name=company, year=year)
+    year = await async_crud.get_company_year(db=db, company_name=company, year=year)
     if year is None:
         raise HTTPException(
             status_code=404,
@@ -0,0 +1,146 @@
+"""This module contains the routers for the bulk export endpoints."""
+
+import csv
+import io
+import json
+import math
+from enum import Enum
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from .. import async_crud, crud
+from ..config import settings
+from ..database import session_scope
+
+router = APIRouter()
+
+
+class ExportFormat(str, Enum):
+    """Formats the export endpoints can stream"""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _clean(value):
+    """Write NaN cells from the workbook as null"""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def encode_ndjson(rows) -> str:
+    """
+    Encode rows as newline delimited JSON
+
+    Args:
+        rows (list[RowMapping]): Rows to encode
+
+    Returns:
+        str: One JSON object per line
+    """
+    return "".join(
+        json.dumps({key: _clean(value) for key, value in row.items()}) + "\n"
+        for row in rows
+    )
+
+
+def encode_csv(rows) -> str:
+    """
+    Encode rows as CSV lines without a header
+
+    Args:
+        rows (list[RowMapping]): Rows to encode
+
+    Returns:
+        str: One CSV line per row, empty fields for null
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_clean(value) for value in row.values()] for row in rows)
+    return buffer.getvalue()
+
+
+async def stream_export(statement, export_format: ExportFormat):
+    """
+    Stream the rows of a statement encoded in the requested format
+
+    Args:
+        statement (Select): Statement selecting the exported columns
+        export_format (ExportFormat): NDJSON or CSV
+
+    Yields:
+        str: Encoded chunk of up to export_batch_size rows
+    """
+    if export_format == ExportFormat.CSV:
+        encode = encode_csv
+        header = io.StringIO()
+        csv.writer(header).writerow(statement.selected_columns.keys())
+        yield header.getvalue()
+    else:
+        encode = encode_ndjson
+    async with session_scope() as db:
+        async for rows in async_crud.stream_rows(
+            db, statement, settings.export_batch_size
+        ):
+            yield encode(rows)
+
+
+def export_response(statement, export_format: ExportFormat, name: str):
+    """
+    Build a streaming response for an export
+
+    Args:
+        statement (Select): Statement selecting the exported columns
+        export_format (ExportFormat): NDJSON or CSV
+        name (str): File name without extension
+
+    Returns:
+        StreamingResponse: Response streaming every row
+    """
+    return StreamingResponse(
+        stream_export(statement, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{name}.{export_format.value}"'
+            )
+        },
+    )
+
+
+@router.get("/export/emissions", tags=["export"], response_class=StreamingResponse)
+async def export_emissions(format: ExportFormat = ExportFormat.NDJSON):
+    """
+    Stream every company and year with its emissions
+
+    Args:
+        format (ExportFormat, optional): ndjson or csv. Defaults to ndjson.
+
+    Returns:
+        StreamingResponse: company, year, scope1_2 and scope1_2_3 for every row
+    """
+    # pylint: disable=redefined-builtin
+    return export_response(crud.export_emissions_statement(), format, "emissions")
+
+
+@router.get("/export/companies", tags=["export"], response_class=StreamingResponse)
+async def export_companies(format: ExportFormat = ExportFormat.NDJSON):
+    """
+    Stream every company with its goal
+
+    Args:
+        format (ExportFormat, optional): ndjson or csv. Defaults to ndjson.
+
+    Returns:
+        StreamingResponse: Company and goal columns for every company
+    """
+    # pylint: disable=redefined-builtin
+    return export_response(crud.export_companies_statement(), format, "companies")
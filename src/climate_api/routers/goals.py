@@ -0,0 +1,42 @@
+"""This module contains the routers for the goals endpoints."""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from .companies import get_db
+from .. import async_crud
+from ..http_cache import conditional_get
+from ..models import GoalProgress
+
+# Unchanged GETs are answered with 304 before any other dependency runs
+router = APIRouter(dependencies=[Depends(conditional_get)])
+
+
+@router.get("/goals/progress", tags=["goals"], response_model=list[GoalProgress])
+async def get_goal_progress(
+    company: Optional[str] = None, db: Session = Depends(get_db)
+):
+    """
+    Get how far each company is towards its goals
+
+    For each scope this compares the reduction achieved between the goal's
+    reference year and the latest reported year with the reduction the goal
+    requires, and projects the trend so far to the target year.
+
+    Args:
+        company (str, optional): Company Name, to get only its progress.
+            Defaults to None.
+        db (Session, optional): DB session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 404 if company has no goals or doesn't exist
+
+    Returns:
+        list[GoalProgress]: Progress of every company with goals
+    """
+    progress = await async_crud.get_goal_progress(db, company)
+    if company is not None and not progress:
+        raise HTTPException(status_code=404, detail=f"No goals for {company} found")
+    return progress
@@ -0,0 +1,85 @@
+"""This module contains the FastAPI router for internal operational endpoints."""
+
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from .. import cache, database
+from ..config import settings
+
+
+def require_token(authorization: Optional[str] = Header(default=None)) -> None:
+    """
+    Only let requests carrying the INTERNAL_TOKEN bearer token through
+
+    Hiding the routes from the schema does not stop anyone calling them, so
+    without INTERNAL_TOKEN they don't exist at all.
+
+    Args:
+        authorization (str, optional): Authorization header. Defaults to None.
+
+    Raises:
+        HTTPException: 404 if INTERNAL_TOKEN is not set
+        HTTPException: 401 if the header doesn't carry the token
+    """
+    if settings.internal_token is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    expected = f"Bearer {settings.internal_token}"
+    if not secrets.compare_digest((authorization or "").encode(), expected.encode()):
+        raise HTTPException(
+            status_code=401,
+            detail="Missing or wrong internal token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_token)],
+)
+
+
+@router.get("/pool")
+async def get_pool_status():
+    """
+    Get connection pool statistics for sizing pools against worker counts
+
+    Counters are per process, so each uvicorn worker reports its own pools.
+
+    Returns:
+        dict: "sync" and/or "async" engine to checkout, wait and overflow stats
+    """
+    return database.pool_status()
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+    Get the per function hit/miss counters of the read cache
+
+    Returns:
+        dict: Cache statistics for this process and the dataset version it sees
+    """
+    return cache.backend.stats()
+
+
+@router.post("/cache/invalidate")
+async def invalidate_cache():
+    """
+    Bump the dataset version, dropping every worker's cached reads when the
+    cache backend is shared
+
+    With the memory backend only the worker answering the request drops its
+    entries. Loads don't need this endpoint, they reach every worker through
+    the dataset_version table.
+
+    Returns:
+        dict: Cache statistics after invalidating
+    """
+    # A shared backend is bumped over a blocking socket
+    await run_in_threadpool(cache.invalidate)
+    return cache.backend.stats()
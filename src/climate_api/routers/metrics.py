@@ -0,0 +1,30 @@
+"""This module contains the FastAPI router for the Prometheus metrics endpoint."""
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from .. import metrics
+from .internal import require_token
+
+# Version of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Route and crud function names are internal, so scrapes need INTERNAL_TOKEN
+router = APIRouter(
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_token)],
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Get request latency and database time per route in the Prometheus format
+
+    Counters are per process, so each uvicorn worker is scraped on its own.
+
+    Returns:
+        PlainTextResponse: Exposition text
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type=CONTENT_TYPE)
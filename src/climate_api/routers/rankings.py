@@ -0,0 +1,159 @@
+"""This module contains the routers for the cross company ranking endpoints."""
+
+import heapq
+import math
+from enum import Enum
+from operator import itemgetter
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from .companies import get_db
+from .. import async_crud
+from ..http_cache import conditional_get
+from ..models import CompanyRanking
+
+# Unchanged GETs are answered with 304 before any other dependency runs
+router = APIRouter(dependencies=[Depends(conditional_get)])
+
+
+class RankOrder(str, Enum):
+    """Which end of the leaderboard to return"""
+
+    # Most negative change first, i.e. the biggest cuts
+    SMALLEST = "smallest"
+    LARGEST = "largest"
+
+
+def rank_changes(
+    rows: list, percent: bool, order: RankOrder, limit: int
+) -> list[CompanyRanking]:
+    """
+    Pick the limit companies with the smallest or largest change with a heap
+
+    Args:
+        rows (list): (id, title, first_year, first, last_year, last) per company
+        percent (bool): Rank on percent rather than absolute change
+        order (RankOrder): Smallest or largest change first
+        limit (int): How many companies to return
+
+    Returns:
+        list[CompanyRanking]: Ranked companies, best first
+    """
+    entries = []
+    for company_id, title, first_year, first, last_year, last in rows:
+        # NaN cells from the workbook count as missing
+        if math.isnan(first) or math.isnan(last) or (percent and not first):
+            continue
+        entries.append(
+            {
+                "id": company_id,
+                "title": title,
+                "first_year": first_year,
+                "first": first,
+                "last_year": last_year,
+                "last": last,
+                "change": 100 * (last - first) / first if percent else last - first,
+            }
+        )
+    pick = heapq.nsmallest if order == RankOrder.SMALLEST else heapq.nlargest
+    top = pick(limit, entries, key=itemgetter("change"))
+    return [CompanyRanking(rank=rank, **entry) for rank, entry in enumerate(top, 1)]
+
+
+async def get_ranking(
+    db, scope: str, start, end, percent: bool, order: RankOrder, limit: int
+) -> list[CompanyRanking]:
+    """
+    Rank every company on its change in one scope
+
+    Args:
+        db (Session): DB session
+        scope (str): "scope1_2" or "scope1_2_3"
+        start (int): First year of the range, None for the first reported year
+        end (int): Last year of the range, None for the last reported year
+        percent (bool): Rank on percent rather than absolute change
+        order (RankOrder): Smallest or largest change first
+        limit (int): How many companies to return
+
+    Raises:
+        HTTPException: 400 if only one of start and end is given
+
+    Returns:
+        list[CompanyRanking]: Ranked companies
+    """
+    if (start is None) != (end is None):
+        raise HTTPException(
+            status_code=400, detail="Give both start and end, or neither"
+        )
+    rows = await async_crud.get_changes(db, scope, start, end)
+    return rank_changes(rows, percent, order, limit)
+
+
+@router.get(
+    "/rankings/change_1_2", tags=["rankings"], response_model=list[CompanyRanking]
+)
+async def get_change_1_2_ranking(
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    percent: bool = False,
+    order: RankOrder = RankOrder.SMALLEST,
+    limit: int = Query(default=10, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """
+    Rank companies by their change in scope 1+2 emissions
+
+    Args:
+        start (int, optional): Compare from this year instead of each company's
+            first reported year. Defaults to None.
+        end (int, optional): Compare to this year instead of each company's last
+            reported year. Defaults to None.
+        percent (bool, optional): Rank on percent change. Defaults to False.
+        order (RankOrder, optional): smallest puts the biggest cuts first, largest
+            the biggest increases. Defaults to smallest.
+        limit (int, optional): How many companies to return. Defaults to 10.
+        db (Session, optional): DB session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 400 if only one of start and end is given
+
+    Returns:
+        list[CompanyRanking]: Ranked companies
+    """
+    return await get_ranking(db, "scope1_2", start, end, percent, order, limit)
+
+
+@router.get(
+    "/rankings/change_1_2_3", tags=["rankings"], response_model=list[CompanyRanking]
+)
+async def get_change_1_2_3_ranking(
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    percent: bool = False,
+    order: RankOrder = RankOrder.SMALLEST,
+    limit: int = Query(default=10, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """
+    Rank companies by their change in scope 1+2+3 emissions
+
+    Args:
+        start (int, optional): Compare from this year instead of each company's
+            first reported year. Defaults to None.
+        end (int, optional): Compare to this year instead of each company's last
+            reported year. Defaults to None.
+        percent (bool, optional): Rank on percent change. Defaults to False.
+        order (RankOrder, optional): smallest puts the biggest cuts first, largest
+            the biggest increases. Defaults to smallest.
+        limit (int, optional): How many companies to return. Defaults to 10.
+        db (Session, optional): DB session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 400 if only one of start and end is given
+
+    Returns:
+        list[CompanyRanking]: Ranked companies
+    """
+    return await get_ranking(db, "scope1_2_3", start, end, percent, order, limit)
@@ -1,40 +1,61 @@
 """ This module contains the routers for the years endpoint. """
 
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
 
-from .companies import get_db
-from .. import crud
-from ..models import Year
+from .companies import cursor_after, get_db, set_next_cursor
+from .. import async_crud
+from ..http_cache import conditional_get
+from ..models import Year, YearSummary
+from ..responses import rows_response
 
-router = APIRouter()
+# Unchanged GETs are answered with 304 before any other dependency runs
+router = APIRouter(dependencies=[Depends(conditional_get)])
 
 
 @router.get("/year", tags=["years"], response_model=list[Year])
 async def get_all_emissions(
-    db: Session = Depends(get_db), skip: int = 0, limit: int = 200
+    response: Response,
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = 200,
+    cursor: Optional[str] = None,
 ):
     """
-    Get all emissions data
+    Get all emissions data, ordered by id
 
     Args:
+        response (Response): Response the X-Next-Cursor header is added to
         db (Session, optional): DB session. Defaults to Depends(get_db).
         skip (int, optional): How many results to skip. Defaults to 0.
         limit (int, optional): Limit on how many results to return. Defaults to 200.
+        cursor (str, optional): X-Next-Cursor header of the previous page, to
+            continue from there without an offset. Defaults to None.
+
+    Raises:
+        HTTPException: 400 if the cursor is invalid
 
     Returns:
-        _type_: _description_
+        list[Year]: Years where at least one scope was reported
     """
-    emissions = crud.get_all_emissions(db, skip=skip, limit=limit)
-    return emissions
+    emissions = await async_crud.get_all_emission_rows(
+        db, skip=skip, limit=limit, after=cursor_after("years", cursor)
+    )
+    set_next_cursor(response, "years", emissions, limit)
+    return rows_response(emissions, response)
 
 
 @router.get("/year/{year}", tags=["years"], response_model=list[Year])
-async def get_yearly_emissions(year: int, db: Session = Depends(get_db)):
+async def get_yearly_emissions(
+    year: int, response: Response, db: Session = Depends(get_db)
+):
     """Get year objects for a given year
 
     Args:
         year (int): The year to get emissions for
+        response (Response): Response whose cache headers are kept
         db (Session, optional): DB session. Defaults to Depends(get_db).
 
     Raises:
@@ -43,10 +64,10 @@ async def get_yearly_emissions(year: int, db: Session = Depends(get_db)):
     Returns:
         list[Year]: List of Year objects
     """
-    emissions = crud.get_emissions(db, year)
+    emissions = await async_crud.get_emission_rows(db, year)
     if emissions is None:
         raise HTTPException(status_code=404, detail="Year not found")
-    return emissions
+    return rows_response(emissions, response)
 
 
 @router.get("/year/{year}/total", tags=["years"], response_model=float)
@@ -64,16 +85,10 @@ async def get_total_emissions(year: int, db: Session = Depends(get_db)):
     Returns:
         float: total emissions
     """
-    emissions = crud.get_emissions(db, year)
-    if emissions is None:
+    summary = await async_crud.get_year_summary(db, year)
+    if summary is None:
         raise HTTPException(status_code=404, detail="Year not found")
-    total_emissions = 0.0
-    for em in emissions:
-        if em.scope1_2_3 is not None:
-            total_emissions += em.scope1_2_3
-        elif em.scope1_2 is not None:
-            total_emissions += em.scope1_2
-    return total_emissions
+    return summary.total
 
 
 @router.get("/year/{year}/scope_1_2", tags=["years"], response_model=float)
@@ -91,14 +106,10 @@ async def get_scope1_2_emissions(year: int, db: Session = Depends(get_db)):
     Returns:
         float: scope 1+2 emissions
     """
-    emissions = crud.get_emissions(db, year)
-    if emissions is None:
+    summary = await async_crud.get_year_summary(db, year)
+    if summary is None:
         raise HTTPException(status_code=404, detail="Year not found")
-    total_emissions = 0.0
-    for em in emissions:
-        if em.scope1_2 is not None:
-            total_emissions += em.scope1_2
-    return total_emissions
+    return summary.scope1_2
 
 
 @router.get("/year/{year}/scope_3", tags=["years"], response_model=float)
@@ -116,8 +127,28 @@ async def get_scope3_emissions(year: int, db: Session = Depends(get_db)):
     Returns:
         float: scope 3 emissions
     """
-    # Get total emissions and subtract scope 1 and 2 emissions
-    scope3 = crud.get_scope3_emissions(db, year)
+    scope3 = await async_crud.get_scope3_emissions(db, year)
     if scope3 is None:
         raise HTTPException(status_code=404, detail="Year not found")
     return scope3
+
+
+@router.get("/year/{year}/summary", tags=["years"], response_model=YearSummary)
+async def get_year_summary(year: int, db: Session = Depends(get_db)):
+    """
+    Get total, scope 1+2 and scope 3 emissions for a given year from one query
+
+    Args:
+        year (int): The year to get emissions for
+        db (Session, optional): DB session. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: 404 if year not found
+
+    Returns:
+        YearSummary: Emission totals across every company
+    """
+    summary = await async_crud.get_year_summary(db, year)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Year not found")
+    return summary
@@ -0,0 +1,213 @@
+"""In-memory company name index for search and autocomplete
+
+The companies table only changes when the populate_db scripts run, so names
+are indexed in process: sorted arrays of the titles and of the text from
+each word of a title on answer prefix queries with a binary search, and
+trigram posting sets answer fuzzy queries. The index is rebuilt whenever the dataset
+version from the cache module changes, and swapped in with one assignment.
+That version includes the dataset_version row the loaders bump, so the index
+picks up a populate_db run within CACHE_VERSION_INTERVAL seconds, whatever
+the cache backend.
+"""
+
+import asyncio
+import heapq
+from bisect import bisect_left
+from collections import Counter
+from typing import Optional
+
+from . import crud
+from .cache import dataset_version, version_due
+from .database import run_query
+
+# Fuzzy matches need this share of the query's trigrams to appear in the
+# title, like pg_trgm's word_similarity_threshold
+SIMILARITY_THRESHOLD = 0.5
+
+
+def normalize(text: str) -> str:
+    """Lower case and collapse whitespace, so queries match titles loosely"""
+    return " ".join(text.lower().split())
+
+
+def trigrams(text: str) -> set:
+    """Trigrams of each word padded with spaces, as pg_trgm computes them
+
+    Args:
+        text (str): Normalized text
+
+    Returns:
+        set: Three character strings
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _prefix_range(keys: list, prefix: str):
+    """Indexes of the sorted keys that start with prefix"""
+    start = bisect_left(keys, prefix)
+    end = bisect_left(keys, prefix + "\uffff", start)
+    return range(start, end)
+
+
+class CompanyIndex:
+    """Search structures over every company title
+
+    Args:
+        companies (list): (id, title) pairs
+        version (str, optional): Dataset version the titles were read at.
+            Defaults to None.
+    """
+
+    def __init__(self, companies: list, version: Optional[str] = None):
+        self.version = version
+        self.titles = {company_id: title for company_id, title in companies}
+        self.normalized = {
+            company_id: normalize(title) for company_id, title in self.titles.items()
+        }
+        by_title = sorted(
+            (name, company_id) for company_id, name in self.normalized.items()
+        )
+        self._title_keys = [name for name, _ in by_title]
+        self._title_ids = [company_id for _, company_id in by_title]
+        # Every title from the start of each later word, so "bank" finds
+        # "First Bank of America" with the same binary search
+        by_tail = sorted(
+            (name[start + 1 :], company_id)
+            for company_id, name in self.normalized.items()
+            for start, char in enumerate(name)
+            if char == " "
+        )
+        self._tail_keys = [tail for tail, _ in by_tail]
+        self._tail_ids = [company_id for _, company_id in by_tail]
+        self._trigram_counts = {}
+        self._postings = {}
+        for company_id, name in self.normalized.items():
+            grams = trigrams(name)
+            self._trigram_counts[company_id] = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(company_id)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def _score_matches(self, query: str) -> dict:
+        """Score titles where query starts the title or one of its words"""
+        scores = {}
+        for position in _prefix_range(self._title_keys, query):
+            company_id = self._title_ids[position]
+            name = self.normalized[company_id]
+            # Exact 1.0, other prefixes 0.75 to 1 by how much of the title matched
+            if name == query:
+                scores[company_id] = 1.0
+            else:
+                scores[company_id] = 0.75 + 0.25 * len(query) / len(name)
+        for position in _prefix_range(self._tail_keys, query):
+            company_id = self._tail_ids[position]
+            if company_id not in scores:
+                name = self.normalized[company_id]
+                scores[company_id] = 0.5 + 0.25 * len(query) / len(name)
+        return scores
+
+    def _fuzzy_matches(self, query: str, exclude: dict) -> dict:
+        """Score titles by trigram similarity, scaled below every prefix match
+
+        Titles qualify on the share of the query's trigrams they contain, so a
+        misspelled word still finds a long title, and rank on the average of
+        that share and the similarity of the whole title.
+        """
+        grams = trigrams(query)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        scores = {}
+        for company_id, count in shared.items():
+            coverage = count / len(grams)
+            if company_id in exclude or coverage < SIMILARITY_THRESHOLD:
+                continue
+            similarity = count / (len(grams) + self._trigram_counts[company_id] - count)
+            scores[company_id] = 0.25 * (coverage + similarity)
+        return scores
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """Rank titles against a query
+
+        Titles equal to the query rank first, then titles starting with it, then
+        titles with a word starting with it, then titles with similar trigrams.
+
+        Args:
+            query (str): Text typed by the user
+            limit (int, optional): Max results. Defaults to 10.
+
+        Returns:
+            list[dict]: id, title and score between 0 and 1, best first
+        """
+        query = normalize(query)
+        if not query or limit <= 0:
+            return []
+        scores = self._score_matches(query)
+        if len(scores) < limit:
+            scores.update(self._fuzzy_matches(query, scores))
+        ranked = heapq.nsmallest(
+            limit,
+            scores.items(),
+            key=lambda item: (-item[1], self.normalized[item[0]]),
+        )
+        return [
+            {
+                "id": company_id,
+                "title": self.titles[company_id],
+                "score": round(score, 4),
+            }
+            for company_id, score in ranked
+        ]
+
+
+_index: Optional[CompanyIndex] = None
+# Created by the first get_index, on the event loop that serves requests
+_rebuild_lock: Optional[asyncio.Lock] = None
+
+
+def build_index(db) -> CompanyIndex:
+    """Read every company title and swap in a new index, unless the current
+    one was built at the dataset version read through db
+
+    Args:
+        db (Session): SQLAlchemy session
+
+    Returns:
+        CompanyIndex: Index matching the current dataset version
+    """
+    global _index  # pylint: disable=global-statement
+    version = dataset_version(db)
+    if _index is None or _index.version != version:
+        _index = CompanyIndex(crud.get_company_titles(db), version)
+    return _index
+
+
+async def get_index(db) -> CompanyIndex:
+    """Current index, rebuilt first if the dataset has been reloaded since
+
+    While the dataset version is trusted the index is returned straight away.
+    Otherwise the version is read in the same run_query call that rebuilds
+    the index, so the event loop never waits on the database, and requests
+    arriving meanwhile wait for that one rebuild instead of starting their own.
+
+    Args:
+        db (Session | AsyncSession): Database session, to read the dataset
+            version and rebuild
+
+    Returns:
+        CompanyIndex: Index matching the current dataset version
+    """
+    global _rebuild_lock  # pylint: disable=global-statement
+    index = _index
+    if index is not None and not version_due() and index.version == dataset_version():
+        return index
+    if _rebuild_lock is None:
+        _rebuild_lock = asyncio.Lock()
+    async with _rebuild_lock:
+        return await run_query(db, build_index)
@@ -0,0 +1,165 @@
+"""Dense yearly series with the gaps filled in
+
+The years table has holes: populate_emissions never loads 2007 and many
+cells are empty. Charts want one value per year, so a company's reported
+points are laid out on every year of the range and the gaps are filled with
+NumPy, without a loop over the years. Without numpy, which is the optional
+"memory" extra, the same series are built with plain lists.
+"""
+
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is the optional "memory" extra
+    np = None
+
+FILL_METHODS = ("none", "ffill", "linear")
+
+
+def densify(points: list, start: int, end: int):
+    """Place reported points on every year from start to end
+
+    Args:
+        points (list): (year, value) pairs, value None or NaN where not reported
+        start (int): First year of the series
+        end (int): Last year of the series
+
+    Returns:
+        tuple: Years and values arrays, NaN where nothing was reported
+    """
+    years = np.arange(start, end + 1)
+    values = np.full(len(years), np.nan)
+    if points:
+        point_years, point_values = (np.array(column) for column in zip(*points))
+        inside = (point_years >= start) & (point_years <= end)
+        values[point_years[inside] - start] = point_values[inside].astype(float)
+    return years, values
+
+
+def fill_gaps(values, method: str):
+    """Fill the NaN cells of a series between reported values
+
+    Gaps before the first reported value stay empty for both methods, and so
+    do gaps after the last one for linear interpolation, which never
+    extrapolates.
+
+    Args:
+        values (np.ndarray): Values with NaN for gaps
+        method (str): "none", "ffill" to carry the last value forward, or
+            "linear" to interpolate between the reported values around a gap
+
+    Raises:
+        ValueError: If method is not one of FILL_METHODS
+
+    Returns:
+        np.ndarray: New array with the gaps filled
+    """
+    if method not in FILL_METHODS:
+        raise ValueError(f"fill must be one of {FILL_METHODS}, got {method}")
+    reported = ~np.isnan(values)
+    if method == "none" or not reported.any():
+        return values.copy()
+    positions = np.arange(len(values))
+    if method == "ffill":
+        # Position of the latest reported value at or before each position
+        latest = np.maximum.accumulate(np.where(reported, positions, -1))
+        filled = values[latest.clip(min=0)]
+        filled[latest < 0] = np.nan
+        return filled
+    filled = np.interp(positions, positions[reported], values[reported])
+    first, last = np.flatnonzero(reported)[[0, -1]]
+    filled[:first] = np.nan
+    filled[last + 1 :] = np.nan
+    return filled
+
+
+def fill_list(values: list, method: str) -> list:
+    """Fill the None cells of a list, see fill_gaps
+
+    Args:
+        values (list): Values with None for gaps
+        method (str): "none", "ffill" or "linear"
+
+    Raises:
+        ValueError: If method is not one of FILL_METHODS
+
+    Returns:
+        list: New list with the gaps filled
+    """
+    if method not in FILL_METHODS:
+        raise ValueError(f"fill must be one of {FILL_METHODS}, got {method}")
+    filled = list(values)
+    if method == "none":
+        return filled
+    previous = None
+    for position, value in enumerate(values):
+        if value is None:
+            continue
+        if previous is not None:
+            start, start_value = previous
+            for gap in range(start + 1, position):
+                if method == "ffill":
+                    filled[gap] = start_value
+                else:
+                    share = (gap - start) / (position - start)
+                    filled[gap] = start_value + share * (value - start_value)
+        previous = (position, value)
+    if method == "ffill" and previous is not None:
+        start, start_value = previous
+        filled[start + 1 :] = [start_value] * (len(values) - start - 1)
+    return filled
+
+
+def _build_lists(points: list, fill: str, start: int, end: int) -> dict:
+    """build_series without numpy"""
+    values = [None] * (end - start + 1)
+    for year, value in points:
+        # NaN cells from the workbook count as missing, like NULL
+        if start <= year <= end and value is not None and value == value:
+            values[year - start] = float(value)
+    filled = fill_list(values, fill)
+    return {
+        "years": list(range(start, end + 1)),
+        "values": filled,
+        "filled": [
+            value is None and new is not None for value, new in zip(values, filled)
+        ],
+    }
+
+
+def build_series(
+    points: list,
+    fill: str = "none",
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+) -> dict:
+    """Dense series of a company's points
+
+    Args:
+        points (list): (year, value) pairs ordered by year
+        fill (str, optional): Gap filling method, see fill_gaps. Defaults to "none".
+        start (int, optional): First year. Defaults to the first year in points.
+        end (int, optional): Last year. Defaults to the last year in points.
+
+    Returns:
+        dict: "years", "values" (None where still empty) and "filled" (True
+            where the value was filled in), one entry per year
+    """
+    if start is None or end is None:
+        point_years = [year for year, _ in points]
+        if not point_years:
+            return {"years": [], "values": [], "filled": []}
+        start = min(point_years) if start is None else start
+        end = max(point_years) if end is None else end
+    if end < start:
+        return {"years": [], "values": [], "filled": []}
+    if np is None:
+        return _build_lists(points, fill, start, end)
+    years, values = densify(points, start, end)
+    filled = fill_gaps(values, fill)
+    return {
+        "years": years.tolist(),
+        "values": [None if np.isnan(value) else value for value in filled.tolist()],
+        "filled": (np.isnan(values) & ~np.isnan(filled)).tolist(),
+    }
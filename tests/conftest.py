@@ -0,0 +1,68 @@
+"""Shared test setup
+
+Without HEROKU_DATABASE_URL the suite runs against a local SQLite database
+seeded with the synthetic dataset from benchmarks.dataset, renamed and
+adjusted where tests expect figures from the production data. The variable
+has to be set before the application is imported, as its settings are read
+at import time.
+
+The dataset version is read from the database once, so the read never lands
+in a query budget; tests that record a load refresh it themselves.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("CACHE_VERSION_INTERVAL", "3600")
+
+SEED = not os.environ.get("HEROKU_DATABASE_URL")
+if SEED:
+    _directory = tempfile.mkdtemp(prefix="climate_api_tests_")
+    os.environ["HEROKU_DATABASE_URL"] = (
+        f"sqlite:///{os.path.join(_directory, 'climate.db')}"
+    )
+
+# pylint: disable=wrong-import-position
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks import dataset
+from src.climate_api.cache import database_version
+from src.climate_api.query_budget import QueryBudget
+
+# Total scope 3 emissions of 2022 in the production data
+SCOPE3_2022 = 3819.5
+
+
+def seed(url: str, n_companies: int = 20) -> None:
+    """Create the tables and load synthetic companies into a database
+
+    Args:
+        url (str): SQLAlchemy URL of an empty database
+        n_companies (int, optional): Companies to generate. Defaults to 20.
+    """
+    engine = create_engine(url)
+    dataset.create_tables(engine)
+    rows = dataset.generate(n_companies, missing=0.0)
+    rows["companies"][0]["title"] = "Apple"
+    rows["companies"][1]["title"] = "Walmart"
+    years_2022 = [row for row in rows["years"] if row["year"] == 2022]
+    others = sum(row["scope1_2_3"] - row["scope1_2"] for row in years_2022[1:])
+    years_2022[0]["scope1_2_3"] = years_2022[0]["scope1_2"] + SCOPE3_2022 - others
+    with sessionmaker(bind=engine)() as session:
+        dataset.load(session, rows)
+    engine.dispose()
+
+
+if SEED:
+    seed(os.environ["HEROKU_DATABASE_URL"])
+_engine = create_engine(os.environ["HEROKU_DATABASE_URL"])
+with sessionmaker(bind=_engine)() as _session:
+    database_version.refresh(_session, force=True)
+_engine.dispose()
+
+
+@pytest.fixture
+def query_budget():
+    """QueryBudget, to use as `with query_budget(2): ...` in a test"""
+    return QueryBudget
@@ -0,0 +1,103 @@
+"""Test the awaitable CRUD operations against an AsyncSession."""
+import asyncio
+import os
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.climate_api import async_crud, cache, database
+from src.climate_api.config import async_url, normalize_url, settings
+from src.climate_api.main import app
+
+
+def test_async_url():
+    """Test swapping database drivers for their async equivalents."""
+    assert async_url("postgresql://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+    assert (
+        async_url("postgresql+psycopg2://u:p@host/db")
+        == "postgresql+asyncpg://u:p@host/db"
+    )
+    assert async_url("sqlite:///climate.db") == "sqlite+aiosqlite:///climate.db"
+    with pytest.raises(ValueError):
+        async_url("mysql://u:p@host/db")
+
+
+def run_with_async_session(fn, *args):
+    """Await a coroutine function with a fresh AsyncSession as its first argument."""
+    pytest.importorskip("greenlet")
+    # pylint: disable=import-outside-toplevel
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    url = async_url(normalize_url(os.environ.get("HEROKU_DATABASE_URL")))
+    try:
+        engine = create_async_engine(url)
+    except ImportError as e:
+        pytest.skip(f"Async driver not installed: {e}")
+
+    async def main():
+        async with AsyncSession(engine) as session:
+            result = await fn(session, *args)
+        await engine.dispose()
+        return result
+
+    return asyncio.run(main())
+
+
+def test_get_company_years():
+    """Test getting a list of company years through an AsyncSession."""
+    company_years = run_with_async_session(async_crud.get_company_years, "Walmart")
+    assert company_years is not None
+    assert len(company_years) == 18
+
+
+def test_get_companies_with_relationships():
+    """Test eager loading relationships through an AsyncSession."""
+    companies = run_with_async_session(
+        lambda db: async_crud.get_companies(db, limit=5, include=["years", "goal"])
+    )
+    assert len(companies) == 5
+    for company in companies:
+        assert isinstance(company.years, list)
+
+
+class BlockingBackend(cache.MemoryBackend):
+    """Memory backend flagged as blocking, recording the threads it runs on."""
+
+    blocking = True
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def get(self, key: str):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key: str, value, ttl: float) -> None:
+        self.threads.add(threading.get_ident())
+        super().set(key, value, ttl)
+
+
+def test_blocking_backend_off_loop(monkeypatch):
+    """Test a blocking cache backend is called on the thread pool, not the loop."""
+    blocking = BlockingBackend()
+    monkeypatch.setattr(cache, "backend", blocking)
+    company = run_with_async_session(async_crud.get_company, "Walmart")
+    assert company.title == "Walmart"
+    assert blocking.threads
+    assert threading.get_ident() not in blocking.threads
+
+
+@pytest.mark.skipif(not settings.async_mode, reason="Needs DB_MODE=async")
+def test_async_mode_creates_no_sync_engine(monkeypatch):
+    """Test serving requests and reading the dataset version in async mode
+    never builds the synchronous engine."""
+    monkeypatch.setattr(database, "_engine", None)
+    monkeypatch.setattr(cache.database_version, "interval", 0)
+    with TestClient(app) as client:
+        assert client.get("/companies/Apple").status_code == 200
+        assert client.get("/companies/search", params={"q": "wal"}).status_code == 200
+        assert client.get("/year", params={"limit": 5}).status_code == 200
+    assert database._engine is None  # pylint: disable=protected-access
+    assert "sync" not in database.pool_status()
@@ -0,0 +1,80 @@
+"""Test the bulk workbook loader."""
+import math
+import unittest
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.climate_api.database import Base
+from src.climate_api.internal import Company, CompanySummary, CompanyYear, Year
+
+# The loader needs pandas, which only the populate_db scripts use
+pd = pytest.importorskip("pandas")
+
+# pylint: disable=wrong-import-position
+from src.climate_api.populate_db.bulk_load import bulk_load, prepare
+
+YEARS = list(range(2005, 2024))
+
+
+def sheets():
+    """Two companies, one with a goal and a missing 2006 value."""
+    scope12 = pd.DataFrame(
+        [["Acme 1+2"] + [10.0] * len(YEARS), ["Globex 1+2"] + [20.0] * len(YEARS)],
+        columns=["Company Name"] + YEARS,
+    )
+    scope12.loc[0, 2006] = float("nan")
+    scope123 = pd.DataFrame(
+        [["Acme 1+2+3"] + [100.0] * len(YEARS), ["Globex 1+2+3"] + [200.0] * len(YEARS)],
+        columns=["Company Name"] + YEARS,
+    )
+    goals = pd.DataFrame(
+        [
+            {
+                "Company Name": "Globex",
+                "Link": "https://example.com",
+                "Scope 1,2 Year": 2030,
+                "Scope 1,2 Goal": 50.0,
+                "Scope 1,2,3 Year": float("nan"),
+                "Scope 1,2,3 Goal": float("nan"),
+                "Reference Year": 2019,
+            }
+        ]
+    )
+    return scope12, scope123, goals
+
+
+class TestBulkLoad(unittest.TestCase):
+    """Class to test the bulk loader."""
+
+    def test_prepare_ids(self):
+        """Year ids match the numbering used by populate_emissions."""
+        tables = prepare(*sheets())
+        years = tables["years"]
+        self.assertEqual(len(years), 2 * 18)
+        self.assertNotIn(2007, set(years["year"]))
+        second = years[(years["id"] == 19 + 2)]
+        self.assertEqual(second.iloc[0]["year"], 2005)
+        self.assertIsNone(years[years["id"] == 3].iloc[0]["scope1_2"])
+
+    def test_bulk_load(self):
+        """Every table is loaded and summarized."""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        counts = bulk_load(*sheets(), session)
+        self.assertEqual(counts["companies"], 2)
+        self.assertEqual(session.query(Year).count(), 36)
+        self.assertEqual(session.query(CompanyYear).count(), 36)
+        globex = session.query(Company).filter(Company.title == "Globex").one()
+        self.assertEqual(globex.goal.scope12_target_year, 2030)
+        self.assertIsNone(globex.goal.scope3_target_year)
+        self.assertEqual(globex.report_link, "https://example.com")
+        summary = session.get(CompanySummary, globex.id)
+        self.assertEqual(summary.year_count, 18)
+        self.assertTrue(math.isclose(summary.scope1_2_change, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
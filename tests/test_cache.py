@@ -0,0 +1,236 @@
+"""Test the read cache and its backends."""
+import io
+import json
+import socketserver
+import threading
+import time
+
+import pytest
+
+from src.climate_api import cache as cache_module
+from src.climate_api import models
+from src.climate_api.cache import (
+    CacheBackend,
+    MemoryBackend,
+    RedisBackend,
+    TTLCache,
+    backend,
+    cached,
+    dumps,
+    invalidate,
+    loads,
+)
+from src.climate_api.redis_protocol import (
+    ConnectionClosed,
+    RedisClient,
+    RedisError,
+    read_reply,
+)
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Answer the subset of Redis commands the cache uses."""
+
+    def handle(self):
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except RedisError:
+                return
+            self.wfile.write(self.server.dispatch(command))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """In-process stand-in for a Redis server."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.data = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        """redis:// URL of the server."""
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def dispatch(self, command):
+        """Apply one command and encode its reply."""
+        name, args = command[0].upper(), command[1:]
+        with self.lock:
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name == b"GET":
+                value, expires = self.data.get(args[0], (None, None))
+                if value is None or (expires and expires < time.monotonic()):
+                    return b"$-1\r\n"
+                return b"$%d\r\n%s\r\n" % (len(value), value)
+            if name == b"SET":
+                expires = None
+                if len(args) == 4 and args[2].upper() == b"PX":
+                    expires = time.monotonic() + int(args[3]) / 1000
+                self.data[args[0]] = (args[1], expires)
+                return b"+OK\r\n"
+            if name == b"INCR":
+                value = int(self.data.get(args[0], (b"0", None))[0]) + 1
+                self.data[args[0]] = (str(value).encode(), None)
+                return b":%d\r\n" % value
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+def redis_url():
+    """Start a fake Redis server for the duration of a test."""
+    server = FakeRedisServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.url
+    server.shutdown()
+    server.server_close()
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    lru = TTLCache(max_entries=2)
+    lru.set("a", 1, ttl=60)
+    lru.set("b", 2, ttl=60)
+    assert lru.get("a") == (True, 1)
+    lru.set("c", 3, ttl=60)
+    assert lru.get("b") == (False, None)
+    assert lru.get("a") == (True, 1)
+    assert lru.get("c") == (True, 3)
+    assert lru.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    """Test that entries are dropped once their TTL passes."""
+    lru = TTLCache()
+    lru.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert lru.get("a") == (False, None)
+    assert lru.stats()["entries"] == 0
+
+
+def test_cached_function():
+    """Test that cached reads share entries between call styles until invalidated."""
+    calls = []
+
+    @cached(ttl=60)
+    def cached_lookup(db, name, year=2020):
+        calls.append((db, name, year))
+        return f"{name}-{year}"
+
+    invalidate()
+    assert cached_lookup("session", "Apple") == "Apple-2020"
+    assert cached_lookup("other session", name="Apple", year=2020) == "Apple-2020"
+    assert len(calls) == 1
+    assert backend.stats()["hits"]["cached_lookup"] >= 1
+    invalidate()
+    cached_lookup("session", "Apple")
+    assert len(calls) == 2
+
+
+def test_memory_backend_version():
+    """Test that bumping the dataset version frees every entry."""
+    memory = MemoryBackend()
+    memory.set("key", "value", ttl=60)
+    assert memory.lookup("test", "key") == (True, "value")
+    assert memory.bump_dataset_version() == 1
+    assert memory.lookup("test", "key") == (False, None)
+    assert memory.stats()["hits"]["test"] == 1
+    assert memory.stats()["misses"]["test"] == 1
+
+
+def test_redis_backend(redis_url):
+    """Test storing values and sharing the dataset version between workers."""
+    worker_1 = RedisBackend(RedisClient(redis_url), version_interval=0)
+    worker_2 = RedisBackend(RedisClient(redis_url), version_interval=0)
+    worker_1.set("key", {"title": "Apple", "years": [2019, 2020]}, ttl=60)
+    assert worker_2.get("key") == (True, {"title": "Apple", "years": [2019, 2020]})
+    assert worker_2.get("missing") == (False, None)
+    assert worker_2.dataset_version() == 0
+    assert worker_1.bump_dataset_version() == 1
+    assert worker_2.dataset_version() == 1
+    assert worker_2.dataset_modified() == worker_1.dataset_modified()
+
+
+def test_cached_function_with_redis(redis_url, monkeypatch):
+    """Test that one worker's invalidate() reaches every worker's cached reads."""
+    worker_1 = RedisBackend(RedisClient(redis_url), version_interval=0)
+    worker_2 = RedisBackend(RedisClient(redis_url), version_interval=0)
+    calls = []
+
+    @cached(ttl=60)
+    def shared_lookup(db, name):
+        calls.append(name)
+        return name.upper()
+
+    monkeypatch.setattr(cache_module, "backend", worker_1)
+    assert shared_lookup(None, "apple") == "APPLE"
+    monkeypatch.setattr(cache_module, "backend", worker_2)
+    assert shared_lookup(None, "apple") == "APPLE"
+    assert calls == ["apple"]
+    worker_1.bump_dataset_version()
+    assert shared_lookup(None, "apple") == "APPLE"
+    assert calls == ["apple", "apple"]
+
+
+def test_redis_backend_unreachable():
+    """Test that an unreachable server degrades to cache misses."""
+    unreachable = RedisBackend(RedisClient("redis://127.0.0.1:1/0", timeout=0.1))
+    unreachable.set("key", "value", ttl=60)
+    assert unreachable.lookup("test", "key") == (False, None)
+    assert unreachable.stats()["errors"] == 2
+    unreachable.bump_dataset_version()
+    assert unreachable.stats()["errors"] == 3
+
+
+def test_backend_is_abstract():
+    """Test that a backend must implement every storage and version method."""
+
+    class Partial(CacheBackend):  # pylint: disable=abstract-method
+        """Backend without the version methods."""
+
+        def get(self, key):
+            return False, None
+
+        def set(self, key, value, ttl):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()  # pylint: disable=abstract-class-instantiated
+
+
+def test_json_values(redis_url):
+    """Test that values round trip through JSON, models and tuples included."""
+    value = {
+        "years": [models.Year(id=1, year=2020, scope1_2=1.5, scope1_2_3=None)],
+        "changes": [(1, "Apple", 2010, 2.0)],
+    }
+    assert loads(dumps(value)) == value
+    worker = RedisBackend(RedisClient(redis_url))
+    worker.set("key", value, ttl=60)
+    raw = worker.client.execute("GET", worker.prefix + "key")
+    assert json.loads(raw)["years"][0]["__model__"] == "Year"
+    assert worker.get("key") == (True, value)
+    with pytest.raises(ValueError):
+        loads(b'{"__model__": "BaseModel", "fields": {}}')
+
+
+def test_connection_closed():
+    """Test that a reply cut short raises ConnectionClosed."""
+    with pytest.raises(ConnectionClosed):
+        read_reply(io.BytesIO(b"$5\r\nab"))
+    with pytest.raises(ConnectionClosed):
+        read_reply(io.BytesIO(b""))
+
+
+def test_failed_auth_not_reused(redis_url):
+    """Test a connection whose AUTH was refused is closed, not reused."""
+    client = RedisClient(redis_url.replace("redis://", "redis://:secret@"))
+    for _ in range(2):
+        with pytest.raises(RedisError):
+            client.execute("GET", "key")
+        assert client._local.sock is None  # pylint: disable=protected-access
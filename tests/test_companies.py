@@ -1,7 +1,9 @@
 """Test the companies endpoint."""
 
+import pytest
 from fastapi.testclient import TestClient
 from src.climate_api.routers.companies import router
+from src.climate_api.main import app
 from src.climate_api.models import Company, Year, Goal
 from pydantic import ValidationError
 
@@ -13,6 +15,98 @@ def test_get_companies_list():
     response = client.get("/companies")
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+    assert "years" not in response.json()[0]
+
+
+def test_get_companies_list_include():
+    """Test the /companies endpoint with embedded relationships."""
+    response = client.get("/companies?limit=5&include=years&include=goal")
+    assert response.status_code == 200
+    for company in response.json():
+        assert isinstance(company["years"], list)
+        assert "goal" in company
+        for year in company["years"]:
+            Year(**year)
+
+
+def test_get_companies_list_cursor():
+    """Test paging through /companies with X-Next-Cursor."""
+    # One page holding the whole dataset, not the default page of 100
+    response = client.get("/companies", params={"limit": 1_000_000})
+    everything = [company["id"] for company in response.json()]
+    assert "x-next-cursor" not in response.headers
+    ids, params = [], {"limit": 7}
+    while True:
+        response = client.get("/companies", params=params)
+        assert response.status_code == 200
+        ids += [company["id"] for company in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+        params = {"limit": 7, "cursor": cursor}
+    assert ids == everything == sorted(everything)
+
+
+def test_get_companies_list_bad_cursor():
+    """Test /companies rejects a cursor that was not issued by it."""
+    app_client = TestClient(app)
+    cursor = client.get("/companies?limit=1").headers["x-next-cursor"]
+    response = app_client.get("/companies", params={"cursor": "nope"})
+    assert response.status_code == 400
+    assert app_client.get("/year", params={"cursor": cursor}).status_code == 400
+
+
+def test_get_company_batch():
+    """Test the /companies/batch endpoint."""
+    response = client.post(
+        "/companies/batch",
+        json={
+            "companies": ["Apple", "Walmart", "Nope"],
+            "fields": ["years", "goal", "change"],
+        },
+    )
+    assert response.status_code == 200
+    batch = response.json()
+    assert set(batch["companies"]) == {"Apple", "Walmart"}
+    assert batch["not_found"] == ["Nope"]
+    walmart = batch["companies"]["Walmart"]
+    years = [Year(**year).year for year in walmart["years"]]
+    assert years == sorted(years)
+    assert "goal" in walmart
+    single = client.get("/companies/Walmart/change_1_2_3").json()
+    assert walmart["change"]["change_1_2_3"] == single
+
+
+def test_get_company_batch_fields():
+    """Test /companies/batch only returns the fields asked for."""
+    response = client.post("/companies/batch", json={"companies": ["Apple"]})
+    apple = response.json()["companies"]["Apple"]
+    assert apple["title"] == "Apple"
+    assert not {"years", "goal", "change"} & set(apple)
+
+
+def test_get_company_profile():
+    """Test /companies/{company}/profile matches the separate endpoints."""
+    profile = client.get("/companies/Apple/profile").json()
+    assert profile["title"] == "Apple"
+    assert profile["years"] == client.get("/companies/Apple/all_years").json()
+    assert profile["goal"] == client.get("/companies/Apple/goals").json()
+    change = profile["change"]
+    assert change["change_1_2"] == client.get("/companies/Apple/change_1_2").json()
+    assert (
+        change["percent_change_1_2_3"]
+        == client.get("/companies/Apple/change_1_2_3?percent=True").json()
+    )
+
+
+def test_get_company_profile_fields():
+    """Test the fields parameter leaves out the parts not asked for."""
+    response = client.get("/companies/Apple/profile", params={"fields": "years"})
+    profile = response.json()
+    assert profile["years"]
+    assert not {"goal", "change"} & set(profile)
+    missing = TestClient(app).get("/companies/Nope/profile")
+    assert missing.status_code == 404
 
 
 def test_get_company():
@@ -70,6 +164,29 @@ def test_get_company_change_with_year_1_2_3():
     assert isinstance(response.json(), float)
 
 
+def test_get_company_change_with_year_matches_years():
+    """Test the change between two years agrees with the years themselves."""
+    start = client.get("/companies/Apple/2019").json()
+    end = client.get("/companies/Apple/2022").json()
+    change = client.get("/companies/Apple/change_1_2/2019_2022").json()
+    assert change == pytest.approx(end["scope1_2"] - start["scope1_2"])
+    percent = client.get(
+        "/companies/Apple/change_1_2/2019_2022", params={"percent": True}
+    ).json()
+    assert percent == pytest.approx(100 * change / start["scope1_2"])
+
+
+def test_get_company_change_with_year_not_found():
+    """Test an unknown year or company is a 404, not an error."""
+    app_client = TestClient(app)
+    for path in (
+        "/companies/Apple/change_1_2/1990_2020",
+        "/companies/Apple/change_1_2_3/2019_2090",
+        "/companies/Nobody/change_1_2/2019_2022",
+    ):
+        assert app_client.get(path).status_code == 404
+
+
 def test_get_company_goal():
     """Test the /companies/{company}/goals endpoint."""
     response = client.get("/companies/Apple/goals")
@@ -0,0 +1,91 @@
+"""Test gzip response compression."""
+import os
+
+from fastapi.testclient import TestClient
+
+from src.climate_api.compression import CompressionMiddleware, choose_encoding
+from src.climate_api.main import app
+from src.climate_api.routers.years import router
+
+client = TestClient(app)
+
+
+def test_choose_encoding():
+    """Test Accept-Encoding negotiation falls back to gzip and honours q=0."""
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("") is None
+    assert choose_encoding("*") in ("br", "gzip")
+
+
+def test_compresses_large_pages():
+    """Test a full page is gzipped and a tiny body is sent as it is."""
+    response = client.get("/year", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].startswith('W/"')
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert isinstance(response.json(), list)
+
+    response = client.get("/year/2019/total", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
+
+
+def test_uncompressed_responses_vary():
+    """Test identity responses also vary on Accept-Encoding for shared caches."""
+    response = client.get("/year", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert not response.headers["etag"].startswith("W/")
+
+
+def test_compressed_etag_still_matches():
+    """Test the weakened ETag of a compressed page still revalidates."""
+    headers = {"Accept-Encoding": "gzip"}
+    page = client.get("/year", headers=headers)
+    etag = page.headers["etag"]
+    response = client.get("/year", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert "Accept-Encoding" in response.headers["vary"]
+    since = {**headers, "If-Modified-Since": page.headers["last-modified"]}
+    response = client.get("/year", headers=since)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+def test_caches_compressed_bodies():
+    """Test a cacheable page is compressed once and served from the cache."""
+    middleware = CompressionMiddleware(router, minimum_size=100)
+    compressing = TestClient(middleware)
+    headers = {"Accept-Encoding": "gzip"}
+    first = compressing.get("/year", headers=headers)
+    second = compressing.get("/year", headers=headers)
+    assert (middleware.misses, middleware.hits) == (1, 1)
+    assert first.content == second.content
+    plain = client.get("/year", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert first.json() == plain.json()
+
+
+def test_compressed_cache_bounded_by_bytes():
+    """Test the compressed bodies kept never add up to more than cache_bytes."""
+    middleware = CompressionMiddleware(router, cache_bytes=2000)
+    middleware.cached_body(('"large"', "gzip"), os.urandom(5000))
+    assert middleware.hits == middleware.misses - 1 == 0
+    assert not middleware._cache  # pylint: disable=protected-access
+    for tag in ("a", "b", "c"):
+        middleware.cached_body((f'"{tag}"', "gzip"), b"x" * 50000)
+    kept = middleware._cache.values()  # pylint: disable=protected-access
+    assert sum(map(len, kept)) <= 2000
+    middleware.cached_body(('"c"', "gzip"), b"x" * 50000)
+    assert middleware.hits == 1
+
+
+def test_compresses_streamed_exports():
+    """Test a streamed export is compressed chunk by chunk."""
+    response = client.get("/export/emissions", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text.count("\n") > 1
@@ -2,17 +2,24 @@
 import math
 import unittest
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from src.climate_api.crud import (
     get_companies,
     get_company,
+    get_company_rows,
+    get_company_batch,
+    get_company_summary,
     get_company_year,
     get_company_years,
+    get_company_year_rows,
     get_goal,
     get_emissions,
+    get_emission_rows,
     get_all_emissions,
+    get_all_emission_rows,
     get_scope3_emissions,
+    get_year_summary,
 )
 
 
@@ -44,6 +51,35 @@ class TestCrudMethods(unittest.TestCase):
         self.assertIsNotNone(company)
         self.assertEqual(company.title, "Walmart")
 
+    def test_get_company_batch(self):
+        """Test a batch of companies costs three queries however many there are."""
+        others = [
+            company.title
+            for company in get_companies(self.session, limit=15)
+            if company.title != "Walmart"
+        ]
+        names = ["Walmart"] + others[:14]
+        statements = []
+
+        def count(*args):
+            statements.append(args[2])
+
+        event.listen(self.session.get_bind(), "before_cursor_execute", count)
+        try:
+            batch = get_company_batch(
+                self.session, names, include=("years", "goal", "summary")
+            )
+        finally:
+            event.remove(self.session.get_bind(), "before_cursor_execute", count)
+        self.assertEqual(set(batch), set(names))
+        self.assertEqual(len(statements), 3)
+        walmart = batch["Walmart"]
+        self.assertEqual(
+            [year.year for year in walmart["years"]],
+            [year.year for year in get_company_years(self.session, "Walmart")],
+        )
+        self.assertEqual(walmart["summary"].company_id, walmart["company"].id)
+
     def test_get_company_year(self):
         """Test getting a single company year."""
         company_year = get_company_year(self.session, "Walmart", 2022)
@@ -55,6 +91,29 @@ class TestCrudMethods(unittest.TestCase):
         company_years = get_company_years(self.session, "Walmart")
         self.assertIsNotNone(company_years)
         self.assertEqual(len(company_years), 18)
+        years = [company_year.year for company_year in company_years]
+        self.assertEqual(years, sorted(years))
+
+    def test_get_company_years_unknown_company(self):
+        """Test that an unknown company returns None rather than no years."""
+        self.assertIsNone(get_company_years(self.session, "Not A Company"))
+        self.assertIsNone(get_company_year(self.session, "Not A Company", 2022))
+
+    def test_get_company_summary(self):
+        """Test that the precomputed summary matches the company's years."""
+        summary = get_company_summary(self.session, "Walmart")
+        self.assertIsNotNone(summary)
+        self.assertEqual(summary.year_count, 18)
+        reported = [
+            year for year in get_company_years(self.session, "Walmart")
+            if year.scope1_2 is not None
+        ]
+        self.assertEqual(summary.scope1_2_first_year, reported[0].year)
+        self.assertEqual(summary.scope1_2_last_year, reported[-1].year)
+        self.assertAlmostEqual(
+            summary.scope1_2_change, reported[-1].scope1_2 - reported[0].scope1_2
+        )
+        self.assertIsNone(get_company_summary(self.session, "Not A Company"))
 
     def test_get_goal(self):
         """Test getting a goal."""
@@ -74,11 +133,56 @@ class TestCrudMethods(unittest.TestCase):
         self.assertIsNotNone(all_emissions)
         self.assertEqual(len(all_emissions), 10)
 
+    def test_row_reads_match_orm_reads(self):
+        """Test the dict reads return the same fields as the ORM reads."""
+        fields = ["id", "year", "scope1_2", "scope1_2_3"]
+
+        def as_dicts(years):
+            return [{field: getattr(year, field) for field in fields} for year in years]
+
+        self.assertEqual(
+            get_all_emission_rows(self.session, limit=10, after=3),
+            as_dicts(get_all_emissions(self.session, limit=10, after=3)),
+        )
+        self.assertEqual(
+            get_emission_rows(self.session, 2019),
+            as_dicts(get_emissions(self.session, 2019)),
+        )
+        self.assertEqual(
+            get_company_year_rows(self.session, "Apple"),
+            as_dicts(get_company_years(self.session, "Apple")),
+        )
+        self.assertIsNone(get_company_year_rows(self.session, "Not a company"))
+        companies = get_company_rows(self.session, limit=5)
+        self.assertEqual(
+            [company["title"] for company in companies],
+            [company.title for company in get_companies(self.session, limit=5)],
+        )
+
+    def test_get_all_emissions_after(self):
+        """Test keyset paging skips years without emissions in SQL."""
+        first = get_all_emissions(self.session, limit=10)
+        second = get_all_emissions(self.session, limit=10, after=first[-1].id)
+        self.assertEqual(len(second), 10)
+        self.assertGreater(second[0].id, first[-1].id)
+        for year in first + second:
+            self.assertTrue(year.scope1_2 is not None or year.scope1_2_3 is not None)
+
     def test_get_scope3_emissions(self):
         """Test getting scope 3 emissions."""
         scope3_emissions = get_scope3_emissions(self.session, 2022)
         self.assertEqual(math.floor(scope3_emissions), 3819)
 
+    def test_get_year_summary(self):
+        """Test summing a year over every company, not just the first 100."""
+        summary = get_year_summary(self.session, 2022)
+        self.assertIsNotNone(summary)
+        emissions = get_emissions(self.session, 2022, limit=100_000)
+        self.assertEqual(summary.companies, len(emissions))
+        scope1_2 = sum(e.scope1_2 for e in emissions if e.scope1_2 is not None)
+        self.assertAlmostEqual(summary.scope1_2, scope1_2, places=3)
+        self.assertIsNone(get_year_summary(self.session, 1900))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,43 @@
+"""Test the /export endpoints."""
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+from src.climate_api.routers.export import router
+
+client = TestClient(router)
+
+
+def test_export_emissions_ndjson():
+    """Test /export/emissions streams one JSON object per company year."""
+    response = client.get("/export/emissions")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows
+    assert set(rows[0]) == {"company", "year", "scope1_2", "scope1_2_3"}
+    apple = [row["year"] for row in rows if row["company"] == "Apple"]
+    assert apple == sorted(apple)
+
+
+def test_export_emissions_csv():
+    """Test /export/emissions?format=csv has a header and a line per row."""
+    ndjson = client.get("/export/emissions").text.splitlines()
+    response = client.get("/export/emissions", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "emissions.csv" in response.headers["content-disposition"]
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["company", "year", "scope1_2", "scope1_2_3"]
+    assert len(rows) - 1 == len(ndjson)
+
+
+def test_export_companies():
+    """Test /export/companies streams every company with its goal columns."""
+    response = client.get("/export/companies")
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    assert "Apple" in {row["title"] for row in rows}
+    assert "scope12_target_year" in rows[0]
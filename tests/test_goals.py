@@ -0,0 +1,42 @@
+"""Test the /goals endpoints."""
+from fastapi.testclient import TestClient
+
+from src.climate_api.crud import scope_progress
+from src.climate_api.main import app
+from src.climate_api.models import GoalProgress
+
+client = TestClient(app)
+
+
+def test_scope_progress_on_track():
+    """Test a company that cut emissions 30% halfway to a 50% goal is on track."""
+    progress = scope_progress(2020, 100.0, 2030, 50.0, 2025, 70.0)
+    assert progress.achieved_percent == 30.0
+    assert progress.expected_percent == 25.0
+    assert progress.projected_percent == 60.0
+    assert progress.on_track
+
+
+def test_scope_progress_missing_data():
+    """Test progress can't be judged without a reference value."""
+    progress = scope_progress(2020, None, 2030, 50.0, 2025, 70.0)
+    assert progress.achieved_percent is None
+    assert progress.on_track is None
+    behind = scope_progress(2020, 100.0, 2030, 50.0, 2025, 110.0)
+    assert behind.achieved_percent == -10.0
+    assert behind.on_track is False
+
+
+def test_get_goal_progress():
+    """Test the /goals/progress endpoint."""
+    response = client.get("/goals/progress")
+    assert response.status_code == 200
+    progress = [GoalProgress(**entry) for entry in response.json()]
+    assert progress
+    apple = client.get("/goals/progress", params={"company": "Apple"}).json()
+    assert len(apple) == 1
+    assert apple[0]["title"] == "Apple"
+    goal = client.get("/companies/Apple/goals").json()
+    assert apple[0]["scope1_2"]["target_year"] == goal["scope12_target_year"]
+    missing = client.get("/goals/progress", params={"company": "Nope"})
+    assert missing.status_code == 404
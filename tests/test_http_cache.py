@@ -0,0 +1,77 @@
+"""Test conditional GETs with ETag and Last-Modified."""
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.climate_api.cache import (
+    backend,
+    database_version,
+    invalidate,
+    record_load,
+)
+from src.climate_api.config import settings
+from src.climate_api.http_cache import etag_matches
+from src.climate_api.main import app
+
+client = TestClient(app)
+
+
+def test_etag_matches():
+    """Test If-None-Match lists and weak tags are understood."""
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+
+
+def test_not_modified_without_queries(query_budget):
+    """Test a current ETag gets a 304 without touching the database."""
+    response = client.get("/year", params={"limit": 5})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert "max-age" in response.headers["cache-control"]
+    # Listens on every engine, so async mode is counted as well
+    with query_budget(0):
+        cached = client.get(
+            "/year", params={"limit": 5}, headers={"If-None-Match": etag}
+        )
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+
+def test_etag_per_url_and_version():
+    """Test the ETag changes with the query string and after a reload."""
+    etag = client.get("/companies/Apple").headers["etag"]
+    assert client.get("/companies/Walmart").headers["etag"] != etag
+    invalidate()
+    response = client.get("/companies/Apple", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_load_by_another_process(monkeypatch):
+    """Test a load recorded in the database changes the ETag without invalidate()."""
+    etag = client.get("/companies/Apple").headers["etag"]
+    backend_version = backend.dataset_version()
+    # A loader has its own engine and its own copy of the cache backend
+    engine = create_engine(settings.database_url)
+    with sessionmaker(bind=engine)() as session:
+        record_load(session)
+        session.commit()
+    engine.dispose()
+    # The next request reads the row through its own session
+    monkeypatch.setattr(database_version, "interval", 0)
+    response = client.get("/companies/Apple", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert backend.dataset_version() == backend_version
+
+
+def test_if_modified_since():
+    """Test Last-Modified can be sent back instead of the ETag."""
+    modified = client.get("/year/2019/total").headers["last-modified"]
+    response = client.get("/year/2019/total", headers={"If-Modified-Since": modified})
+    assert response.status_code == 304
+    stale = "Mon, 01 Jan 2001 00:00:00 GMT"
+    response = client.get("/year/2019/total", headers={"If-Modified-Since": stale})
+    assert response.status_code == 200
@@ -0,0 +1,58 @@
+"""Test the /internal endpoints."""
+import dataclasses
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.climate_api.config import settings
+from src.climate_api.main import app
+from src.climate_api.routers import internal
+
+client = TestClient(app)
+
+TOKEN = "test-token"
+AUTHORIZED = {"Authorization": f"Bearer {TOKEN}"}
+
+
+@pytest.fixture
+def token(monkeypatch):
+    """Enable the internal endpoints with TOKEN."""
+    monkeypatch.setattr(
+        internal, "settings", dataclasses.replace(settings, internal_token=TOKEN)
+    )
+
+
+def test_disabled_without_token():
+    """Test the internal endpoints don't exist unless INTERNAL_TOKEN is set."""
+    assert client.get("/internal/pool").status_code == 404
+    assert client.get("/internal/pool", headers=AUTHORIZED).status_code == 404
+
+
+def test_requires_token(token):  # pylint: disable=redefined-outer-name,unused-argument
+    """Test a request without the right bearer token is refused."""
+    assert client.get("/internal/pool").status_code == 401
+    wrong = {"Authorization": "Bearer nope"}
+    assert client.get("/internal/pool", headers=wrong).status_code == 401
+
+
+def test_get_pool_status(token):  # pylint: disable=redefined-outer-name,unused-argument
+    """Test the /internal/pool endpoint after serving a request."""
+    assert client.get("/companies/Apple").status_code == 200
+    response = client.get("/internal/pool", headers=AUTHORIZED)
+    assert response.status_code == 200
+    stats = response.json()["async" if settings.async_mode else "sync"]
+    assert stats["checkouts"] >= 1
+    assert stats["checkouts"] >= stats["checkins"]
+    assert stats["wait_seconds_total"] >= 0
+
+
+def test_cache_endpoints(token):  # pylint: disable=redefined-outer-name,unused-argument
+    """Test reading and invalidating the cache needs the token."""
+    assert client.get("/internal/cache").status_code == 401
+    assert client.post("/internal/cache/invalidate").status_code == 401
+    version = client.get("/internal/cache", headers=AUTHORIZED).json()[
+        "dataset_version"
+    ]
+    response = client.post("/internal/cache/invalidate", headers=AUTHORIZED)
+    assert response.status_code == 200
+    assert response.json()["dataset_version"] == version + 1
@@ -0,0 +1,137 @@
+"""Test the in-memory store answers like the database."""
+import inspect
+import math
+import unittest
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks import dataset
+from src.climate_api import crud, memory_store
+from src.climate_api.cache import database_version, record_load
+from src.climate_api.database import SessionLocal, get_engine
+from src.climate_api.memory_store import EmissionsStore
+from src.climate_api.populate_db.refresh_summaries import refresh_summaries
+
+pytest.importorskip("numpy")
+
+
+def same(left, right):
+    """Compare API models, treating floats as equal up to rounding."""
+    if isinstance(left, list) or isinstance(right, list):
+        return len(left) == len(right) and all(map(same, left, right))
+    if left is None or right is None:
+        return left is right
+    left, right = left.dict(), right.dict()
+    if set(left) != set(right):
+        return False
+    for key, value in left.items():
+        other = right[key]
+        if isinstance(value, float) and isinstance(other, float):
+            if not math.isclose(value, other, rel_tol=1e-9, abs_tol=1e-9):
+                return False
+        elif value != other:
+            return False
+    return True
+
+
+class TestMemoryStore(unittest.TestCase):
+    """Class to test EmissionsStore against the crud queries."""
+
+    @classmethod
+    def setUpClass(cls):
+        engine = create_engine("sqlite://")
+        dataset.create_tables(engine)
+        cls.session = sessionmaker(bind=engine)()
+        dataset.load(cls.session, dataset.generate(30, seed=3, missing=0.4))
+        # A company without any years
+        cls.session.execute(
+            dataset.Company.__table__.insert(), [{"id": 31, "title": "Empty"}]
+        )
+        cls.session.commit()
+        refresh_summaries(cls.session)
+        cls.store = EmissionsStore.from_session(cls.session)
+        cls.names = [f"Company {i:07d}" for i in range(1, 31)] + ["Empty", "Nope"]
+
+    def check(self, name, *args):
+        """Compare one crud function, bypassing its cache and the store."""
+        expected = inspect.unwrap(getattr(crud, name))(self.session, *args)
+        model = {
+            "get_company": crud.models.Company,
+            "get_company_summary": crud.models.CompanySummary,
+        }.get(name, crud.models.Year)
+        if isinstance(expected, list):
+            expected = [model.from_orm(row) for row in expected]
+        elif expected is not None and not isinstance(
+            expected, crud.models.YearSummary
+        ):
+            expected = model.from_orm(expected)
+        actual = getattr(self.store, name)(*args)
+        self.assertTrue(same(expected, actual), f"{name}{args}: {expected} != {actual}")
+
+    def test_company_reads(self):
+        """Test company lookups match the database."""
+        for name in self.names:
+            self.check("get_company", name)
+            self.check("get_company_years", name)
+            self.check("get_company_summary", name)
+            for year in (2005, 2007, 2019, 2030):
+                self.check("get_company_year", name, year)
+
+    def test_year_reads(self):
+        """Test per year reads and totals match the database."""
+        for year in (2005, 2007, 2019, 2023, 2030):
+            self.check("get_emissions", year)
+            self.check("get_year_summary", year)
+
+    def test_changes(self):
+        """Test every company's first and last values match the database."""
+        get_changes = inspect.unwrap(crud.get_changes)
+        for scope in ("scope1_2", "scope1_2_3"):
+            for start, end in ((None, None), (2005, 2023), (2010, 2030)):
+                expected = sorted(get_changes(self.session, scope, start, end))
+                actual = sorted(self.store.get_changes(scope, start, end))
+                self.assertEqual(len(expected), len(actual))
+                for left, right in zip(expected, actual):
+                    self.assertEqual(left[:3], right[:3])
+                    self.assertEqual(left[4], right[4])
+                    self.assertTrue(math.isclose(left[3], right[3]))
+                    self.assertTrue(math.isclose(left[5], right[5]))
+
+    def test_series(self):
+        """Test ranged series match the database."""
+        get_company_series = inspect.unwrap(crud.get_company_series)
+        for name in self.names:
+            for start, end in ((None, None), (2007, 2015), (2020, 2030)):
+                expected = get_company_series(
+                    self.session, name, "scope1_2_3", start, end
+                )
+                actual = self.store.get_company_series(name, "scope1_2_3", start, end)
+                if expected is None:
+                    self.assertIsNone(actual)
+                    continue
+                self.assertEqual(
+                    [year for year, _ in expected], [year for year, _ in actual]
+                )
+                for (_, left), (_, right) in zip(expected, actual):
+                    self.assertTrue(
+                        left is right is None or math.isclose(left, right)
+                    )
+
+
+def test_reloaded_after_load(monkeypatch):
+    """Test a load recorded in the database replaces the snapshot."""
+    monkeypatch.setattr(memory_store, "enabled", lambda: True)
+    get_engine()
+    with SessionLocal() as db:
+        store = memory_store.get_store(db)
+        assert memory_store.get_store(db) is store
+        record_load(db)
+        db.commit()
+        database_version.refresh(db, force=True)
+        assert memory_store.get_store(db) is not store
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Test request instrumentation and the /metrics endpoint."""
+import dataclasses
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.climate_api.config import settings
+from src.climate_api.main import app
+from src.climate_api.metrics import Histogram, MetricsMiddleware, Registry
+from src.climate_api.routers import internal
+from src.climate_api.routers.years import router
+
+client = TestClient(app)
+
+TOKEN = "test-token"
+
+
+@pytest.fixture
+def token(monkeypatch):
+    """Enable the endpoints behind INTERNAL_TOKEN with TOKEN."""
+    monkeypatch.setattr(
+        internal, "settings", dataclasses.replace(settings, internal_token=TOKEN)
+    )
+
+
+def test_histogram_lines():
+    """Test buckets are cumulative and end with +Inf."""
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    lines = histogram.lines("latency", 'route="/year"')
+    assert lines[:3] == [
+        'latency_bucket{route="/year",le="0.1"} 1',
+        'latency_bucket{route="/year",le="1.0"} 2',
+        'latency_bucket{route="/year",le="+Inf"} 3',
+    ]
+    assert lines[-1] == 'latency_count{route="/year"} 3'
+
+
+def test_server_timing():
+    """Test each response reports its database time, without function names."""
+    response = client.get("/year", params={"limit": 5})
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert timing.startswith("total;dur=")
+    assert "db;dur=" in timing
+    assert "get_all_emission_rows" not in timing
+
+
+def test_server_timing_by_function():
+    """Test the database time is broken down by crud function when enabled."""
+    registry = Registry()
+    timed = TestClient(MetricsMiddleware(router, registry, function_timing=True))
+    timing = timed.get("/year", params={"limit": 5}).headers["server-timing"]
+    assert "get_all_emission_rows;dur=" in timing
+    assert ("/year", "get_all_emission_rows") in registry.query_counts
+
+
+def test_metrics_requires_token(token):  # pylint: disable=redefined-outer-name,unused-argument
+    """Test /metrics is refused without the internal token."""
+    assert client.get("/metrics").status_code == 401
+
+
+def test_metrics_disabled_without_token():
+    """Test /metrics doesn't exist unless INTERNAL_TOKEN is set."""
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics(token):  # pylint: disable=redefined-outer-name,unused-argument
+    """Test /metrics reports latency per route and queries per function."""
+    client.get("/year", params={"limit": 5})
+    response = client.get("/metrics", headers={"Authorization": f"Bearer {TOKEN}"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert "# TYPE climate_api_request_duration_seconds histogram" in text
+    assert (
+        'climate_api_request_duration_seconds_count{route="/year",method="GET"}'
+        in text
+    )
+    assert (
+        'climate_api_db_queries_total{route="/year",function="get_all_emission_rows"}'
+        in text
+    )
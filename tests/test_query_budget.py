@@ -0,0 +1,82 @@
+"""Test the query budget of every read endpoint."""
+import pytest
+from fastapi.testclient import TestClient
+
+from src.climate_api import memory_store
+from src.climate_api.cache import database_version, invalidate
+from src.climate_api.main import app
+from src.climate_api.query_budget import QueryBudgetExceeded
+
+client = TestClient(app)
+
+# Most statements each endpoint may send with the read cache and the memory
+# store cold. The tests trust the dataset version for an hour, so it is left
+# out; it costs one more statement per request when it is due.
+BUDGETS = {
+    "/companies": 1,
+    "/companies?include=years&include=goal": 3,
+    "/companies/Apple": 1,
+    "/companies/Apple/all_years": 1,
+    "/companies/Apple/2019": 1,
+    "/companies/Apple/change_1_2": 1,
+    "/companies/Apple/change_1_2_3": 1,
+    "/companies/Apple/change_1_2/2019_2022": 1,
+    "/companies/Apple/change_1_2_3/2019_2022": 1,
+    "/companies/Apple/goals": 2,
+    "/companies/Apple/profile": 1,
+    "/companies/Apple/series?from=2010&to=2020&fill=linear": 1,
+    "/companies/search?q=app": 1,
+    "/year": 1,
+    "/year/2019": 1,
+    "/year/2019/total": 1,
+    "/year/2019/scope_1_2": 1,
+    "/year/2019/scope_3": 1,
+    "/year/2019/summary": 1,
+    "/rankings/change_1_2": 1,
+    "/rankings/change_1_2_3": 1,
+    "/goals/progress": 1,
+    "/export/emissions": 1,
+    "/export/companies": 1,
+}
+
+
+@pytest.mark.parametrize("path", BUDGETS)
+def test_endpoint_budget(path, query_budget, monkeypatch):
+    """Test each endpoint stays within its query budget."""
+    # Budgets are about the queries themselves, not the in-memory copies
+    monkeypatch.setattr(memory_store, "enabled", lambda: False)
+    invalidate()
+    with query_budget(BUDGETS[path], label=path):
+        response = client.get(path)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/companies/Apple",
+        "/companies/Apple/change_1_2/2019_2022",
+        "/companies/search?q=app",
+        "/year",
+    ],
+)
+def test_budget_reading_dataset_version(path, query_budget, monkeypatch):
+    """Test an endpoint reads the dataset version once when it is due."""
+    monkeypatch.setattr(memory_store, "enabled", lambda: False)
+    monkeypatch.setattr(database_version, "interval", 0)
+    invalidate()
+    with query_budget(BUDGETS[path] + 1, label=path) as budget:
+        response = client.get(path)
+    assert response.status_code == 200
+    assert any("dataset_version" in statement for statement, _ in budget.statements)
+
+
+def test_reports_duplicates(query_budget):
+    """Test an exceeded budget lists the statements that were repeated."""
+    with pytest.raises(QueryBudgetExceeded) as error:
+        with query_budget(1, label="two pages"):
+            client.get("/year", params={"limit": 5})
+            client.get("/year", params={"limit": 5, "skip": 5})
+    report = str(error.value)
+    assert report.startswith("2 queries for two pages (budget 1)")
+    assert "2x: SELECT" in report
@@ -0,0 +1,40 @@
+"""Test the /rankings endpoints."""
+from fastapi.testclient import TestClient
+
+from src.climate_api.main import app
+from src.climate_api.routers.rankings import router
+
+client = TestClient(router)
+
+
+def test_change_1_2_ranking():
+    """Test the ranking matches the per company change endpoint."""
+    response = client.get("/rankings/change_1_2", params={"limit": 5})
+    assert response.status_code == 200
+    ranking = response.json()
+    assert len(ranking) == 5
+    assert [entry["rank"] for entry in ranking] == [1, 2, 3, 4, 5]
+    changes = [entry["change"] for entry in ranking]
+    assert changes == sorted(changes)
+    single = TestClient(app).get(f"/companies/{ranking[0]['title']}/change_1_2")
+    assert abs(single.json() - changes[0]) < 1e-9
+    largest = client.get("/rankings/change_1_2", params={"order": "largest"}).json()
+    assert largest[0]["change"] >= changes[-1]
+
+
+def test_change_1_2_3_ranking_range():
+    """Test ranking on percent change between two years."""
+    app_client = TestClient(app)
+    response = app_client.get(
+        "/rankings/change_1_2_3",
+        params={"start": 2010, "end": 2020, "percent": True, "limit": 3},
+    )
+    assert response.status_code == 200
+    for entry in response.json():
+        assert (entry["first_year"], entry["last_year"]) == (2010, 2020)
+        single = app_client.get(
+            f"/companies/{entry['title']}/change_1_2_3/2010_2020",
+            params={"percent": True},
+        ).json()
+        assert abs(single - entry["change"]) < 1e-9
+    assert app_client.get("/rankings/change_1_2_3?start=2010").status_code == 400
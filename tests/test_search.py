@@ -0,0 +1,90 @@
+"""Test the company name search index and endpoint."""
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from src.climate_api import search
+from src.climate_api.cache import database_version, record_load
+from src.climate_api.database import SessionLocal, get_engine
+from src.climate_api.main import app
+from src.climate_api.search import CompanyIndex
+
+client = TestClient(app)
+
+INDEX = CompanyIndex(
+    [
+        (1, "Apple"),
+        (2, "Applied Materials"),
+        (3, "Walmart"),
+        (4, "Bank of America"),
+        (5, "First Bank"),
+    ]
+)
+
+
+def test_index_ranks_exact_then_prefix():
+    """Test an exact title ranks above longer titles with the same prefix."""
+    results = INDEX.search("APPL")
+    assert [result["title"] for result in results] == ["Apple", "Applied Materials"]
+    assert INDEX.search("apple")[0]["score"] == 1.0
+
+
+def test_index_word_prefix():
+    """Test titles match on the start of any word, after whole title prefixes."""
+    titles = [result["title"] for result in INDEX.search("bank")]
+    assert titles[:2] == ["Bank of America", "First Bank"]
+    assert INDEX.search("of amer")[0]["title"] == "Bank of America"
+
+
+def test_index_fuzzy():
+    """Test a misspelled name still finds the company."""
+    assert INDEX.search("walmrt")[0]["title"] == "Walmart"
+    assert not INDEX.search("zzzz")
+
+
+def test_search_endpoint():
+    """Test the /companies/search endpoint."""
+    response = client.get("/companies/search", params={"q": "wal", "limit": 3})
+    assert response.status_code == 200
+    results = response.json()
+    assert 0 < len(results) <= 3
+    assert results[0]["title"] == "Walmart"
+    assert client.get("/companies/search").status_code == 422
+
+
+def test_index_rebuilt_after_load():
+    """Test a load recorded in the database rebuilds the index."""
+    get_engine()
+    with SessionLocal() as db:
+        index = asyncio.run(search.get_index(db))
+        assert asyncio.run(search.get_index(db)) is index
+        record_load(db)
+        db.commit()
+        database_version.refresh(db, force=True)
+        assert asyncio.run(search.get_index(db)) is not index
+
+
+def test_concurrent_rebuild_reads_once(monkeypatch):
+    """Test requests finding the index stale wait for a single rebuild."""
+    monkeypatch.setattr(search, "_index", None)
+    # A lock a test has waited on belongs to that test's event loop
+    monkeypatch.setattr(search, "_rebuild_lock", None)
+    reads = []
+    get_company_titles = search.crud.get_company_titles
+
+    def count(db):
+        reads.append(db)
+        time.sleep(0.05)  # Long enough for every request to find it stale
+        return get_company_titles(db)
+
+    monkeypatch.setattr(search.crud, "get_company_titles", count)
+
+    async def main(db):
+        return await asyncio.gather(*(search.get_index(db) for _ in range(5)))
+
+    get_engine()
+    with SessionLocal() as db:
+        indexes = asyncio.run(main(db))
+    assert len(reads) == 1
+    assert all(index is indexes[0] for index in indexes)
@@ -0,0 +1,81 @@
+"""Test dense series and the /companies/{company}/series endpoint."""
+import math
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.climate_api import series as series_module
+from src.climate_api.main import app
+from src.climate_api.series import build_series, fill_gaps, fill_list
+
+client = TestClient(app)
+
+POINTS = [(2005, 1.0), (2006, None), (2008, 4.0), (2011, 8.0)]
+
+
+@pytest.fixture(params=["numpy", "lists"])
+def arrays(request, monkeypatch):
+    """Build series with numpy, then again with the plain list fallback."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(series_module, "np", None)
+    return request.param
+
+
+def test_fill_gaps():
+    """Test each method only fills between or after reported values."""
+    np = pytest.importorskip("numpy")
+    values = np.array([np.nan, 1.0, np.nan, 3.0, np.nan])
+    assert np.isnan(fill_gaps(values, "none")[2])
+    assert fill_gaps(values, "ffill")[1:].tolist() == [1.0, 1.0, 3.0, 3.0]
+    linear = fill_gaps(values, "linear")
+    assert linear[2] == 2.0
+    assert np.isnan(linear[0]) and np.isnan(linear[4])
+    assert np.isnan(fill_gaps(values, "ffill")[0])
+
+
+def test_fill_list():
+    """Test the list fallback fills like fill_gaps."""
+    values = [None, 1.0, None, 3.0, None]
+    assert fill_list(values, "none") == values
+    assert fill_list(values, "ffill") == [None, 1.0, 1.0, 3.0, 3.0]
+    assert fill_list(values, "linear") == [None, 1.0, 2.0, 3.0, None]
+    with pytest.raises(ValueError):
+        fill_list(values, "cubic")
+
+
+def test_build_series(arrays):  # pylint: disable=redefined-outer-name,unused-argument
+    """Test missing years such as 2007 are laid out and marked as filled."""
+    series = build_series(POINTS, "linear", 2004, 2012)
+    assert series["years"] == list(range(2004, 2013))
+    assert series["values"][:5] == [None, 1.0, 2.0, 3.0, 4.0]
+    assert series["values"][-1] is None
+    assert series["filled"][:5] == [False, False, True, True, False]
+    assert build_series(POINTS, "none")["years"] == list(range(2005, 2012))
+
+
+def test_get_company_series(arrays):  # pylint: disable=redefined-outer-name,unused-argument
+    """Test the series endpoint returns every year of the range."""
+    response = client.get(
+        "/companies/Apple/series",
+        params={"from": 2005, "to": 2010, "scope": "scope1_2_3", "fill": "linear"},
+    )
+    assert response.status_code == 200
+    series = response.json()
+    assert series["years"] == list(range(2005, 2011))
+    # The synthetic data skips 2007 like populate_emissions does
+    assert series["filled"][2] is True
+    before, after = series["values"][1], series["values"][3]
+    assert math.isclose(series["values"][2], (before + after) / 2)
+    first = client.get("/companies/Apple/2005").json()
+    assert math.isclose(series["values"][0], first["scope1_2_3"])
+
+
+def test_get_company_series_errors():
+    """Test unknown companies, bad ranges and fill methods are rejected."""
+    assert client.get("/companies/Nope/series").status_code == 404
+    bad_range = {"from": 2020, "to": 2010}
+    assert client.get("/companies/Apple/series", params=bad_range).status_code == 400
+    bad_fill = client.get("/companies/Apple/series", params={"fill": "cubic"})
+    assert bad_fill.status_code == 422
@@ -2,8 +2,9 @@
 from pydantic import ValidationError
 
 from fastapi.testclient import TestClient
+from src.climate_api.main import app
 from src.climate_api.routers.years import router
-from src.climate_api.models import Year
+from src.climate_api.models import Year, YearSummary
 
 client = TestClient(router)
 
@@ -20,6 +21,26 @@ def test_get_all_emissions():
         assert False, f"Response data does not match Year model: {e}"
 
 
+def test_year_schema():
+    """Test the rows returned directly are still documented as Year objects."""
+    paths = TestClient(app).get("/openapi.json").json()["paths"]
+    for path in ["/year", "/year/{year}", "/companies/{company}/all_years"]:
+        schema = paths[path]["get"]["responses"]["200"]["content"]
+        items = schema["application/json"]["schema"]["items"]
+        assert items == {"$ref": "#/components/schemas/Year"}
+
+
+def test_get_all_emissions_cursor():
+    """Test the /year endpoint pages by cursor as well as by offset."""
+    first = client.get("/year", params={"limit": 5})
+    assert len(first.json()) == 5
+    cursor = first.headers["x-next-cursor"]
+    second = client.get("/year", params={"limit": 5, "cursor": cursor}).json()
+    by_offset = client.get("/year", params={"limit": 5, "skip": 5}).json()
+    assert second == by_offset
+    assert second[0]["id"] > first.json()[-1]["id"]
+
+
 def test_get_yearly_emissions():
     """Test the /year/{year} endpoint."""
     response = client.get("/year/2019")
@@ -57,3 +78,14 @@ def test_get_scope3_emissions():
     total = client.get("/year/2019/total")
     assert total.status_code == 200
     assert response.json() <= total.json()
+
+
+def test_get_year_summary():
+    """Test the /year/{year}/summary endpoint."""
+    response = client.get("/year/2019/summary")
+    assert response.status_code == 200
+    summary = YearSummary(**response.json())
+    assert summary.year == 2019
+    assert summary.total == client.get("/year/2019/total").json()
+    assert summary.scope1_2 == client.get("/year/2019/scope_1_2").json()
+    assert summary.scope3 == client.get("/year/2019/scope_3").json()